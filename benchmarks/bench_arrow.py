@@ -0,0 +1,163 @@
+"""
+Proyecto: Demo RFM
+Módulo: bench_arrow.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor:
+Modificado por:
+Fecha modificación:
+Descripción:
+    Benchmark del modo Arrow (`global_settings.dtype_backend: 'pyarrow'`) contra el modo NumPy original sobre
+    transacciones sintéticas (`benchmarks.synthetic`) escritas en CSV o Parquet.
+
+    Cada backend se ejecuta en un proceso propio para que el pico de memoria del proceso (RSS) no se mezcle entre
+    ambos. Por cada etapa se mide el tiempo de reloj y la memoria del DataFrame resultante:
+    - load: DataLoader.load_from_csv / load_from_parquet (sin filtro de fechas).
+    - preprocess: pasos de `preprocessing_steps.retail_data`.
+    - calculate_rfm: agregación RFM (`rfm_aggregation: 'vectorized'`).
+    - process_rfm_data: límites, breaks, puntajes y rangos (`range_format: 'bounds'` en ambos backends).
+    - process_rfm: score final y categorías de negocio.
+    - export.parquet: exportación del resultado.
+    Además se reporta el pico de RSS del proceso y el pico del pool de memoria de Arrow.
+
+    Uso:
+        python -m benchmarks.bench_arrow --rows 1000000 5000000 --source parquet
+"""
+
+import argparse
+import copy
+import dataclasses
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.synthetic import default_customers, write_transactions
+
+BACKENDS = ("numpy", "pyarrow")
+
+
+def run_backend(backend: str, source_path: str, config_path: str, output_dir: str) -> dict:
+    """
+    Ejecuta el pipeline completo con un backend y mide cada etapa (se llama en un proceso propio).
+
+    Retorna:
+        - dict: {"backend", "stages": {etapa: {"seconds", "frame_mb", "rows"}}, "process_peak_rss_mb", "arrow_pool_peak_mb"}
+    """
+    import pyarrow as pa
+    from modules.data_loader import DataLoader
+    from modules.dtype_planner import memory_mb
+    from modules.exporter import DataExporter
+    from modules.metrics import process_peak_rss_mb
+    from modules.preprocessing import DataPreprocessor
+    from modules.rfm_calculator import RFMCalculator
+    from modules.rfm_processing import RFMProcessing
+    from modules.run_context import get_run_context
+    from modules.segment_assigner import RFMProcessor
+
+    # Contexto propio con una copia de la configuración: el benchmark cambia el backend, la fuente y la exportación
+    base_context = get_run_context(config_path)
+    context = dataclasses.replace(base_context, config=copy.deepcopy(base_context.config))
+    config = context.config
+    config["global_settings"].update(dtype_backend=backend, range_format="bounds", rfm_aggregation="vectorized")
+    source_type = "parquet" if source_path.endswith(".parquet") else "csv"
+    config["data_sources"].setdefault(f"{source_type}_sources", {})["benchmark"] = {"path": source_path, "parse_dates": ["InvoiceDate"]}
+    output_path = os.path.join(output_dir, f"rfm_{backend}.parquet")
+    config.setdefault("export_settings", {}).setdefault("parquet_sources", {})["benchmark"] = {"path": output_path}
+
+    stages = {}
+
+    def measure(name, function):
+        start = time.perf_counter()
+        result = function()
+        stages[name] = {"seconds": round(time.perf_counter() - start, 6)}
+        if result is not None:
+            stages[name].update(frame_mb=round(memory_mb(result), 3), rows=len(result))
+        return result
+
+    loader = DataLoader(context=context)
+    load = loader.load_from_parquet if source_type == "parquet" else loader.load_from_csv
+    data = measure("load", lambda: load("benchmark", filter_dates=False))
+    data = measure("preprocess", lambda: DataPreprocessor(context=context).apply_preprocessing_to_source(data, "retail_data"))
+    rfm_data = measure("calculate_rfm", lambda: RFMCalculator(context=context).calculate_rfm(data))
+    del data
+    scored = measure("process_rfm_data", lambda: RFMProcessing(context=context).process_rfm_data(rfm_data))
+    result = measure("process_rfm", lambda: RFMProcessor(context=context).process_rfm(scored))
+    measure("export.parquet", lambda: DataExporter(context=context).export_to_parquet(result, "benchmark"))
+    stages["export.parquet"]["bytes"] = os.path.getsize(output_path) if os.path.exists(output_path) else None
+
+    return {
+        "backend": backend,
+        "stages": stages,
+        "process_peak_rss_mb": process_peak_rss_mb(),
+        "arrow_pool_peak_mb": round(pa.default_memory_pool().max_memory() / 1024 ** 2, 3),
+    }
+
+
+def bench_scale(rows: int, customers: int, seed: int, source: str, config_path: str) -> dict:
+    """ Escribe los datos sintéticos de una escala y ejecuta cada backend en un subproceso. """
+    with tempfile.TemporaryDirectory() as output_dir:
+        source_path = write_transactions(os.path.join(output_dir, f"transactions.{source}"), rows, customers, seed,
+                                         return_rate=0.02, missing_customer_rate=0.01)
+        runs = {}
+        for backend in BACKENDS:
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_arrow", "--worker", backend, "--source-path", source_path,
+                 "--config", config_path, "--output-dir", output_dir],
+                capture_output=True, text=True, check=True,
+            )
+            # La última línea de la salida del subproceso es el resultado en JSON
+            runs[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"rows": rows, "customers": customers, "seed": seed, "source": source, "backends": runs}
+
+
+def report(run: dict) -> None:
+    """ Imprime la comparación de tiempo y memoria por etapa de una escala. """
+    numpy_run, arrow_run = run["backends"]["numpy"], run["backends"]["pyarrow"]
+    print(f"\n=== {run['rows']:,} filas ({run['source']}) ===")
+    print(f"{'Etapa':<18} {'NumPy (s)':>10} {'Arrow (s)':>10} {'Razón':>7} {'NumPy (MB)':>11} {'Arrow (MB)':>11}")
+    for stage, numpy_stage in numpy_run["stages"].items():
+        arrow_stage = arrow_run["stages"][stage]
+        ratio = arrow_stage["seconds"] / numpy_stage["seconds"] if numpy_stage["seconds"] else float("nan")
+        numpy_mb, arrow_mb = numpy_stage.get("frame_mb"), arrow_stage.get("frame_mb")
+        print(f"{stage:<18} {numpy_stage['seconds']:>10.4f} {arrow_stage['seconds']:>10.4f} {ratio:>6.2f}x"
+              f" {numpy_mb if numpy_mb is not None else '-':>11} {arrow_mb if arrow_mb is not None else '-':>11}")
+    for key in ("process_peak_rss_mb", "arrow_pool_peak_mb"):
+        print(f"{key:<18} {numpy_run[key] if numpy_run[key] is not None else '-':>10} {arrow_run[key] if arrow_run[key] is not None else '-':>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del modo Arrow contra el modo NumPy del pipeline RFM.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000], help="Escalas (número de transacciones).")
+    parser.add_argument("--customers", type=int, default=None, help="Número de clientes distintos. Por defecto ~100 líneas por cliente.")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del generador de datos.")
+    parser.add_argument("--source", choices=("csv", "parquet"), default="parquet", help="Formato de la fuente de transacciones.")
+    parser.add_argument("--config", default=os.path.join("config", "configuracion.yaml"), help="Ruta al archivo YAML.")
+    parser.add_argument("--output", default=None, help="Archivo JSON de resultados. Por defecto benchmarks/results/bench_arrow_<fecha>.json.")
+    # Uso interno: ejecución de un backend en un subproceso
+    parser.add_argument("--worker", choices=BACKENDS, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--source-path", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.source_path, args.config, args.output_dir)))
+        return
+
+    results = {"created_at": datetime.now().isoformat(timespec="seconds"), "runs": []}
+    for rows in args.rows:
+        run = bench_scale(rows, args.customers or default_customers(rows), args.seed, args.source, args.config)
+        report(run)
+        results["runs"].append(run)
+
+    output = args.output or os.path.join("benchmarks", "results", f"bench_arrow_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Proyecto: Demo RFM
+Módulo: bench_pipeline.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor:
+Modificado por:
+Fecha modificación:
+Descripción:
+    Benchmark de extremo a extremo del pipeline RFM sobre transacciones sintéticas (`benchmarks.synthetic`).
+
+    Para cada escala indicada en `--rows` se mide cada etapa (mínimo y mediana de `--repeat` repeticiones):
+    - calculate_rfm: agregación RFM por cliente (método de `global_settings.rfm_aggregation`).
+    - calculate_breaks.percentiles / calculate_breaks.jenks: puntos de corte de Recency, Frequency y Monetary.
+    - calculate_score: puntajes y rangos con los breaks de Jenks ya calculados.
+    - calculate_final_score y assign_business_categories.
+    - export.csv / export.parquet: exportación del resultado a un directorio temporal.
+
+    Los resultados se guardan en JSON junto con el entorno (versiones, plataforma, commit) y se pueden comparar contra
+    un resultado anterior con `--baseline`; las etapas más lentas que la línea base por encima de `--threshold` se
+    reportan como regresión.
+
+    Uso:
+        python -m benchmarks.bench_pipeline --rows 10000 100000 1000000 --output benchmarks/results/base.json
+        python -m benchmarks.bench_pipeline --rows 10000 100000 1000000 --baseline benchmarks/results/base.json
+"""
+
+import argparse
+import copy
+import dataclasses
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import default_customers, generate_transactions
+from modules.exporter import DataExporter
+from modules.rfm_calculator import RFMCalculator
+from modules.rfm_processing import RFMProcessing
+from modules.run_context import get_run_context
+from modules.segment_assigner import RFMProcessor
+
+
+def time_stage(function, repeat: int):
+    """ Ejecuta `function` `repeat` veces y devuelve (último resultado, lista de segundos). """
+    seconds, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+    return result, seconds
+
+
+def environment() -> dict:
+    """ Información del entorno para interpretar y comparar resultados. """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def bench_scale(context, rows: int, customers: int, seed: int, repeat: int, jenks_approximation: str, output_dir: str) -> dict:
+    """
+    Mide todas las etapas del pipeline para una escala.
+
+    Retorna:
+        - dict: {"rows", "customers", "seed", "stages": {etapa: {"min_seconds", "median_seconds", "rows_per_second"}}}
+    """
+    stages = {}
+
+    def record(name, seconds, n):
+        best = min(seconds)
+        stages[name] = {
+            "min_seconds": round(best, 6),
+            "median_seconds": round(statistics.median(seconds), 6),
+            "rows_per_second": round(n / best) if best > 0 else None,
+        }
+        print(f"  {name:<30} {best:>10.4f}s")
+
+    data = generate_transactions(rows, customers, seed)
+    print(f"Transacciones: {len(data):,} | Clientes: {data['CustomerID'].nunique():,}")
+
+    calculator = RFMCalculator(context=context)
+    rfm_data, seconds = time_stage(lambda: calculator.calculate_rfm(data), repeat)
+    record("calculate_rfm", seconds, len(data))
+    del data
+
+    processing = RFMProcessing(context=context)
+    breaks = {}
+    for method in ("percentiles", "jenks"):
+        def fit():
+            fitted = {}
+            for column, var_config in processing.variables_config.items():
+                var_config["breaks_method"] = method
+                if jenks_approximation:
+                    var_config["jenks_approximation"] = jenks_approximation
+                fitted[column] = processing.calculate_breaks(rfm_data, column)
+            return fitted
+        breaks[method], seconds = time_stage(fit, repeat)
+        record(f"calculate_breaks.{method}", seconds, len(rfm_data))
+
+    scored, seconds = time_stage(lambda: processing.process_rfm_data(rfm_data, fitted_breaks=breaks["jenks"]), repeat)
+    record("calculate_score", seconds, len(rfm_data))
+
+    assigner = RFMProcessor(context=context)
+    final_score, seconds = time_stage(lambda: assigner.calculate_final_score(scored), repeat)
+    record("calculate_final_score", seconds, len(scored))
+    scored["Final_Score"] = final_score
+    result, seconds = time_stage(lambda: assigner.assign_business_categories(scored), repeat)
+    record("assign_business_categories", seconds, len(scored))
+    result["CutoffDate"] = assigner.end_date
+
+    exporter = DataExporter(context=context)
+    for export_format in ("csv", "parquet"):
+        key = f"benchmark_{export_format}"
+        path = os.path.join(output_dir, f"rfm_{rows}.{export_format}")
+        context.config.setdefault("export_settings", {}).setdefault(f"{export_format}_sources", {})[key] = {"path": path}
+        export = getattr(exporter, f"export_to_{export_format}")
+        _, seconds = time_stage(lambda: export(result, key), repeat)
+        record(f"export.{export_format}", seconds, len(result))
+        stages[f"export.{export_format}"]["bytes"] = os.path.getsize(path) if os.path.exists(path) else None
+
+    return {"rows": rows, "customers": customers, "seed": seed, "stages": stages}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compara los resultados con una línea base (por escala y etapa, usando `min_seconds`).
+
+    Retorna:
+        - list: Regresiones encontradas como tuplas (filas, etapa, segundos base, segundos actuales).
+    """
+    baseline_runs = {run["rows"]: run for run in baseline.get("runs", [])}
+    regressions = []
+    print(f"\n{'Filas':>12} {'Etapa':<30} {'Base (s)':>10} {'Actual (s)':>10} {'Razón':>7}")
+    for run in results["runs"]:
+        base_run = baseline_runs.get(run["rows"])
+        if base_run is None:
+            continue
+        for stage, metrics in run["stages"].items():
+            base_metrics = base_run["stages"].get(stage)
+            if not base_metrics or not base_metrics["min_seconds"]:
+                continue
+            ratio = metrics["min_seconds"] / base_metrics["min_seconds"]
+            flag = "  REGRESIÓN" if ratio > 1 + threshold else ""
+            print(f"{run['rows']:>12,} {stage:<30} {base_metrics['min_seconds']:>10.4f} {metrics['min_seconds']:>10.4f} {ratio:>6.2f}x{flag}")
+            if flag:
+                regressions.append((run["rows"], stage, base_metrics["min_seconds"], metrics["min_seconds"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo del pipeline RFM con datos sintéticos.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Escalas (número de transacciones), de 10^4 a 10^8.")
+    parser.add_argument("--customers", type=int, default=None, help="Número de clientes distintos. Por defecto ~100 líneas por cliente.")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del generador de datos.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por etapa (se reporta el mínimo y la mediana).")
+    parser.add_argument("--jenks-approximation", default=None, help="Sobrescribe jenks_approximation de todas las variables (p. ej. 'histogram' para escalas grandes).")
+    parser.add_argument("--config", default=os.path.join("config", "configuracion.yaml"), help="Ruta al archivo YAML.")
+    parser.add_argument("--output", default=None, help="Archivo JSON de resultados. Por defecto benchmarks/results/bench_pipeline_<fecha>.json.")
+    parser.add_argument("--baseline", default=None, help="Archivo JSON de una ejecución anterior para comparar.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Aumento relativo de tiempo que se reporta como regresión.")
+    args = parser.parse_args()
+
+    # Contexto propio con una copia de la configuración: el benchmark modifica métodos de breaks y rutas de exportación
+    base_context = get_run_context(args.config)
+    context = dataclasses.replace(base_context, config=copy.deepcopy(base_context.config))
+
+    results = {"created_at": datetime.now().isoformat(timespec="seconds"), "environment": environment(), "runs": []}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for rows in args.rows:
+            customers = args.customers or default_customers(rows)
+            print(f"\n=== {rows:,} filas ===")
+            results["runs"].append(bench_scale(context, rows, customers, args.seed, args.repeat, args.jenks_approximation, output_dir))
+
+    output = args.output or os.path.join("benchmarks", "results", f"bench_pipeline_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} etapa(s) más lentas que la línea base en más de {args.threshold:.0%}.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Proyecto: Demo RFM
+Módulo: bench_rfm_calculator.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor: 
+Modificado por: 
+Fecha modificación: 
+Descripción:
+    Benchmark de `RFMCalculator.calculate_rfm` comparando la agregación `groupby` original (con funciones lambda)
+    contra la agregación `vectorized`. Genera transacciones sintéticas (`benchmarks.synthetic`), verifica que ambos resultados sean idénticos
+    y reporta el tiempo de cada método y la aceleración obtenida.
+
+    Uso:
+        python -m benchmarks.bench_rfm_calculator --rows 10000000 --customers 500000
+"""
+
+import argparse
+import os
+import time
+import pandas as pd
+from benchmarks.synthetic import generate_transactions
+from modules.rfm_calculator import RFMCalculator
+from modules.run_context import get_run_context
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de agregación RFM: groupby vs vectorized.")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Número de transacciones sintéticas.")
+    parser.add_argument("--customers", type=int, default=500_000, help="Número de clientes distintos.")
+    parser.add_argument("--config", default=os.path.join("config", "configuracion.yaml"), help="Ruta al archivo YAML.")
+    args = parser.parse_args()
+
+    data = generate_transactions(args.rows, args.customers)
+    print(f"Transacciones: {len(data):,} | Clientes: {data['CustomerID'].nunique():,}")
+
+    results, timings = {}, {}
+    for method in ("groupby", "vectorized"):
+        # Contexto propio con una copia de la configuración: no se modifica la configuración compartida en caché
+        context = get_run_context(args.config).isolated()
+        context.config["global_settings"]["rfm_aggregation"] = method
+        calculator = RFMCalculator(context=context)
+        start = time.perf_counter()
+        results[method] = calculator.calculate_rfm(data)
+        timings[method] = time.perf_counter() - start
+        print(f"{method:>10}: {timings[method]:.2f}s")
+
+    pd.testing.assert_frame_equal(results["groupby"], results["vectorized"], check_exact=True)
+    print(f"Resultados idénticos. Aceleración: {timings['groupby'] / timings['vectorized']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
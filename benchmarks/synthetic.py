@@ -0,0 +1,190 @@
+"""
+Proyecto: Demo RFM
+Módulo: synthetic.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor:
+Modificado por:
+Fecha modificación:
+Descripción:
+    Generador reproducible de transacciones sintéticas con la forma del conjunto Online Retail
+    (InvoiceNo, InvoiceDate, Quantity, CustomerID, UnitPrice), para medir el pipeline RFM sin los archivos privados
+    referenciados en `configuracion.yaml`.
+
+    - Cada factura tiene varias líneas (número de líneas con distribución geométrica) que comparten InvoiceNo,
+      InvoiceDate y CustomerID.
+    - La actividad de los clientes es sesgada: la probabilidad de que una factura pertenezca a un cliente sigue una
+      distribución de Pareto, de modo que pocos clientes concentran muchas compras.
+    - Las fechas caen dentro del rango del análisis RFM (2023-12-01 a 2024-12-10 por defecto).
+    - Opcionalmente se incluyen devoluciones (Quantity negativa) y clientes faltantes (CustomerID nulo).
+
+    Las transacciones se generan por fragmentos con la misma semilla, por lo que escalas de 10^4 a 10^8 filas se pueden
+    producir en memoria (`generate_transactions`) o escribir a disco sin materializarlas (`write_transactions`).
+
+    Uso:
+        python -m benchmarks.synthetic --rows 100000000 --output data/synthetic.parquet
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+DEFAULT_START = "2023-12-01"
+DEFAULT_END = "2024-12-10"
+FIRST_INVOICE = 536365
+
+
+def default_customers(rows: int) -> int:
+    """ Número de clientes por defecto: aproximadamente 100 líneas por cliente, como en Online Retail. """
+    return max(100, rows // 100)
+
+
+def iter_transactions(rows: int, customers: int = None, seed: int = 0, chunksize: int = 5_000_000,
+                      start: str = DEFAULT_START, end: str = DEFAULT_END, lines_per_invoice: float = 10.0,
+                      return_rate: float = 0.0, missing_customer_rate: float = 0.0):
+    """
+    Genera transacciones sintéticas por fragmentos.
+
+    Parámetros:
+        - rows (int): Número total de líneas de factura.
+        - customers (int, opcional): Número de clientes distintos. Por defecto `default_customers(rows)`.
+        - seed (int): Semilla del generador aleatorio. La misma semilla y los mismos parámetros producen los mismos datos.
+        - chunksize (int): Líneas por fragmento.
+        - start, end (str): Rango de fechas de las facturas.
+        - lines_per_invoice (float): Promedio de líneas por factura.
+        - return_rate (float): Proporción de líneas con Quantity negativa (devoluciones).
+        - missing_customer_rate (float): Proporción de facturas sin CustomerID.
+
+    Retorna:
+        - Generator[pd.DataFrame]: Fragmentos con columnas InvoiceNo, InvoiceDate, Quantity, CustomerID y UnitPrice.
+          CustomerID es entero, o float con nulos si `missing_customer_rate > 0`.
+    """
+    customers = customers or default_customers(rows)
+    rng = np.random.default_rng(seed)
+
+    # Actividad sesgada: pesos de Pareto por cliente
+    weights = rng.pareto(1.2, customers) + 1
+    weights /= weights.sum()
+    customer_ids = np.arange(10000, 10000 + customers)
+    start_ns, end_ns = pd.Timestamp(start).value, pd.Timestamp(end).value
+
+    next_invoice = FIRST_INVOICE
+    remaining = rows
+    while remaining > 0:
+        n = min(chunksize, remaining)
+
+        # Líneas por factura hasta completar exactamente n líneas
+        estimate = int(n / lines_per_invoice * 1.2) + 16
+        lines = rng.geometric(1 / lines_per_invoice, estimate)
+        while lines.sum() < n:
+            lines = np.concatenate([lines, rng.geometric(1 / lines_per_invoice, estimate)])
+        cumulative = np.cumsum(lines)
+        invoices = int(np.searchsorted(cumulative, n)) + 1
+        lines = lines[:invoices]
+        lines[-1] -= cumulative[invoices - 1] - n
+
+        # Atributos por factura, repetidos para cada línea
+        invoice_no = np.arange(next_invoice, next_invoice + invoices)
+        invoice_customer = rng.choice(customer_ids, size=invoices, p=weights)
+        invoice_date = (rng.integers(start_ns, end_ns, invoices) // 60_000_000_000) * 60_000_000_000
+        if missing_customer_rate > 0:
+            invoice_customer = invoice_customer.astype(np.float64)
+            invoice_customer[rng.random(invoices) < missing_customer_rate] = np.nan
+
+        quantity = rng.geometric(0.3, n).astype(np.int64)
+        if return_rate > 0:
+            quantity[rng.random(n) < return_rate] *= -1
+
+        yield pd.DataFrame({
+            "InvoiceNo": np.repeat(invoice_no, lines),
+            "InvoiceDate": pd.to_datetime(np.repeat(invoice_date, lines)),
+            "Quantity": quantity,
+            "CustomerID": np.repeat(invoice_customer, lines),
+            "UnitPrice": np.round(rng.lognormal(1, 1, n), 2),
+        })
+
+        next_invoice += invoices
+        remaining -= n
+
+
+def generate_transactions(rows: int, customers: int = None, seed: int = 0, **kwargs) -> pd.DataFrame:
+    """
+    Genera transacciones sintéticas en memoria con actividad de clientes sesgada.
+
+    Parámetros:
+        - rows (int): Número de líneas de factura.
+        - customers (int, opcional): Número de clientes distintos.
+        - seed (int): Semilla del generador aleatorio.
+        - **kwargs: Parámetros adicionales de `iter_transactions`.
+
+    Retorna:
+        - pd.DataFrame: Transacciones con columnas InvoiceNo, InvoiceDate, Quantity, CustomerID y UnitPrice.
+    """
+    kwargs.setdefault("chunksize", max(rows, 1))
+    chunks = list(iter_transactions(rows, customers, seed, **kwargs))
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def write_transactions(path: str, rows: int, customers: int = None, seed: int = 0, **kwargs) -> str:
+    """
+    Escribe transacciones sintéticas a CSV o Parquet (según la extensión) fragmento a fragmento.
+
+    Parámetros:
+        - path (str): Ruta del archivo de salida (.csv o .parquet).
+        - rows (int): Número de líneas de factura.
+        - customers (int, opcional): Número de clientes distintos.
+        - seed (int): Semilla del generador aleatorio.
+        - **kwargs: Parámetros adicionales de `iter_transactions`.
+
+    Retorna:
+        - str: Ruta del archivo escrito.
+
+    Excepciones:
+        - ValueError: Si la extensión no es .csv ni .parquet.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in (".csv", ".parquet"):
+        raise ValueError(f"Formato de salida no soportado: '{extension}'. Use .csv o .parquet.")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    writer = None
+    try:
+        for i, chunk in enumerate(iter_transactions(rows, customers, seed, **kwargs)):
+            if extension == ".csv":
+                chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de transacciones sintéticas con forma de Online Retail.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Número de líneas de factura.")
+    parser.add_argument("--customers", type=int, default=None, help="Número de clientes distintos.")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del generador aleatorio.")
+    parser.add_argument("--chunksize", type=int, default=5_000_000, help="Líneas por fragmento.")
+    parser.add_argument("--return-rate", type=float, default=0.0, help="Proporción de líneas con Quantity negativa.")
+    parser.add_argument("--missing-customer-rate", type=float, default=0.0, help="Proporción de facturas sin CustomerID.")
+    parser.add_argument("--output", required=True, help="Archivo de salida (.csv o .parquet).")
+    args = parser.parse_args()
+
+    write_transactions(args.output, args.rows, args.customers, args.seed, chunksize=args.chunksize,
+                       return_rate=args.return_rate, missing_customer_rate=args.missing_customer_rate)
+    print(f"{args.rows:,} transacciones escritas en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,13 @@ from modules.rfm_calculator import RFMCalculator
 from modules.rfm_processing import RFMProcessing
 from modules.segment_assigner import RFMProcessor
 from modules.exporter import DataExporter
+from modules.incremental import IncrementalRFM
+from modules.run_context import get_run_context
+from modules.dtype_planner import DtypePlanner
+from modules.metrics import PipelineMetrics
+from modules.segments import SegmentedRFM
+from modules.backfill import RFMBackfill
+from modules.model_store import RFMModelStore
 import pandas as pd
 import os
 
@@ -12,55 +19,175 @@ if __name__ == "__main__":
     # Ruta al archivo de configuración en la carpeta 'config'
     config_path = os.path.join("config", "configuracion.yaml")  
 
+    metrics = None
+    error = None
     try:
-        # Instancia de DataLoader con el archivo de configuración
-        data_loader = DataLoader(config_path)
+        # Contexto de ejecución compartido: el YAML se lee y valida una sola vez y todas las etapas usan la misma end_date
+        context = get_run_context(config_path)
+
+        # Instancia de DataLoader con el contexto de ejecución
+        data_loader = DataLoader(context=context)
         
-        # Instancia de DataPreprocessor con el archivo de configuración
-        preprocessor = DataPreprocessor(config_path)
+        # Instancia de DataPreprocessor con el contexto de ejecución
+        preprocessor = DataPreprocessor(context=context)
+
+        # Instancia de RFM Calculator con el contexto de ejecución
+        rfm_calculator = RFMCalculator(context=context)
+
+        # Instancia de RFMProcessing con el contexto de ejecución
+        rfm_processor = RFMProcessing(context=context)
+
+        # Instancia de RFMProcessor con el contexto de ejecución
+        rfm_assigner = RFMProcessor(context=context)
 
-        # Instancia de RFM Calculator con el archivo de configuración
-        rfm_calculator = RFMCalculator(config_path)
+        # Instancia de DataExporter con el contexto de ejecución
+        exporter = DataExporter(context=context)
 
-        # Instancia de RFMProcessing con el archivo de configuración
-        rfm_processor = RFMProcessing(config_path)
+        # Instancia de DtypePlanner: tipos compactos y registro de memoria en cada etapa (si está habilitado)
+        planner = DtypePlanner(context=context)
 
-        # Instancia de RFMProcessor con el archivo de configuración
-        rfm_assigner = RFMProcessor(config_path)
+        # Instancia de RFMModelStore: guarda el modelo ajustado ('fit') o puntúa con el modelo guardado ('score')
+        model_store = RFMModelStore(context=context)
 
-        # Instancia de DataExporter con el archivo de configuración
-        exporter = DataExporter(config_path)
+        # Instancia de PipelineMetrics: tiempo, CPU, memoria y filas de cada etapa (si está habilitado)
+        metrics = PipelineMetrics(context=context)
 
-        # Cargar datos desde la fuente específica de Excel
-        data = data_loader.load_from_excel(excel_key ='retail_data', filter_dates = True) 
+        streaming_config = data_loader.config['global_settings'].get('streaming', {})
+        incremental_enabled = data_loader.config.get('incremental', {}).get('enabled', False)
+        segments_enabled = data_loader.config.get('segments', {}).get('enabled', False)
+        backfill_config = data_loader.config.get('backfill', {}) or {}
+        backfill_enabled = backfill_config.get('enabled', False)
+        if backfill_enabled:
+            # RFM histórico para varias fechas de corte: se cargan todas las transacciones y se agregan en una sola pasada
+            backfill = RFMBackfill(context=context)
+            with metrics.stage("DataLoader.load_from_excel") as record:
+                data = planner.optimize(data_loader.load_from_excel(excel_key ='retail_data', filter_dates = False), "carga")
+                record["rows_out"] = len(data)
+            with metrics.stage("DataPreprocessor.apply_preprocessing_to_source", rows_in=len(data)) as record:
+                data_processed = planner.optimize(preprocessor.apply_preprocessing_to_source(data, "retail_data"), "preprocesamiento")
+                record["rows_out"] = len(data_processed)
+            with metrics.stage("RFMBackfill.calculate_rfm", rows_in=len(data_processed)) as record:
+                rfm_data = backfill.calculate_rfm(data_processed)
+                record["rows_out"] = len(rfm_data)
+        elif incremental_enabled:
+            # Ingerir sólo las transacciones nuevas en el almacén de estado y recalcular sólo los clientes afectados
+            incremental = IncrementalRFM(context=context)
+            with metrics.stage("DataLoader.load_from_excel") as record:
+                data = planner.optimize(data_loader.load_from_excel(excel_key ='retail_data', filter_dates = True), "carga")
+                record["rows_out"] = len(data)
+            # Sólo se preprocesan las transacciones posteriores a la marca de agua
+            data = incremental.new_transactions(data)
+            with metrics.stage("DataPreprocessor.apply_preprocessing_to_source", rows_in=len(data)) as record:
+                data_processed = planner.optimize(preprocessor.apply_preprocessing_to_source(data, "retail_data"), "preprocesamiento")
+                record["rows_out"] = len(data_processed)
+            with metrics.stage("IncrementalRFM.ingest", rows_in=len(data_processed)) as record:
+                incremental.ingest(data_processed)
+                rfm_data = incremental.get_rfm()
+                record["rows_out"] = len(rfm_data)
+        elif segments_enabled:
+            # Una sola carga y preprocesamiento para todos los segmentos definidos en el YAML
+            segmented = SegmentedRFM(context=context)
+            with metrics.stage("DataLoader.load_from_excel") as record:
+                data = planner.optimize(data_loader.load_from_excel(excel_key ='retail_data', filter_dates = True), "carga")
+                record["rows_out"] = len(data)
+            with metrics.stage("DataPreprocessor.apply_preprocessing_to_source", rows_in=len(data)) as record:
+                data_processed = planner.optimize(preprocessor.apply_preprocessing_to_source(data, "retail_data"), "preprocesamiento")
+                record["rows_out"] = len(data_processed)
+            # Agregados RFM con una sola pasada agrupada sobre (segmento, cliente)
+            with metrics.stage("SegmentedRFM.calculate_rfm", rows_in=len(data_processed)) as record:
+                rfm_data = segmented.calculate_rfm(data_processed, rfm_calculator)
+                record["rows_out"] = len(rfm_data)
+        elif streaming_config.get('enabled', False):
+            # Cargar, preprocesar y agregar por fragmentos sin materializar todas las transacciones
+            chunks = data_loader.iter_chunks(streaming_config.get('source_type', 'csv'), streaming_config['source_key'],
+                                             chunksize=streaming_config.get('chunksize'), filter_dates=True)
+            with metrics.stage("RFMCalculator.calculate_rfm_streaming") as record:
+                rfm_data = rfm_calculator.calculate_rfm_streaming(chunks, preprocessor, streaming_config.get('preprocessing_key', 'retail_data'))
+                record["rows_out"] = len(rfm_data)
+        elif data_loader.config['global_settings'].get('workers', 1) > 1:
+            # Preprocesar y agregar en paralelo, particionando por cliente
+            with metrics.stage("DataLoader.load_from_excel") as record:
+                data = planner.optimize(data_loader.load_from_excel(excel_key ='retail_data', filter_dates = True), "carga")
+                record["rows_out"] = len(data)
+            with metrics.stage("RFMCalculator.calculate_rfm_parallel", rows_in=len(data)) as record:
+                rfm_data = rfm_calculator.calculate_rfm_parallel(data, preprocessor, "retail_data")
+                record["rows_out"] = len(rfm_data)
+        else:
+            # Cargar datos desde la fuente específica de Excel
+            with metrics.stage("DataLoader.load_from_excel") as record:
+                data = planner.optimize(data_loader.load_from_excel(excel_key ='retail_data', filter_dates = True), "carga")
+                record["rows_out"] = len(data)
 
-        # Preprocesamiento de datos
-        data_processed = preprocessor.apply_preprocessing_to_source(data, "retail_data")
+            # Preprocesamiento de datos
+            with metrics.stage("DataPreprocessor.apply_preprocessing_to_source", rows_in=len(data)) as record:
+                data_processed = planner.optimize(preprocessor.apply_preprocessing_to_source(data, "retail_data"), "preprocesamiento")
+                record["rows_out"] = len(data_processed)
 
-        # Mostrar los primeros registros del DataFrame procesado
-        print("\nDatos después del preprocesamiento:")
-        print(data_processed.head())
+            # Mostrar los primeros registros del DataFrame procesado
+            print("\nDatos después del preprocesamiento:")
+            print(data_processed.head())
 
-        # Calcular RFM usando los datos procesados y la configuración cargada
-        rfm_data = rfm_calculator.calculate_rfm(data_processed)
+            # Calcular RFM usando los datos procesados y la configuración cargada
+            with metrics.stage("RFMCalculator.calculate_rfm", rows_in=len(data_processed)) as record:
+                rfm_data = rfm_calculator.calculate_rfm(data_processed)
+                record["rows_out"] = len(rfm_data)
+        rfm_data = planner.optimize(rfm_data, "rfm")
         # # Mostrar los resultados de RFM
         print("\nResultados del cálculo de RFM:")
         print(rfm_data.head())
 
         # Calular LS, LI, Breaks y Puntaje RFM
-        df_resultado = rfm_processor.process_rfm_data(rfm_data)
+        with metrics.stage("RFMProcessing.process_rfm_data", rows_in=len(rfm_data)) as record:
+            if backfill_enabled:
+                # Breaks, puntajes y categorías ajustados por fecha de corte
+                df_resultado = backfill.score(rfm_data)
+            elif incremental_enabled:
+                # Reutilizar los breaks persistidos si la distribución no ha derivado
+                df_resultado = incremental.score(rfm_data, rfm_processor)
+            elif segments_enabled:
+                # Breaks, puntajes y categorías ajustados por segmento
+                df_resultado = segmented.score(rfm_data)
+            elif model_store.mode == 'score':
+                # Sólo puntuar con los LI/LS y breaks del modelo guardado
+                df_resultado = model_store.score(rfm_data, rfm_processor)
+            else:
+                # Con quantile_backend 'sketch' y workers > 1 se reutilizan los resúmenes combinados de las particiones
+                df_resultado = rfm_processor.process_rfm_data(rfm_data, metrics=metrics, sketches=rfm_calculator.sketches)
+                if model_store.mode == 'fit':
+                    model_store.save(rfm_processor)
+            record["rows_out"] = len(df_resultado)
+        df_resultado = planner.optimize(df_resultado, "puntajes")
         print("\nResultados del Puntaje RFM:")
         print(df_resultado.head())
 
          # Calcular el score final 
-        rfm_result = rfm_assigner.process_rfm(df_resultado)
+        with metrics.stage("RFMProcessor.process_rfm", rows_in=len(df_resultado)) as record:
+            if segments_enabled or backfill_enabled:
+                # Las categorías ya se asignaron por segmento o por fecha de corte
+                rfm_result = df_resultado
+            else:
+                rfm_result = planner.optimize(rfm_assigner.process_rfm(df_resultado), "categorias")
+            record["rows_out"] = len(rfm_result)
         print("\nResultados del Puntaje RFM Total:")
         print(rfm_result.head())
 
-        # Exportar el resultado a un archivo CSV
-        exporter.export_to_csv(rfm_result, "results_csv")
+        # Exportar el resultado: el backfill a su CSV y la ejecución normal a los destinos de export_settings.targets
+        if backfill_enabled or not data_loader.config['export_settings'].get('targets'):
+            with metrics.stage("DataExporter.export_to_csv", rows_in=len(rfm_result)):
+                exporter.export_to_csv(rfm_result, backfill_config.get('export_key', 'backfill_csv') if backfill_enabled else "results_csv")
+        else:
+            with metrics.stage("DataExporter.export", rows_in=len(rfm_result)) as record:
+                export_report = exporter.export(rfm_result)
+                record["targets"] = export_report
+            failed = [f"{item['format']}:{item['key']}" for item in export_report if item['status'] != 'ok']
+            if failed:
+                raise RuntimeError(f"Falló la exportación a: {', '.join(failed)}")
 
-      
     except Exception as e:
+        error = e
         print(f"Error: {e}")
+    finally:
+        # Guardar las métricas de la ejecución (también cuando hubo un error)
+        if metrics is not None:
+            metrics.write(error)
 
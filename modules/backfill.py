@@ -0,0 +1,196 @@
+"""
+Proyecto: Demo RFM
+Módulo: backfill.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor:
+Modificado por:
+Fecha modificación:
+Descripción:
+    Este módulo contiene la clase `RFMBackfill`, que reconstruye el RFM histórico para una lista de fechas de corte
+    (por ejemplo, cada fin de mes de los últimos dos años) en una sola ejecución, sin correr el pipeline una vez por
+    fecha.
+
+    Cada corte usa la ventana de `global_settings.date_range` terminada en la fecha de corte (ambos extremos incluidos,
+    como en la carga de datos). Las transacciones se ordenan una sola vez por (cliente, fecha) y las métricas de cada
+    corte se obtienen con sumas acumuladas y búsquedas binarias sobre ese orden:
+    - Frequency: número de fechas de compra distintas dentro de la ventana.
+    - Monetary: suma del monto dentro de la ventana, como diferencia de montos acumulados por cliente
+      (`backfill.monetary_sum: 'cumulative'`) o, para reproducir bit a bit una ejecución normal, con la misma suma por
+      grupo de pandas que `RFMCalculator` sobre cada ventana (`'groupby'`, O(cortes × filas)).
+    - LastPurchaseDate y Recency: última compra dentro de la ventana y días hasta el corte.
+    - MonthsWithPurchases: meses distintos con compras dentro de la ventana.
+
+    Cada corte se puntúa con sus propios breaks y el resultado es una tabla larga identificada por `CutoffDate`.
+"""
+
+### Importar Librerías
+import dataclasses
+import numpy as np
+import pandas as pd
+from modules.data_loader import DataLoader
+from modules.rfm_processing import RFMProcessing
+from modules.run_context import RunContext, get_run_context
+from modules.segment_assigner import RFMProcessor
+
+
+class RFMBackfill:
+
+    def __init__(self, config_path: str = None, context: RunContext = None):
+        """
+        Inicializa el backfill con la sección `backfill` de la configuración.
+
+        Parámetros:
+            - config_path: str
+                Ruta del archivo YAML.
+            - context: RunContext, opcional
+                Contexto de ejecución compartido. Si no se indica, se obtiene (en caché) a partir de `config_path`.
+        """
+        self.context = context if context is not None else get_run_context(config_path)
+        self.config = self.context.config
+        self.backfill_config = self.config.get("backfill", {}) or {}
+        date_range = self.config["global_settings"]["date_range"]
+        self.interval = date_range["interval"]
+        self.number = date_range["number"]
+        self.monetary_sum = self.backfill_config.get("monetary_sum", "cumulative")
+        if self.monetary_sum not in ("cumulative", "groupby"):
+            raise ValueError(f"Valor de 'backfill.monetary_sum' no soportado: {self.monetary_sum}. Usa 'cumulative' o 'groupby'.")
+
+    def resolve_cutoffs(self) -> list:
+        """
+        Devuelve las fechas de corte configuradas, ordenadas y sin repetidos.
+
+        Se usan `backfill.cutoffs` (lista explícita) o, si no se indica, las fechas entre `backfill.start` y
+        `backfill.end` con la frecuencia `backfill.frequency` (por defecto fin de mes).
+
+        Excepciones:
+            - ValueError: Si no se define ninguna fecha de corte.
+        """
+        cutoffs = self.backfill_config.get("cutoffs")
+        if not cutoffs:
+            start, end = self.backfill_config.get("start"), self.backfill_config.get("end")
+            if not start or not end:
+                raise ValueError("La sección 'backfill' debe definir 'cutoffs' o 'start' y 'end'.")
+            cutoffs = pd.date_range(start, end, freq=self.backfill_config.get("frequency", "ME"))
+        cutoffs = sorted(set(pd.to_datetime(list(cutoffs))))
+        if not cutoffs:
+            raise ValueError("El rango de 'backfill' no contiene ninguna fecha de corte.")
+        return cutoffs
+
+    def calculate_rfm(self, data: pd.DataFrame, cutoffs: list = None) -> pd.DataFrame:
+        """
+        Calcula los agregados RFM por cliente para todas las fechas de corte con un solo ordenamiento.
+
+        Parámetros:
+            - data (pd.DataFrame): Transacciones preprocesadas (sin filtrar por el rango de fechas del contexto).
+            - cutoffs (list, opcional): Fechas de corte. Por defecto `resolve_cutoffs()`.
+
+        Retorna:
+            - pd.DataFrame: Tabla larga con las columnas de `RFMCalculator.calculate_rfm` más `CutoffDate`. Sólo
+              incluye, para cada corte, los clientes con compras dentro de su ventana.
+
+        Excepciones:
+            - KeyError: Si falta alguna de las columnas de cliente, fecha o monto.
+        """
+        columns = self.context.columns
+        customer_col, date_col, price_col = columns["customer_id"], columns["date"], columns["price"]
+        for col in (customer_col, date_col, price_col):
+            if col not in data.columns:
+                raise KeyError(f"La columna requerida '{col}' no se encuentra en el DataFrame.")
+
+        cutoffs = self.resolve_cutoffs() if cutoffs is None else sorted(set(pd.to_datetime(list(cutoffs))))
+        starts = [DataLoader.window_start(cutoff, self.interval, self.number) for cutoff in cutoffs]
+
+        # Sólo las transacciones que caen en alguna ventana
+        dates = pd.to_datetime(data[date_col])
+        valid = (dates >= min(starts)) & (dates <= max(cutoffs)) & data[customer_col].notna()
+        customer_codes, customers = pd.factorize(data.loc[valid, customer_col], sort=True)
+        timestamps = dates[valid].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        prices = data.loc[valid, price_col].to_numpy(dtype=np.float64)
+        # Orden original, para sumar los montos igual que RFMCalculator (monetary_sum 'groupby')
+        row_customers, row_timestamps, row_prices = customer_codes, timestamps, prices
+
+        # Un solo ordenamiento por (cliente, fecha) y colapso a fechas de compra distintas por cliente
+        order = np.lexsort((timestamps, customer_codes))
+        customer_codes, timestamps = customer_codes[order], timestamps[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (customer_codes[1:] != customer_codes[:-1]) | (timestamps[1:] != timestamps[:-1])
+        positions = np.flatnonzero(first)
+
+        # Montos acumulados por cliente en el mismo orden. Una ventana abarca fechas completas, de modo que sus filas
+        # van de row_bounds[lo] a row_bounds[hi] y su monto es la diferencia de los acumulados en esos extremos.
+        # El acumulado se reinicia en cada cliente para que el error de redondeo dependa del total del cliente.
+        cumulative_prices = pd.Series(prices[order]).groupby(customer_codes, sort=False).cumsum().to_numpy()
+        row_bounds = np.append(positions, len(order))
+        customer_first_row = np.searchsorted(customer_codes, np.arange(len(customers)), side="left")
+
+        customer_codes, timestamps = customer_codes[positions], timestamps[positions]
+
+        # Cambios de mes acumulados: meses distintos en [lo, hi) = 1 + cambios en (lo, hi - 1]
+        months = timestamps.astype("datetime64[ns]").astype("datetime64[M]").astype(np.int64)
+        month_change = np.ones(len(months), dtype=np.int64)
+        month_change[1:] = (customer_codes[1:] != customer_codes[:-1]) | (months[1:] != months[:-1])
+        cumulative_changes = np.cumsum(month_change)
+
+        # Clave ordenada (cliente, rango de la fecha) para ubicar cada ventana con búsqueda binaria
+        unique_times, time_rank = np.unique(timestamps, return_inverse=True)
+        stride = len(unique_times) + 1
+        keys = customer_codes.astype(np.int64) * stride + time_rank
+        customer_base = np.arange(len(customers), dtype=np.int64) * stride
+
+        snapshots = []
+        for start, cutoff in zip(starts, cutoffs):
+            rank_lo = np.searchsorted(unique_times, start.value, side="left")
+            rank_hi = np.searchsorted(unique_times, cutoff.value, side="right")
+            lo = np.searchsorted(keys, customer_base + rank_lo, side="left")
+            hi = np.searchsorted(keys, customer_base + rank_hi, side="left")
+            active = np.flatnonzero(hi > lo)
+            lo, hi = lo[active], hi[active]
+
+            last_purchase = timestamps[hi - 1]
+            if self.monetary_sum == "groupby":
+                # Suma por grupo de pandas en el orden original: los montos (y los empates con los breaks) coinciden
+                # bit a bit con los de una ejecución normal con esa fecha de corte
+                in_window = (row_timestamps >= start.value) & (row_timestamps <= cutoff.value)
+                monetary = pd.Series(row_prices[in_window]).groupby(row_customers[in_window]).sum().to_numpy()
+            else:
+                row_lo, row_hi = row_bounds[lo], row_bounds[hi]
+                before = np.where(row_lo > customer_first_row[active], cumulative_prices[row_lo - 1], 0.0)
+                monetary = cumulative_prices[row_hi - 1] - before
+            snapshots.append(pd.DataFrame({
+                customer_col: customers[active],
+                "Recency": (cutoff.value - last_purchase) // pd.Timedelta(days=1).value,
+                "Frequency": hi - lo,
+                "Monetary": monetary,
+                "LastPurchaseDate": last_purchase.astype("datetime64[ns]"),
+                "MonthsWithPurchases": cumulative_changes[hi - 1] - cumulative_changes[lo] + 1,
+                "CutoffDate": cutoff,
+            }))
+
+        return pd.concat(snapshots, ignore_index=True)
+
+    def score(self, rfm_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcula breaks, puntajes y categorías de negocio para cada fecha de corte.
+
+        Cada corte se procesa con un contexto cuya ventana termina en esa fecha, de modo que la identificación de
+        clientes nuevos y la columna `CutoffDate` corresponden al corte.
+
+        Parámetros:
+            - rfm_data (pd.DataFrame): Resultado de `calculate_rfm`.
+
+        Retorna:
+            - pd.DataFrame: Tabla larga con los puntajes y categorías de todos los cortes, identificada por `CutoffDate`.
+        """
+        results = []
+        for cutoff, snapshot in rfm_data.groupby("CutoffDate", sort=True):
+            context = dataclasses.replace(
+                self.context,
+                start_date=DataLoader.window_start(cutoff, self.interval, self.number),
+                end_date=cutoff,
+            )
+            snapshot = snapshot.drop(columns=["CutoffDate"]).reset_index(drop=True)
+            print(f"Puntuando corte {cutoff.date()} ({len(snapshot)} clientes)...")
+            scored = RFMProcessing(context=context).process_rfm_data(snapshot)
+            results.append(RFMProcessor(context=context).process_rfm(scored))
+        return pd.concat(results, ignore_index=True)
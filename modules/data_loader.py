@@ -8,42 +8,199 @@ Autor: Carolina Torres Zapata
 Modificado por: 
 Fecha modificación: 
 Descripción:
-    La clase DataLoader permite cargar datos desde múltiples fuentes (CSV, Excel, Parquet, etc),
+    La clase DataLoader permite cargar datos desde múltiples fuentes (CSV, Excel, Parquet, SQL),
     utilizando configuraciones definidas en un archivo YAML. También gestiona el cálculo del rango
     de fechas para análisis RFM y filtra los datos según este rango, si es necesario.
 
     Métodos principales:
-    - __init__: Constructor que inicializa la configuración y calcula el rango de fechas RFM.
+    - __init__: Constructor que obtiene la configuración y el rango de fechas RFM del contexto de ejecución compartido.
     - load_config: Carga la configuración desde un archivo YAML.
-    - get_date_range_for_rfm: Calcula el rango de fechas a partir de las configuraciones.
+    - get_date_range_for_rfm: Devuelve el rango de fechas resuelto en el contexto de ejecución.
+    - resolve_date_range: Calcula el rango de fechas a partir de las configuraciones.
     - load_from_csv: Carga datos desde un archivo CSV.
-    - load_from_excel: Carga datos desde un archivo Excel.
+    - load_from_excel: Carga datos desde un archivo Excel (con caché columnar opcional).
     - load_from_parquet: Carga datos desde un archivo Parquet.
+    - load_from_sql: Carga datos desde una tabla SQL con filtro de fechas en la base de datos.
+    - load_rfm_from_sql: Calcula la agregación RFM básica dentro de la base de datos.
+    - load_rfm_result: Abre con memoria mapeada el último resultado exportado a Arrow IPC (`read_arrow_result`).
+    - iter_csv_chunks / iter_parquet_batches / iter_sql_chunks / iter_chunks: Leen las fuentes por fragmentos (modo streaming).
     - _process_dates_and_filter: Procesa columnas de fechas y aplica filtros por rango de fechas.
 
+    Con `global_settings.dtype_backend: 'pyarrow'` los datos se entregan con columnas `pd.ArrowDtype`: el CSV se lee
+    con el lector de Arrow, el Parquet se convierte sin pasar por NumPy y las demás fuentes se convierten al cargar
+    (`to_arrow_backed`).
+
 """
 
 ## Importe de Librerías
+import hashlib
+import json
 import os
+import numpy as np
 import pandas as pd
 import yaml
+from pandas.api.types import union_categoricals
+from sqlalchemy import MetaData, Table, create_engine, distinct, extract, func, select
+from modules.dtype_planner import DtypePlanner
+from modules.run_context import RunContext, get_run_context
+
+
+# Engines de SQLAlchemy reutilizados por db_url (cada uno mantiene su propio pool de conexiones)
+_ENGINE_CACHE = {}
+
+
+def get_sql_engine(db_url: str):
+    """
+    Devuelve un engine de SQLAlchemy con pool de conexiones, reutilizado entre llamadas para el mismo `db_url`.
+    """
+    engine = _ENGINE_CACHE.get(db_url)
+    if engine is None:
+        engine = create_engine(db_url, pool_pre_ping=True)
+        _ENGINE_CACHE[db_url] = engine
+    return engine
+
+
+def concat_chunks(chunks: list) -> pd.DataFrame:
+    """
+    Concatena fragmentos leídos por separado conservando sus columnas `category`.
+
+    Cada fragmento tiene sus propias categorías y `pd.concat` convertiría esas columnas a objetos; antes de concatenar
+    se unifican las categorías de cada columna.
+    """
+    for column in chunks[0].columns:
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype):
+            dtype = pd.CategoricalDtype(union_categoricals([chunk[column] for chunk in chunks]).categories)
+            chunks = [chunk.assign(**{column: chunk[column].astype(dtype)}) for chunk in chunks]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def is_arrow_backend(config: dict) -> bool:
+    """ Indica si la configuración activa el modo Arrow (`global_settings.dtype_backend: 'pyarrow'`). """
+    return (config.get("global_settings", {}) or {}).get("dtype_backend", "numpy") == "pyarrow"
+
+
+def ensure_datetime(series: pd.Series) -> pd.Series:
+    """
+    Convierte una columna a fecha con `pd.to_datetime(errors='coerce')`.
+
+    Las columnas que ya son fechas (datetime64 de NumPy o timestamp de Arrow) se devuelven sin cambios, de modo que
+    una columna Arrow no se convierte a NumPy.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series
+    return pd.to_datetime(series, errors='coerce')
+
+
+def to_arrow_backed(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte a `pd.ArrowDtype` las columnas NumPy (numéricas, booleanas y de fecha) y las de texto de un DataFrame.
+
+    Las columnas numéricas sin nulos se envuelven sin copiar el buffer. Los nulos (NaN, NaT, None) pasan a ser nulos
+    de Arrow. Se conservan sin cambios las columnas que ya son Arrow, las categóricas y las de objetos no textuales
+    (por ejemplo, los rangos como tuplas).
+
+    Parámetros:
+        - data (pd.DataFrame): DataFrame a convertir.
+
+    Retorna:
+        - pd.DataFrame: El mismo DataFrame si no hay columnas que convertir, o uno nuevo con las columnas convertidas.
+    """
+    import pyarrow as pa
+
+    converted = {}
+    for column in data.columns:
+        series = data[column]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufM":
+            array = pa.array(series.to_numpy(), from_pandas=True)
+        elif series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == "string":
+            array = pa.array(series.to_numpy(), type=pa.string(), from_pandas=True)
+        else:
+            continue
+        converted[column] = pd.Series(pd.arrays.ArrowExtensionArray(array), index=data.index)
+    return data.assign(**converted) if converted else data
+
+
+# Sufijo del puntero al último resultado Arrow: `<path>.latest` contiene el nombre del archivo versionado más reciente
+ARROW_LATEST_SUFFIX = ".latest"
+
+
+def resolve_arrow_result(path: str) -> str:
+    """
+    Ruta del último resultado Arrow exportado a `path`: el archivo versionado que indica el puntero
+    `<path>.latest`, o `path` si no hay puntero (resultados escritos directamente en `path`).
+    """
+    pointer = path + ARROW_LATEST_SUFFIX
+    if not os.path.exists(pointer):
+        return path
+    with open(pointer, 'r', encoding='utf-8') as file:
+        return os.path.join(os.path.dirname(path), file.read().strip())
+
+
+def read_arrow_result(path: str, columns: list = None, as_table: bool = False):
+    """
+    Abre un resultado exportado con `DataExporter.export_to_arrow` (Arrow IPC / Feather v2) con memoria mapeada.
+
+    `path` es la ruta configurada del destino; se abre el último archivo versionado al que apunta `<path>.latest`
+    (ver `resolve_arrow_result`). Cada exportación escribe un archivo nuevo, por lo que mantener la tabla abierta no
+    impide la siguiente exportación (en Windows un archivo mapeado no se puede reemplazar ni borrar).
+
+    Con un archivo sin compresión la lectura no copia ni interpreta los datos: las columnas referencian directamente
+    las páginas del archivo mapeado y sólo se leen del disco las que se usan. Los archivos comprimidos (lz4, zstd)
+    también se pueden abrir, pero sus columnas se descomprimen en memoria.
+
+    Parámetros:
+        - path (str): Ruta del archivo Arrow IPC.
+        - columns (list, opcional): Columnas a leer. Por defecto, todas.
+        - as_table (bool, opcional): Si es True devuelve la `pyarrow.Table`; si no, un DataFrame con columnas
+          `pd.ArrowDtype` que envuelven los buffers de la tabla sin copiarlos.
+
+    Retorna:
+        - pd.DataFrame o pyarrow.Table: Resultado exportado.
+
+    Excepciones:
+        - FileNotFoundError: Si el archivo no existe.
+    """
+    import pyarrow as pa
+
+    path = resolve_arrow_result(path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No se encontró el resultado Arrow: {path}")
+    # La tabla mantiene vivo el mapeo aunque se cierre el archivo; `select` tampoco copia los buffers
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    if as_table:
+        return table
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
 
 
 class DataLoader:
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str = None, context: RunContext = None):
         """
         Constructor de la clase DataLoader.
 
         Parámetros:
             - config_path (str): Ruta al archivo YAML que contiene la configuración.
+            - context (RunContext, opcional): Contexto de ejecución compartido. Si no se indica, se obtiene
+              (en caché) a partir de `config_path`.
 
         Atributos inicializados:
+            - self.context (RunContext): Contexto de ejecución compartido.
             - self.config (dict): Diccionario con las configuraciones cargadas desde el YAML.
             - self.start_date (pd.Timestamp): Fecha de inicio para el análisis RFM.
             - self.end_date (pd.Timestamp): Fecha de fin para el análisis RFM.
+            - self.arrow_backend (bool): Si los datos se entregan con columnas `pd.ArrowDtype`.
+            - self.dtype_planner (DtypePlanner): Tipos a pedir a los lectores (`dtype_planning.read_dtypes`).
+            - self._sql_tables (dict): Tablas reflejadas por clave de `sql_sources` (ver `_sql_query`).
         """
-        self.config = self.load_config(config_path)
+        self.context = context if context is not None else get_run_context(config_path)
+        self.config = self.context.config
         self.start_date, self.end_date = self.get_date_range_for_rfm()
+        self.arrow_backend = is_arrow_backend(self.config)
+        self.dtype_planner = DtypePlanner(context=self.context)
+        # Tablas SQL reflejadas por clave de sql_sources, para no consultar el catálogo en cada lectura
+        self._sql_tables = {}
 
     @staticmethod
     def load_config(config_path: str) -> dict:
@@ -71,9 +228,23 @@ class DataLoader:
     
     ## Calcular Rango de Fecha
     def get_date_range_for_rfm(self) -> (pd.Timestamp, pd.Timestamp):
+        """
+        Devuelve el rango de fechas para el análisis RFM, resuelto una sola vez en el contexto de ejecución
+        para que todas las etapas usen la misma `end_date`.
+
+        Retorna:
+            - (pd.Timestamp, pd.Timestamp): Tupla con la fecha de inicio y fin del rango.
+        """
+        return self.context.start_date, self.context.end_date
+
+    @staticmethod
+    def resolve_date_range(config: dict) -> (pd.Timestamp, pd.Timestamp):
         """
         Calcula el rango de fechas para el análisis RFM con base en la configuración.
 
+        Parámetros:
+            - config (dict): Configuración cargada desde el YAML.
+
         Retorna:
             - (pd.Timestamp, pd.Timestamp): Tupla con la fecha de inicio y fin del rango.
 
@@ -81,17 +252,10 @@ class DataLoader:
             - ValueError: Si el intervalo definido en la configuración no es reconocido.
         """
         current_date = pd.Timestamp.now()
-        interval = self.config['global_settings']['date_range']['interval']
-        number = self.config['global_settings']['date_range']['number']
+        interval = config['global_settings']['date_range']['interval']
+        number = config['global_settings']['date_range']['number']
         end_date = pd.Timestamp(current_date.year, current_date.month, 1) - pd.Timedelta(days=1)
-        if interval == 'months':
-            start_date = end_date - pd.DateOffset(months=number)
-        elif interval == 'days':
-            start_date = end_date - pd.Timedelta(days=number)
-        elif interval == 'years':
-            start_date = end_date - pd.DateOffset(years=number)
-        else:
-            raise ValueError(f"Intervalo '{interval}' no reconocido. Usa 'months', 'days' o 'years'.")
+        start_date = DataLoader.window_start(end_date, interval, number)
         
         # Sólo para efectos de esta prueba quitar después y ajustar código
         start_date = pd.to_datetime("2023-12-01")
@@ -99,7 +263,30 @@ class DataLoader:
 
         return start_date, end_date
 
-    
+    @staticmethod
+    def window_start(end_date: pd.Timestamp, interval: str, number: int) -> pd.Timestamp:
+        """
+        Calcula la fecha de inicio de la ventana de análisis que termina en `end_date`.
+
+        Parámetros:
+            - end_date (pd.Timestamp): Fecha de fin (corte) de la ventana.
+            - interval (str): 'days', 'months' o 'years'.
+            - number (int): Número de intervalos hacia atrás.
+
+        Retorna:
+            - pd.Timestamp: Fecha de inicio de la ventana.
+
+        Excepciones:
+            - ValueError: Si el intervalo no es reconocido.
+        """
+        if interval == 'months':
+            return end_date - pd.DateOffset(months=number)
+        elif interval == 'days':
+            return end_date - pd.Timedelta(days=number)
+        elif interval == 'years':
+            return end_date - pd.DateOffset(years=number)
+        raise ValueError(f"Intervalo '{interval}' no reconocido. Usa 'months', 'days' o 'years'.")
+
     ## Cargar CSV
     def load_from_csv(self, csv_key: str, chunksize: int = None, filter_dates: bool = True) -> pd.DataFrame:
         """
@@ -127,13 +314,18 @@ class DataLoader:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"El archivo CSV no existe en la ruta: {file_path}")
 
-        data = pd.DataFrame()
         if chunksize:
-            for chunk in pd.read_csv(file_path, delimiter=delimiter, parse_dates=parse_dates, chunksize=chunksize, usecols=selected_columns):
-                chunk = self._process_dates_and_filter(chunk, parse_dates, filter_dates)
-                data = pd.concat([data, chunk], ignore_index=True)
+            # Concatenar una sola vez al final evita copiar el DataFrame acumulado en cada fragmento
+            chunks = list(self.iter_csv_chunks(csv_key, chunksize, filter_dates))
+            data = concat_chunks(chunks) if chunks else pd.DataFrame(columns=selected_columns)
+        elif self.arrow_backend:
+            # Lector multihilo de Arrow: las columnas quedan como ArrowDtype sin pasar por NumPy (no usa read_dtypes)
+            data = pd.read_csv(file_path, delimiter=delimiter, parse_dates=parse_dates, usecols=selected_columns,
+                               engine='pyarrow', dtype_backend='pyarrow')
+            data = self._process_dates_and_filter(data, parse_dates, filter_dates)
         else:
-            data = pd.read_csv(file_path, delimiter=delimiter, parse_dates=parse_dates, usecols=selected_columns)
+            data = pd.read_csv(file_path, delimiter=delimiter, parse_dates=parse_dates, usecols=selected_columns,
+                               dtype=self.dtype_planner.read_dtypes(selected_columns) or None)
             data = self._process_dates_and_filter(data, parse_dates, filter_dates)
 
         return data
@@ -165,16 +357,114 @@ class DataLoader:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"El archivo Excel no existe en la ruta: {file_path}")
 
-        data = pd.read_excel(file_path, sheet_name=sheet_name, usecols=selected_columns, parse_dates=parse_dates)
+        dtype = self.dtype_planner.read_dtypes(selected_columns)
+        if excel_config.get('cache', False):
+            data = self._read_excel_cached(file_path, sheet_name, selected_columns, parse_dates, excel_config, dtype)
+        else:
+            data = self._read_excel(file_path, sheet_name, selected_columns, parse_dates, excel_config.get('engine'), dtype)
         data = self._process_dates_and_filter(data, parse_dates, filter_dates)
 
         return data
 
+    @staticmethod
+    def _read_excel(file_path: str, sheet_name, selected_columns: list, parse_dates: list, engine: str = None, dtype: dict = None) -> pd.DataFrame:
+        """
+        Lee una hoja de Excel con el motor configurado (por ejemplo 'calamine', más rápido que openpyxl).
+        Si el motor no está instalado, se usa el motor por defecto de pandas (openpyxl).
+
+        Las columnas de texto con tipos mezclados (por ejemplo InvoiceNo con números y textos) se convierten a texto,
+        de modo que la lectura directa y la caché Parquet entregan los mismos valores.
+
+        Los tipos de `dtype` se piden al lector; las columnas 'category' se leen como texto (el lector no ordena
+        categorías con números y textos mezclados) y se convierten a categoría al terminar.
+        """
+        dtype = dtype or {}
+        categorical = [column for column, column_dtype in dtype.items() if column_dtype == "category"]
+        reader_dtype = {column: (str if column in categorical else column_dtype) for column, column_dtype in dtype.items()} or None
+        data = None
+        if engine:
+            try:
+                data = pd.read_excel(file_path, sheet_name=sheet_name, usecols=selected_columns, parse_dates=parse_dates, engine=engine, dtype=reader_dtype)
+            except ImportError as e:
+                print(f"Motor de Excel '{engine}' no disponible ({e}); se usa openpyxl.")
+        if data is None:
+            data = pd.read_excel(file_path, sheet_name=sheet_name, usecols=selected_columns, parse_dates=parse_dates, dtype=reader_dtype)
+        for column in data.columns[data.dtypes == object]:
+            if pd.api.types.infer_dtype(data[column], skipna=True).startswith("mixed"):
+                data[column] = data[column].where(data[column].isna(), data[column].astype(str))
+        for column in categorical:
+            if column in data.columns:
+                data[column] = data[column].astype("category")
+        return data
+
+    @staticmethod
+    def _file_hash(file_path: str) -> str:
+        """ Calcula el hash SHA-256 del contenido de un archivo. """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _read_excel_cached(self, file_path: str, sheet_name, selected_columns: list, parse_dates: list, excel_config: dict, dtype: dict = None) -> pd.DataFrame:
+        """
+        Lee una hoja de Excel desde una caché columnar (Parquet) guardada junto al archivo.
+
+        La caché se usa si el tamaño, la fecha de modificación y el hash SHA-256 del archivo fuente, así como la hoja,
+        las columnas leídas y sus tipos (`dtype`), coinciden con los registrados. En otro caso se lee el Excel y se regenera la caché
+        (escritura atómica). Las columnas con tipos mezclados ya llegan como texto desde `_read_excel`, por lo que la
+        caché entrega los mismos valores que la lectura directa.
+
+        Configuración soportada en `excel_sources.<clave>`:
+            - cache (bool): Activa la caché.
+            - cache_dir (str, opcional): Carpeta de la caché. Por defecto, la carpeta del archivo Excel.
+            - engine (str, opcional): Motor de lectura de Excel, por ejemplo 'calamine'.
+        """
+        cache_dir = excel_config.get('cache_dir') or os.path.dirname(os.path.abspath(file_path))
+        base_name = f"{os.path.splitext(os.path.basename(file_path))[0]}.{sheet_name}"
+        cache_path = os.path.join(cache_dir, base_name + ".parquet")
+        meta_path = os.path.join(cache_dir, base_name + ".meta.json")
+
+        stat = os.stat(file_path)
+        source = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sheet_name": sheet_name,
+            "columns": selected_columns,
+            "parse_dates": parse_dates,
+            "dtypes": {column: str(column_dtype) for column, column_dtype in (dtype or {}).items()},
+        }
+
+        cached = None
+        if os.path.exists(cache_path) and os.path.exists(meta_path):
+            with open(meta_path, 'r') as file:
+                cached = json.load(file)
+        if cached is not None and all(cached.get(k) == v for k, v in source.items()):
+            # Tamaño y fecha coinciden: confirmar con el hash del contenido antes de usar la caché
+            if cached.get("sha256") == self._file_hash(file_path):
+                return pd.read_parquet(cache_path)
+
+        data = self._read_excel(file_path, sheet_name, selected_columns, parse_dates, excel_config.get('engine'), dtype)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+        with open(meta_path + ".tmp", 'w') as file:
+            json.dump({**source, "sha256": self._file_hash(file_path)}, file)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        return data
+
     
     ## Cargar Parquet
     def load_from_parquet(self, parquet_key: str, filter_dates: bool = True) -> pd.DataFrame:
         """
-        Carga datos desde un archivo Parquet según las configuraciones.
+        Carga datos desde un archivo Parquet (o un directorio de archivos Parquet) según las configuraciones.
+
+        La selección de columnas y el rango de fechas del análisis se envían al escáner de Arrow (`pyarrow.dataset`)
+        como filtros, de modo que sólo se leen del disco los row groups y particiones con transacciones dentro
+        del rango. Soporta directorios particionados tipo Hive (por ejemplo `year=2024/month=11/`).
 
         Parámetros:
             - parquet_key (str): Clave del archivo Parquet en la configuración YAML.
@@ -187,19 +477,302 @@ class DataLoader:
             - ValueError: Si la clave especificada no existe en la configuración.
             - FileNotFoundError: Si el archivo Parquet no se encuentra.
         """
+        dataset, columns, row_filter, parse_dates = self._parquet_dataset(parquet_key, filter_dates)
+        data = self._table_to_pandas(dataset.to_table(columns=columns, filter=row_filter))
+        data = self._process_dates_and_filter(data, parse_dates, filter_dates)
+
+        return data
+
+    def load_rfm_result(self, arrow_key: str = "results_arrow", columns: list = None, as_table: bool = False):
+        """
+        Abre el último resultado RFM exportado a Arrow IPC (`export_settings.arrow_sources`) sin copiarlo ni
+        interpretarlo (ver `read_arrow_result`). Los rangos se leen como columnas numéricas
+        `<col>_range_lower` / `<col>_range_upper`.
+
+        Parámetros:
+            - arrow_key (str, opcional): Clave del destino en `export_settings.arrow_sources`.
+            - columns (list, opcional): Columnas a leer. Por defecto, todas.
+            - as_table (bool, opcional): Si es True devuelve la `pyarrow.Table` en lugar de un DataFrame.
+
+        Retorna:
+            - pd.DataFrame o pyarrow.Table: Resultado exportado.
+
+        Excepciones:
+            - ValueError: Si la clave especificada no existe en la configuración.
+            - FileNotFoundError: Si el archivo no existe.
+        """
+        arrow_config = self.config.get('export_settings', {}).get('arrow_sources', {}).get(arrow_key)
+        if not arrow_config:
+            raise ValueError(f"No se encontró la configuración para '{arrow_key}' en el archivo YAML.")
+        return read_arrow_result(arrow_config['path'], columns=columns, as_table=as_table)
+
+    def _table_to_pandas(self, table) -> pd.DataFrame:
+        """ Convierte una tabla o lote de Arrow a pandas; en modo Arrow las columnas quedan como ArrowDtype sin copia. """
+        if self.arrow_backend:
+            return table.to_pandas(types_mapper=pd.ArrowDtype)
+        return table.to_pandas()
+
+    def _parquet_dataset(self, parquet_key: str, filter_dates: bool):
+        """
+        Abre la fuente Parquet como `pyarrow.dataset` y construye el filtro por rango de fechas.
+
+        Configuración soportada en `parquet_sources.<clave>`:
+            - path: Archivo o directorio Parquet.
+            - select_columns: Columnas a leer.
+            - parse_dates: Columnas de fecha; la primera se usa para el filtro por rango.
+            - partitioning (opcional): Esquema de particiones del directorio, por ejemplo 'hive'.
+            - partition_date_fields (opcional): Campos de partición con el año y el mes
+              (por ejemplo `{year: 'year', month: 'month'}`) para descartar particiones completas.
+
+        Retorna:
+            - tuple: (dataset, columnas, filtro de Arrow o None, columnas de fecha).
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
         parquet_config = self.config['data_sources']['parquet_sources'].get(parquet_key)
         if not parquet_config:
             raise ValueError(f"No se encontró la configuración para '{parquet_key}' en el archivo YAML.")
         file_path = parquet_config.get('path')
         selected_columns = parquet_config.get('select_columns', None)
+        parse_dates = parquet_config.get('parse_dates', [])
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"El archivo Parquet no existe en la ruta: {file_path}")
 
-        data = pd.read_parquet(file_path, columns=selected_columns)
-        parse_dates = parquet_config.get('parse_dates', [])
-        data = self._process_dates_and_filter(data, parse_dates, filter_dates)
+        dataset = ds.dataset(file_path, format="parquet", partitioning=parquet_config.get('partitioning'))
+        if not filter_dates or not parse_dates:
+            return dataset, selected_columns, None, parse_dates
+
+        row_filter = None
+        date_col = parse_dates[0]
+        date_type = dataset.schema.field(date_col).type if date_col in dataset.schema.names else None
+        # Sólo se empuja el filtro si la columna ya es timestamp sin zona horaria; en otro caso se filtra en pandas
+        if date_type is not None and pa.types.is_timestamp(date_type) and date_type.tz is None:
+            start = pa.scalar(self.start_date.to_pydatetime(), type=date_type)
+            end = pa.scalar(self.end_date.to_pydatetime(), type=date_type)
+            row_filter = (ds.field(date_col) >= start) & (ds.field(date_col) <= end)
+        else:
+            print(f"Parquet '{parquet_key}': el filtro de fechas sobre '{date_col}' (tipo {date_type}) no se envía al escáner "
+                  f"porque no es un timestamp sin zona horaria; se leen todos los row groups y se filtra en pandas.")
 
-        return data
+        partition_fields = parquet_config.get('partition_date_fields')
+        if partition_fields:
+            year, month = ds.field(partition_fields['year']), ds.field(partition_fields['month'])
+            start, end = self.start_date, self.end_date
+            partition_filter = (
+                ((year > start.year) | ((year == start.year) & (month >= start.month)))
+                & ((year < end.year) | ((year == end.year) & (month <= end.month)))
+            )
+            row_filter = partition_filter if row_filter is None else row_filter & partition_filter
+
+        return dataset, selected_columns, row_filter, parse_dates
+
+    
+    ## Lectura por fragmentos (modo streaming)
+    def iter_csv_chunks(self, csv_key: str, chunksize: int, filter_dates: bool = True):
+        """
+        Lee un archivo CSV por fragmentos sin acumularlos en memoria.
+
+        Cada fragmento se procesa con `_process_dates_and_filter` antes de entregarse, de modo que el
+        consumidor (por ejemplo `RFMCalculator.calculate_rfm_streaming`) solo recibe transacciones dentro del rango.
+
+        Parámetros:
+            - csv_key (str): Clave del archivo CSV en la configuración YAML.
+            - chunksize (int): Número de filas por fragmento.
+            - filter_dates (bool, opcional): Si se aplica el filtro por rango de fechas.
+
+        Retorna:
+            - Iterator[pd.DataFrame]: Fragmentos de datos procesados.
+
+        Excepciones:
+            - ValueError: Si la clave especificada no existe en la configuración.
+            - FileNotFoundError: Si el archivo CSV no se encuentra.
+        """
+        csv_config = self.config['data_sources']['csv_sources'].get(csv_key)
+        if not csv_config:
+            raise ValueError(f"No se encontró la configuración para '{csv_key}' en el archivo YAML.")
+        file_path = csv_config.get('path')
+        delimiter = csv_config.get('delimiter', ',')
+        parse_dates = csv_config.get('parse_dates', [])
+        selected_columns = csv_config.get('select_columns', None)
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"El archivo CSV no existe en la ruta: {file_path}")
+
+        dtype = self.dtype_planner.read_dtypes(selected_columns) or None
+        for chunk in pd.read_csv(file_path, delimiter=delimiter, parse_dates=parse_dates, chunksize=chunksize, usecols=selected_columns, dtype=dtype):
+            yield self._process_dates_and_filter(chunk, parse_dates, filter_dates)
+
+    def iter_parquet_batches(self, parquet_key: str, chunksize: int = None, filter_dates: bool = True):
+        """
+        Lee un archivo Parquet por lotes sin cargarlo completo en memoria.
+
+        Si se indica `chunksize` se leen lotes de ese número de filas; en caso contrario se lee un row group a la vez.
+
+        Parámetros:
+            - parquet_key (str): Clave del archivo Parquet en la configuración YAML.
+            - chunksize (int, opcional): Número de filas por lote.
+            - filter_dates (bool, opcional): Si se aplica el filtro por rango de fechas.
+
+        Retorna:
+            - Iterator[pd.DataFrame]: Lotes de datos procesados.
+
+        Excepciones:
+            - ValueError: Si la clave especificada no existe en la configuración.
+            - FileNotFoundError: Si el archivo Parquet no se encuentra.
+        """
+        dataset, columns, row_filter, parse_dates = self._parquet_dataset(parquet_key, filter_dates)
+        if chunksize:
+            batches = dataset.to_batches(columns=columns, filter=row_filter, batch_size=chunksize)
+        else:
+            # Un row group a la vez; los row groups fuera del rango se descartan con sus estadísticas
+            batches = (
+                row_group.to_table(schema=dataset.schema, columns=columns, filter=row_filter)
+                for fragment in dataset.get_fragments(filter=row_filter)
+                for row_group in fragment.split_by_row_group(filter=row_filter, schema=dataset.schema)
+            )
+        for batch in batches:
+            yield self._process_dates_and_filter(self._table_to_pandas(batch), parse_dates, filter_dates)
+
+    def iter_chunks(self, source_type: str, source_key: str, chunksize: int = None, filter_dates: bool = True):
+        """
+        Devuelve un iterador de fragmentos para la fuente indicada ('csv', 'parquet' o 'sql').
+
+        Excepciones:
+            - ValueError: Si el tipo de fuente no soporta lectura por fragmentos.
+        """
+        if source_type == 'csv':
+            return self.iter_csv_chunks(source_key, chunksize, filter_dates)
+        elif source_type == 'parquet':
+            return self.iter_parquet_batches(source_key, chunksize, filter_dates)
+        elif source_type == 'sql':
+            return self.iter_sql_chunks(source_key, chunksize, filter_dates)
+        else:
+            raise ValueError(f"Tipo de fuente '{source_type}' no soportado en modo streaming. Usa 'csv', 'parquet' o 'sql'.")
+
+    
+    ## Cargar SQL
+    def _sql_query(self, sql_key: str, filter_dates: bool):
+        """
+        Construye la consulta (SQLAlchemy Core) para una fuente SQL, con la selección de columnas y el rango de
+        fechas del análisis en las cláusulas SELECT y WHERE.
+
+        Configuración soportada en `sql_sources.<clave>`:
+            - db_url: URL de conexión a la base de datos.
+            - table_name: Tabla (o vista) con las transacciones.
+            - schema (opcional): Esquema de la tabla.
+            - select_columns (opcional): Columnas a seleccionar.
+            - parse_dates (opcional): Columnas de fecha; la primera se usa para el filtro por rango.
+            - chunksize (opcional): Filas por lote al leer con cursor del lado del servidor.
+
+        La tabla se refleja (`autoload_with`) una sola vez por clave y se reutiliza mientras no cambien su URL,
+        esquema y nombre.
+
+        Retorna:
+            - tuple: (config de la fuente, engine, tabla reflejada, consulta, columnas de fecha).
+        """
+        sql_config = (self.config['data_sources'].get('sql_sources') or {}).get(sql_key)
+        if not sql_config:
+            raise ValueError(f"No se encontró la configuración para '{sql_key}' en el archivo YAML.")
+        engine = get_sql_engine(sql_config['db_url'])
+        identity = (sql_config['db_url'], sql_config.get('schema'), sql_config['table_name'])
+        cached = self._sql_tables.get(sql_key)
+        if cached is None or cached[0] != identity:
+            table = Table(sql_config['table_name'], MetaData(), schema=sql_config.get('schema'), autoload_with=engine)
+            self._sql_tables[sql_key] = cached = (identity, table)
+        table = cached[1]
+        selected_columns = sql_config.get('select_columns') or [column.name for column in table.columns]
+        parse_dates = sql_config.get('parse_dates', [])
+
+        query = select(*[table.c[column] for column in selected_columns])
+        if filter_dates and parse_dates:
+            date_column = table.c[parse_dates[0]]
+            query = query.where(date_column >= self.start_date.to_pydatetime(), date_column <= self.end_date.to_pydatetime())
+        return sql_config, engine, table, query, parse_dates
+
+    def iter_sql_chunks(self, sql_key: str, chunksize: int = None, filter_dates: bool = True):
+        """
+        Lee una fuente SQL por lotes usando un cursor del lado del servidor (`stream_results`).
+
+        Parámetros:
+            - sql_key (str): Clave de la fuente en `sql_sources`.
+            - chunksize (int, opcional): Filas por lote. Por defecto, el `chunksize` de la configuración o 100000.
+            - filter_dates (bool, opcional): Si se aplica el filtro por rango de fechas en la consulta.
+
+        Retorna:
+            - Iterator[pd.DataFrame]: Lotes de datos procesados.
+        """
+        sql_config, engine, _, query, parse_dates = self._sql_query(sql_key, filter_dates)
+        chunksize = chunksize or sql_config.get('chunksize', 100000)
+        with engine.connect() as conn:
+            conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+            dtype = self.dtype_planner.read_dtypes([column.name for column in query.selected_columns]) or None
+            for chunk in pd.read_sql(query, conn, chunksize=chunksize, dtype=dtype):
+                # El rango ya se filtró en la base de datos; sólo se convierten las fechas
+                yield self._process_dates_and_filter(chunk, parse_dates, False)
+
+    def load_from_sql(self, sql_key: str, filter_dates: bool = True) -> pd.DataFrame:
+        """
+        Carga datos desde una tabla SQL según las configuraciones.
+
+        El rango de fechas del análisis y las columnas seleccionadas se envían a la base de datos (WHERE/SELECT),
+        y el resultado se lee por lotes con un cursor del lado del servidor.
+
+        Parámetros:
+            - sql_key (str): Clave de la fuente en `sql_sources` de la configuración YAML.
+            - filter_dates (bool, opcional): Si se aplica el filtro por rango de fechas.
+
+        Retorna:
+            - pd.DataFrame: Datos cargados. Sin filas, conserva las columnas seleccionadas.
+
+        Excepciones:
+            - ValueError: Si la clave especificada no existe en la configuración.
+        """
+        chunks = list(self.iter_sql_chunks(sql_key, filter_dates=filter_dates))
+        if not chunks:
+            _, _, _, query, parse_dates = self._sql_query(sql_key, filter_dates)
+            empty = pd.DataFrame({column.name: pd.Series(dtype=object) for column in query.selected_columns})
+            return self._process_dates_and_filter(empty, parse_dates, False)
+        return concat_chunks(chunks)
+
+    def load_rfm_from_sql(self, sql_key: str) -> pd.DataFrame:
+        """
+        Calcula la agregación RFM básica dentro de la base de datos, de modo que sólo se transfiere una fila por cliente.
+
+        La consulta agrupa por cliente dentro del rango de fechas y calcula la última compra (MAX), la frecuencia
+        (COUNT DISTINCT de la fecha), el monto (SUM) y los meses con compras (COUNT DISTINCT de año*100+mes).
+        La recencia se calcula después contra `end_date`. Los pasos de preprocesamiento no se aplican en este modo;
+        sólo se excluyen los clientes nulos.
+
+        Parámetros:
+            - sql_key (str): Clave de la fuente en `sql_sources`.
+
+        Retorna:
+            - pd.DataFrame: Mismas columnas que `RFMCalculator.calculate_rfm`.
+        """
+        sql_config, engine, table, _, _ = self._sql_query(sql_key, False)
+        customer_col = self.context.columns["customer_id"]
+        date_col = self.context.columns["date"]
+        price_col = self.context.columns["price"]
+        customer, date, price = table.c[customer_col], table.c[date_col], table.c[price_col]
+
+        query = (
+            select(
+                customer.label(customer_col),
+                func.max(date).label("LastPurchaseDate"),
+                func.count(distinct(date)).label("Frequency"),
+                func.sum(price).label("Monetary"),
+                func.count(distinct(extract("year", date) * 100 + extract("month", date))).label("MonthsWithPurchases"),
+            )
+            .where(customer.isnot(None), date >= self.start_date.to_pydatetime(), date <= self.end_date.to_pydatetime())
+            .group_by(customer)
+            .order_by(customer)
+        )
+        with engine.connect() as conn:
+            rfm_data = pd.read_sql(query, conn)
+
+        rfm_data["LastPurchaseDate"] = pd.to_datetime(rfm_data["LastPurchaseDate"])
+        rfm_data.insert(1, "Recency", (self.end_date - rfm_data["LastPurchaseDate"]).dt.days)
+        return rfm_data[[customer_col, "Recency", "Frequency", "Monetary", "LastPurchaseDate", "MonthsWithPurchases"]]
 
     
     ## Filtrar Rango de Fechas
@@ -207,6 +780,9 @@ class DataLoader:
         """
         Procesa las columnas de fechas y aplica el filtro por rango si es necesario.
 
+        Las filas con fecha nula (o no convertible) quedan fuera del filtro. Con fechas con zona horaria, el rango se
+        compara en esa zona. En modo Arrow, las columnas que aún no son Arrow se convierten con `to_arrow_backed`.
+
         Parámetros:
             - data (pd.DataFrame): Datos a procesar.
             - parse_dates (list): Lista de columnas a convertir a datetime.
@@ -216,7 +792,16 @@ class DataLoader:
             - pd.DataFrame: Datos procesados.
         """
         for date_col in parse_dates:
-            data[date_col] = pd.to_datetime(data[date_col], errors='coerce')
+            data[date_col] = ensure_datetime(data[date_col])
         if filter_dates and parse_dates:
-            data = data[(data[parse_dates[0]] >= self.start_date) & (data[parse_dates[0]] <= self.end_date)]
+            dates = data[parse_dates[0]]
+            start, end = self.start_date, self.end_date
+            tz = getattr(dates.dt, 'tz', None)
+            if tz is not None:
+                # Fechas con zona horaria: el rango del análisis se interpreta como hora local de esa zona
+                start, end = start.tz_localize(tz), end.tz_localize(tz)
+            in_range = (dates >= start) & (dates <= end)
+            data = data[in_range.to_numpy(dtype=bool, na_value=False)]
+        if self.arrow_backend:
+            data = to_arrow_backed(data)
         return data
@@ -0,0 +1,143 @@
+"""
+Proyecto: Demo RFM
+Módulo: dtype_planner.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor:
+Modificado por:
+Fecha modificación:
+Descripción:
+    Este módulo contiene la clase `DtypePlanner`, que reduce el uso de memoria de los DataFrames del pipeline RFM
+    eligiendo tipos de datos compactos en cada frontera entre etapas (carga, preprocesamiento, cálculo RFM, puntajes
+    y categorías), y registra la memoria de cada etapa antes y después de la conversión.
+
+    Conversiones aplicadas según la configuración `dtype_planning`:
+    - Columnas enteras: al menor tipo entero que contiene sus valores.
+    - Columnas float con valores enteros y sin nulos (por ejemplo CustomerID leído como float64): a entero.
+    - Columnas de texto (InvoiceNo, Business_Category, ...): a `category` o a texto de Arrow (`string[pyarrow]`).
+    - Columnas de puntaje (`*_score`): a int8.
+    - Columnas de rangos con tuplas (`*_range`): a `category` con el mismo texto que se exporta en CSV.
+
+    Además, `read_dtypes` entrega a `DataLoader` los tipos de `dtype_planning.read_dtypes` para pedirlos a los lectores
+    (CSV, Excel y SQL), de modo que las columnas no se materializan primero con un tipo más ancho.
+"""
+
+### Importar Librerías
+import numpy as np
+import pandas as pd
+from modules.run_context import RunContext, get_run_context
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """ Memoria ocupada por un DataFrame en MB (incluye el contenido de los objetos de Python). """
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+class DtypePlanner:
+
+    def __init__(self, config_path: str = None, context: RunContext = None):
+        """
+        Inicializa el planificador de tipos con la sección `dtype_planning` de la configuración.
+
+        Parámetros:
+            - config_path: str
+                Ruta del archivo YAML.
+            - context: RunContext, opcional
+                Contexto de ejecución compartido. Si no se indica, se obtiene (en caché) a partir de `config_path`.
+
+        Atributos:
+            - self.enabled: bool
+                Si es `False`, `optimize` devuelve los DataFrames sin cambios.
+            - self.read_dtypes_config: dict
+                Tipos por columna para los lectores de datos (ver `read_dtypes`).
+            - self.memory_log: list
+                Registro (etapa, MB antes, MB después) de cada llamada a `optimize`.
+        """
+        self.context = context if context is not None else get_run_context(config_path)
+        planning_config = self.context.config.get("dtype_planning", {}) or {}
+        self.enabled = planning_config.get("enabled", False)
+        self.string_dtype = planning_config.get("string_dtype", "category")
+        self.category_max_ratio = planning_config.get("category_max_ratio", 0.5)
+        self.downcast_integral_floats = planning_config.get("downcast_integral_floats", True)
+        self.read_dtypes_config = planning_config.get("read_dtypes", {}) or {}
+        self.memory_log = []
+
+    def read_dtypes(self, columns: list = None) -> dict:
+        """
+        Tipos a pedir a los lectores de datos (`dtype=`) para las columnas indicadas.
+
+        Parámetros:
+            - columns (list, opcional): Columnas que se van a leer. Si es None, se devuelven todas las configuradas.
+
+        Retorna:
+            - dict: `{columna: tipo}`. Vacío si la planificación está desactivada.
+        """
+        if not self.enabled:
+            return {}
+        return {column: dtype for column, dtype in self.read_dtypes_config.items() if columns is None or column in columns}
+
+    def optimize(self, df: pd.DataFrame, stage: str) -> pd.DataFrame:
+        """
+        Convierte las columnas del DataFrame a tipos compactos y registra la memoria antes y después.
+
+        Parámetros:
+            - df (pd.DataFrame): DataFrame de la etapa.
+            - stage (str): Nombre de la etapa para el registro de memoria.
+
+        Retorna:
+            - pd.DataFrame: DataFrame con tipos compactos (el mismo objeto si la planificación está desactivada).
+        """
+        if not self.enabled:
+            return df
+
+        before = memory_mb(df)
+        df = df.copy(deep=False)
+        for column in df.columns:
+            df[column] = self._plan_column(column, df[column])
+        after = memory_mb(df)
+
+        self.memory_log.append((stage, before, after))
+        print(f"Memoria '{stage}': {before:.1f} MB -> {after:.1f} MB")
+        return df
+
+    def _plan_column(self, name: str, series: pd.Series) -> pd.Series:
+        """ Elige el tipo compacto para una columna. """
+        if isinstance(series.dtype, pd.ArrowDtype):
+            # Columnas Arrow (modo Arrow): se conservan para no volver a convertirlas a NumPy
+            return series
+
+        if name.endswith("_score") and pd.api.types.is_numeric_dtype(series) and series.notnull().all():
+            if series.between(np.iinfo(np.int8).min, np.iinfo(np.int8).max).all():
+                return series.astype(np.int8)
+
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            return series
+
+        if pd.api.types.is_integer_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            return pd.to_numeric(series, downcast="integer")
+
+        if pd.api.types.is_float_dtype(series):
+            if self.downcast_integral_floats and len(series) and series.notnull().all() and np.array_equal(series, np.floor(series)):
+                return pd.to_numeric(series.astype(np.int64), downcast="integer")
+            return series
+
+        if series.dtype == object:
+            non_null = series.dropna()
+            if len(non_null) and isinstance(non_null.iloc[0], tuple):
+                # Rangos: mismo texto que se exporta en CSV, almacenado una sola vez por categoría
+                labels = series.map(lambda value: str((float(value[0]), float(value[1]))) if isinstance(value, tuple) else value)
+                return labels.astype("category")
+            inferred = pd.api.types.infer_dtype(non_null, skipna=True)
+            if inferred not in ("string", "mixed", "mixed-integer"):
+                return series
+            if inferred != "string":
+                series = series.where(series.isna(), series.astype(str))
+            if self.string_dtype == "category" and series.nunique() <= self.category_max_ratio * max(len(series), 1):
+                return series.astype("category")
+            if self.string_dtype in ("category", "pyarrow"):
+                try:
+                    return series.astype("string[pyarrow]")
+                except ImportError:
+                    return series.astype("category")
+
+        return series
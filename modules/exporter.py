@@ -10,27 +10,227 @@ Fecha modificación:
 Descripción:
  Este módulo contiene la clase `DataExporter` que proporciona métodos para exportar 
     datos en diferentes formatos (CSV, Excel, Parquet, SQL) de acuerdo con las configuraciones 
-    definidas en el archivo YAML. La configuración es cargada a través del módulo `DataLoader`.
+    definidas en el archivo YAML. La configuración se obtiene del contexto de ejecución compartido (`run_context`).
     Los métodos de exportación permiten guardar los datos en los formatos correspondientes según 
     las claves de configuración especificadas en el YAML.
 
 Funciones principales:
+    - export: Exporta un DataFrame a varios destinos configurados en paralelo y devuelve un reporte por destino.
     - export_to_csv: Exporta un DataFrame a un archivo CSV.
     - export_to_excel: Exporta un DataFrame a un archivo Excel.
     - export_to_parquet: Exporta un DataFrame a un archivo Parquet.
-    - export_to_sql: Exporta un DataFrame a una base de datos SQL.
+    - export_to_arrow: Exporta un DataFrame a un archivo Arrow IPC (Feather v2) con columnas tipadas y rangos numéricos,
+      legible con memoria mapeada mediante `data_loader.read_arrow_result`.
+    - export_to_sql: Exporta un DataFrame a una base de datos SQL (carga por lotes, con intercambio atómico o upsert).
+
+    Los archivos se escriben en un temporal de la misma carpeta y se renombran de forma atómica: un lector nunca ve
+    un archivo a medio escribir.
 """
 
 ### Importar Librerías
+import ast
+import csv
+import io
 import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
 import pandas as pd
 import yaml
-from modules.data_loader import DataLoader
+from sqlalchemy import inspect, text
+from modules.data_loader import ARROW_LATEST_SUFFIX, get_sql_engine
+from modules.run_context import RunContext, get_run_context
+from modules.segment_assigner import RFMProcessor
+
+# Formatos de exportación soportados (sección `export_settings.<formato>_sources` del YAML)
+EXPORT_FORMATS = ("csv", "excel", "parquet", "arrow", "sql")
+
+# Motores con DDL transaccional: DROP TABLE y ALTER TABLE ... RENAME se confirman o se revierten juntos (modo 'swap')
+TRANSACTIONAL_DDL_DIALECTS = ("postgresql", "sqlite")
 
 class DataExporter:
-    def __init__(self, config_path: str):
-       
-        self.config = DataLoader.load_config(config_path)
+    def __init__(self, config_path: str = None, context: RunContext = None):
+        """
+        Inicializa el exportador con la configuración del contexto de ejecución.
+
+        :param config_path: Ruta del archivo YAML con la configuración de exportación.
+        :param context: Contexto de ejecución compartido (opcional). Si no se indica, se obtiene a partir de `config_path`.
+        """
+        self.context = context if context is not None else get_run_context(config_path)
+        self.config = self.context.config
+
+    def _render_legacy_score(self, data: pd.DataFrame, target_config: dict) -> pd.DataFrame:
+        """
+        Convierte el `Final_Score` entero al texto concatenado original sólo si el destino lo pide
+        (`legacy_final_score: true` en su configuración de exportación).
+
+        :param data: DataFrame con los datos a exportar.
+        :param target_config: Configuración del destino de exportación en el YAML.
+        :return: DataFrame a exportar (copia sólo si se convierte la columna).
+        """
+        if not target_config.get('legacy_final_score', False):
+            return data
+        if 'Final_Score' not in data.columns or not pd.api.types.is_integer_dtype(data['Final_Score']):
+            return data
+        score_base = RFMProcessor.get_score_base(self.config.get('global_settings', {}))
+        data = data.copy()
+        data['Final_Score'] = RFMProcessor.render_legacy_score(data['Final_Score'], score_base)
+        return data
+
+    def _target_config(self, export_format: str, key: str) -> dict:
+        """
+        Devuelve la configuración de un destino (`export_settings.<formato>_sources.<clave>`).
+
+        :param export_format: Formato del destino ('csv', 'excel', 'parquet', 'arrow' o 'sql').
+        :param key: Clave del destino en el YAML.
+        :return: Configuración del destino.
+        :raises ValueError: Si el destino no está configurado.
+        """
+        target_config = (self.config.get('export_settings', {}).get(f'{export_format}_sources') or {}).get(key)
+        if not target_config:
+            raise ValueError(f"No se encontró la configuración para '{key}' en el archivo YAML.")
+        return target_config
+
+    @staticmethod
+    def _atomic_write(output_path: str, write) -> int:
+        """
+        Escribe un archivo en un temporal de la misma carpeta y lo renombra sobre `output_path` de forma atómica.
+        Si la escritura falla se elimina el temporal y el archivo anterior queda intacto.
+
+        :param output_path: Ruta final del archivo.
+        :param write: Función que recibe la ruta temporal y escribe el archivo.
+        :return: Tamaño en bytes del archivo escrito.
+        """
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Se conserva la extensión (el motor de Excel se elige por ella) y el hilo evita choques entre escrituras
+        root, extension = os.path.splitext(output_path)
+        temp_path = f"{root}.{os.getpid()}-{threading.get_ident()}.tmp{extension}"
+        try:
+            write(temp_path)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return os.path.getsize(output_path)
+
+    def _write_csv(self, data: pd.DataFrame, csv_key: str) -> tuple:
+        """ Escribe un destino CSV. Retorna (ruta, bytes). """
+        csv_config = self._target_config('csv', csv_key)
+        output_path = csv_config.get('path')
+        data = self._render_legacy_score(data, csv_config)
+        return output_path, self._atomic_write(output_path, lambda path: data.to_csv(path, index=False))
+
+    def _write_excel(self, data: pd.DataFrame, excel_key: str) -> tuple:
+        """ Escribe un destino Excel. Retorna (ruta, bytes). """
+        excel_config = self._target_config('excel', excel_key)
+        output_path = excel_config.get('path')
+        data = self._render_legacy_score(data, excel_config)
+        return output_path, self._atomic_write(output_path, lambda path: data.to_excel(path, index=False))
+
+    def _write_parquet(self, data: pd.DataFrame, parquet_key: str) -> tuple:
+        """ Escribe un destino Parquet. Retorna (ruta, bytes). """
+        parquet_config = self._target_config('parquet', parquet_key)
+        output_path = parquet_config.get('path')
+        data = self._render_legacy_score(data, parquet_config)
+        return output_path, self._atomic_write(output_path, lambda path: data.to_parquet(path, index=False))
+
+    def _write_arrow(self, data: pd.DataFrame, arrow_key: str) -> tuple:
+        """ Escribe un destino Arrow IPC (ver `export_to_arrow`). Retorna (ruta, bytes). """
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        arrow_config = self._target_config('arrow', arrow_key)
+        output_path = arrow_config.get('path')
+        compression = arrow_config.get('compression') or 'uncompressed'
+        if compression not in ('uncompressed', 'lz4', 'zstd'):
+            raise ValueError(f"Compresión Arrow '{compression}' no soportada. Usa null, 'lz4' o 'zstd'.")
+        data = self.columnar_frame(self._render_legacy_score(data, arrow_config))
+        table = pa.Table.from_pandas(data, preserve_index=False)
+
+        # Un archivo nuevo por exportación: un lector puede mantener mapeado el anterior (en Windows no se reemplaza)
+        root, extension = os.path.splitext(output_path)
+        version_path = f"{root}.{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{os.getpid()}{extension}"
+        size = self._atomic_write(version_path, lambda path: feather.write_feather(
+            table, path, compression=compression, compression_level=arrow_config.get('compression_level'),
+            chunksize=arrow_config.get('chunksize')))
+        self._atomic_write(output_path + ARROW_LATEST_SUFFIX, lambda path: _write_text(path, os.path.basename(version_path)))
+        self._prune_arrow_versions(output_path, version_path, arrow_config.get('keep_versions', 3))
+        return version_path, size
+
+    @staticmethod
+    def _prune_arrow_versions(output_path: str, current_path: str, keep_versions: int) -> None:
+        """
+        Elimina los archivos versionados de `output_path` más antiguos que los `keep_versions` más recientes.
+        Un archivo que aún está abierto (mapeado por un lector en Windows) se conserva y se elimina en una
+        exportación posterior.
+        """
+        root, extension = os.path.splitext(output_path)
+        directory = os.path.dirname(output_path) or '.'
+        pattern = re.compile(re.escape(os.path.basename(root)) + r"\.\d{8}_\d{6}_\d{6}_\d+" + re.escape(extension) + "$")
+        versions = sorted(name for name in os.listdir(directory) if pattern.match(name))
+        for name in versions[:-max(keep_versions, 1)]:
+            path = os.path.join(directory, name)
+            if os.path.abspath(path) == os.path.abspath(current_path):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def export(self, data: pd.DataFrame, targets: list = None, max_workers: int = None) -> list:
+        """
+        Exporta los datos a varios destinos en paralelo (un hilo por destino) y devuelve un reporte por destino.
+
+        La serialización y la escritura de los formatos liberan el GIL en gran parte, de modo que los destinos se
+        escriben de forma concurrente. Un destino que falla no detiene a los demás y su error queda en el reporte
+        (a diferencia de `export_to_*`, que sólo lo imprimen).
+
+        :param data: DataFrame con los datos a exportar.
+        :param targets: Lista de destinos `{'format': 'csv', 'key': 'results_csv'}`. Por defecto `export_settings.targets`.
+        :param max_workers: Hilos de exportación. Por defecto `export_settings.max_workers` o uno por destino.
+        :return: Lista (en el orden de `targets`) de diccionarios con `format`, `key`, `target` (ruta o tabla),
+            `rows`, `bytes` (None en SQL), `seconds`, `status` ('ok' o 'error') y `error`.
+        """
+        export_settings = self.config.get('export_settings', {}) or {}
+        if targets is None:
+            targets = export_settings.get('targets') or []
+        if not targets:
+            return []
+        max_workers = max_workers or export_settings.get('max_workers') or len(targets)
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(targets))) as pool:
+            report = list(pool.map(lambda target: self._export_target(data, target), targets))
+
+        for item in report:
+            if item['status'] == 'ok':
+                size = f", {item['bytes'] / 1024 ** 2:.2f} MB" if item['bytes'] is not None else ""
+                print(f"Datos exportados a {item['format']} en {item['target']} ({item['rows']} filas{size}, {item['seconds']:.2f}s)")
+            else:
+                print(f"Error al exportar a {item['format']} ('{item['key']}'): {item['error']}")
+        return report
+
+    def _export_target(self, data: pd.DataFrame, target: dict) -> dict:
+        """ Exporta un destino de `export` y registra filas, bytes, duración y error. """
+        export_format, key = target.get('format'), target.get('key')
+        item = {"format": export_format, "key": key, "target": None, "rows": len(data), "bytes": None,
+                "seconds": None, "status": "ok", "error": None}
+        start = time.perf_counter()
+        try:
+            if export_format not in EXPORT_FORMATS:
+                raise ValueError(f"Formato de exportación '{export_format}' no soportado. Usa uno de {EXPORT_FORMATS}.")
+            item["target"], item["bytes"] = getattr(self, f"_write_{export_format}")(data, key)
+        except Exception as e:
+            item["status"] = "error"
+            item["error"] = f"{type(e).__name__}: {e}"
+        item["seconds"] = round(time.perf_counter() - start, 6)
+        return item
 
     def export_to_csv(self, data: pd.DataFrame, csv_key: str) -> None:
         """
@@ -40,12 +240,7 @@ class DataExporter:
         :param csv_key: Clave en el archivo YAML que contiene las opciones de exportación CSV.
         """
         try:
-            csv_config = self.config['export_settings']['csv_sources'].get(csv_key)
-            if not csv_config:
-                raise ValueError(f"No se encontró la configuración para '{csv_key}' en el archivo YAML.")
-            
-            output_path = csv_config.get('path')
-            data.to_csv(output_path, index=False)
+            output_path, _ = self._write_csv(data, csv_key)
             print(f"Datos exportados a CSV en {output_path}")
         except Exception as e:
             print(f"Error al exportar a CSV: {e}")
@@ -58,12 +253,7 @@ class DataExporter:
         :param excel_key: Clave en el archivo YAML que contiene las opciones de exportación Excel.
         """
         try:
-            excel_config = self.config['export_settings']['excel_sources'].get(excel_key)
-            if not excel_config:
-                raise ValueError(f"No se encontró la configuración para '{excel_key}' en el archivo YAML.")
-            
-            output_path = excel_config.get('path')
-            data.to_excel(output_path, index=False)
+            output_path, _ = self._write_excel(data, excel_key)
             print(f"Datos exportados a Excel en {output_path}")
         except Exception as e:
             print(f"Error al exportar a Excel: {e}")
@@ -76,33 +266,189 @@ class DataExporter:
         :param parquet_key: Clave en el archivo YAML que contiene las opciones de exportación Parquet.
         """
         try:
-            parquet_config = self.config['export_settings']['parquet_sources'].get(parquet_key)
-            if not parquet_config:
-                raise ValueError(f"No se encontró la configuración para '{parquet_key}' en el archivo YAML.")
-            
-            output_path = parquet_config.get('path')
-            data.to_parquet(output_path, index=False)
+            output_path, _ = self._write_parquet(data, parquet_key)
             print(f"Datos exportados a Parquet en {output_path}")
         except Exception as e:
             print(f"Error al exportar a Parquet: {e}")
 
+    @staticmethod
+    def columnar_frame(data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Prepara el resultado para un formato columnar tipado: cada columna de rangos `<col>_range` (tuplas, o etiquetas
+        "(lower, upper)" con `range_format: 'categorical'` o tras `DtypePlanner`) se reemplaza por las columnas
+        numéricas `<col>_range_lower` y `<col>_range_upper` (nulas si el valor no tiene rango), como en
+        `range_format: 'bounds'`. Las demás columnas no cambian.
+
+        :param data: DataFrame con los datos a exportar.
+        :return: DataFrame con los rangos como columnas numéricas (copia sólo si hay rangos que convertir).
+        """
+        columns, converted = {}, False
+        for column in data.columns:
+            series = data[column]
+            if not str(column).endswith('_range'):
+                columns[column] = series
+                continue
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Se interpreta una sola vez cada etiqueta y se indexa por el código de la categoría
+                categories = [ast.literal_eval(label) if isinstance(label, str) else label for label in series.cat.categories]
+                bounds = np.array([tuple(category) for category in categories] + [(np.nan, np.nan)], dtype=float).reshape(-1, 2)
+                bounds = bounds[series.cat.codes.to_numpy()]
+            elif series.dtype == object:
+                bounds = np.array([value if isinstance(value, tuple) else (np.nan, np.nan) for value in series], dtype=float).reshape(-1, 2)
+            else:
+                columns[column] = series
+                continue
+            columns[column + '_lower'] = pd.Series(bounds[:, 0], index=data.index)
+            columns[column + '_upper'] = pd.Series(bounds[:, 1], index=data.index)
+            converted = True
+        return pd.DataFrame(columns, index=data.index) if converted else data
+
+    def export_to_arrow(self, data: pd.DataFrame, arrow_key: str) -> None:
+        """
+        Exporta los datos a un archivo Arrow IPC (Feather v2) según la configuración especificada en el YAML.
+
+        Las columnas conservan su tipo (enteros, flotantes, fechas y categorías) y los rangos se exportan como columnas
+        numéricas (`columnar_frame`), de modo que los consumidores no vuelven a interpretar texto.
+
+        Cada exportación escribe un archivo versionado nuevo (`<nombre>.<fecha>_<pid>.arrow`) y luego actualiza de
+        forma atómica el puntero `<path>.latest` con su nombre; `data_loader.read_arrow_result(path)` abre el archivo
+        al que apunta. Así un consumidor puede mantener mapeado un resultado mientras se exporta el siguiente, lo que
+        en Windows no permite reemplazar el archivo en el mismo lugar.
+
+        Opciones (`export_settings.arrow_sources.<clave>`):
+            - path: Ruta base del resultado (los archivos versionados y el puntero se escriben junto a ella).
+            - keep_versions: Archivos versionados que se conservan (por defecto 3). Los más antiguos se eliminan,
+              salvo los que sigan abiertos, que se eliminan en una exportación posterior.
+            - compression: null (sin compresión, por defecto), 'lz4' o 'zstd'. Sin compresión el archivo se lee con
+              memoria mapeada sin copias; comprimido ocupa menos en disco pero se descomprime al leerlo.
+            - compression_level: Nivel de compresión (opcional).
+            - chunksize: Filas por lote del archivo (opcional).
+
+        :param data: DataFrame con los datos a exportar.
+        :param arrow_key: Clave en el archivo YAML que contiene las opciones de exportación Arrow.
+        """
+        try:
+            output_path, _ = self._write_arrow(data, arrow_key)
+            print(f"Datos exportados a Arrow IPC en {output_path}")
+        except Exception as e:
+            print(f"Error al exportar a Arrow: {e}")
+
+    def get_engine(self, db_url: str):
+        """
+        Devuelve un engine de SQLAlchemy con pool de conexiones, reutilizado entre llamadas para el mismo `db_url`.
+
+        :param db_url: URL de conexión a la base de datos.
+        :return: Engine de SQLAlchemy.
+        """
+        return get_sql_engine(db_url)
+
+    def _write_sql(self, data: pd.DataFrame, sql_key: str) -> tuple:
+        """ Escribe un destino SQL (ver `export_to_sql`). Retorna (tabla, None). """
+        sql_config = self._target_config('sql', sql_key)
+
+        # Obtener configuración de la conexión a la base de datos
+        db_url = sql_config.get('db_url')
+        table_name = sql_config.get('table_name')
+        data = self._render_legacy_score(data, sql_config)
+        mode = sql_config.get('mode', 'replace')
+        key_column = sql_config.get('key_column', 'CustomerID')
+        chunksize = sql_config.get('chunksize', 10000)
+        method = sql_config.get('method', 'multi')
+        if method == 'copy':
+            method = _postgres_copy
+
+        # Los rangos (tuplas) no son un tipo SQL: se exportan como texto, igual que en CSV. Sólo se convierten las
+        # columnas <col>_range; las demás se pasan sin copiar
+        ranges = {column: pd.Series([str(value) if isinstance(value, tuple) else value for value in data[column]],
+                                    index=data.index, dtype=object)
+                  for column in data.columns if str(column).endswith('_range') and data[column].dtype == object}
+        if ranges:
+            data = pd.DataFrame({column: ranges.get(column, data[column]) for column in data.columns}, index=data.index, copy=False)
+
+        engine = self.get_engine(db_url)
+        if mode == 'swap' and engine.dialect.name not in TRANSACTIONAL_DDL_DIALECTS:
+            # En MySQL, SQL Server, Oracle, ... cada sentencia DDL se confirma sola: entre el DROP y el RENAME la tabla
+            # no existe, y un fallo del RENAME la deja borrada
+            raise ValueError(
+                f"El modo 'swap' requiere DDL transaccional ({', '.join(TRANSACTIONAL_DDL_DIALECTS)}) y el destino "
+                f"'{sql_key}' usa '{engine.dialect.name}'. Usa mode 'upsert' o 'replace'."
+            )
+        if method == 'multi':
+            # Una sentencia de varias filas no puede superar el límite de parámetros del motor
+            max_params = 65535
+            if engine.dialect.name == 'sqlite':
+                max_params = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+            chunksize = max(1, min(chunksize or len(data), max_params // max(len(data.columns), 1)))
+        if mode == 'replace':
+            data.to_sql(table_name, con=engine, index=False, if_exists='replace', chunksize=chunksize, method=method)
+        elif mode in ('swap', 'upsert'):
+            # Staging propio de cada ejecución: destinos o ejecuciones concurrentes sobre la misma tabla no se pisan
+            staging_table = f"{table_name}__staging_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+            quote = engine.dialect.identifier_preparer.quote
+            target, staging, key = quote(table_name), quote(staging_table), quote(key_column)
+            try:
+                data.to_sql(staging_table, con=engine, index=False, if_exists='replace', chunksize=chunksize, method=method)
+                with engine.begin() as conn:
+                    exists = inspect(conn).has_table(table_name)
+                    if mode == 'swap' or not exists:
+                        if exists:
+                            conn.execute(text(f"DROP TABLE {target}"))
+                        conn.execute(text(f"ALTER TABLE {staging} RENAME TO {target}"))
+                    else:
+                        columns = ", ".join(quote(column) for column in data.columns)
+                        conn.execute(text(f"DELETE FROM {target} WHERE {key} IN (SELECT {key} FROM {staging})"))
+                        conn.execute(text(f"INSERT INTO {target} ({columns}) SELECT {columns} FROM {staging}"))
+                        conn.execute(text(f"DROP TABLE {staging}"))
+            finally:
+                # Si la carga o la transacción fallan, el staging no queda en la base de datos
+                with engine.begin() as conn:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+        else:
+            raise ValueError(f"Modo de exportación SQL '{mode}' no soportado. Usa 'replace', 'swap' o 'upsert'.")
+        return f"{table_name} (modo {mode})", None
+
     def export_to_sql(self, data: pd.DataFrame, sql_key: str) -> None:
         """
         Exporta los datos a una base de datos SQL según la configuración especificada en el YAML.
-        
+
+        Modos (`mode` en la configuración):
+            - 'replace' (por defecto): Reemplaza la tabla directamente (comportamiento original).
+            - 'swap': Carga los datos en una tabla de staging y la intercambia con la tabla destino en una sola
+              transacción, de modo que los lectores nunca ven la tabla vacía. Sólo es atómico con DDL transaccional
+              (PostgreSQL, SQLite); en otros motores se rechaza. La tabla intercambiada es la de staging, por lo que
+              se pierden los índices, restricciones, permisos (GRANT) y vistas dependientes de la tabla anterior: hay
+              que recrearlos después de cada exportación, o usar 'upsert', que los conserva.
+            - 'upsert': Carga los datos en staging y, en una sola transacción, reemplaza en la tabla destino las filas
+              de los clientes cargados (`key_column`, por defecto CustomerID). Útil para ejecuciones incrementales.
+
+        La carga usa inserciones por lotes de `chunksize` filas con `method`: 'multi' (INSERT de varias filas por
+        sentencia, por defecto), 'copy' (COPY de PostgreSQL) o null (una fila por sentencia).
+
         :param data: DataFrame con los datos a exportar.
         :param sql_key: Clave en el archivo YAML que contiene las opciones de exportación SQL.
         """
         try:
-            sql_config = self.config['export_settings']['sql_sources'].get(sql_key)
-            if not sql_config:
-                raise ValueError(f"No se encontró la configuración para '{sql_key}' en el archivo YAML.")
-            
-            # Obtener configuración de la conexión a la base de datos
-            db_url = sql_config.get('db_url')
-            table_name = sql_config.get('table_name')
-            engine = create_engine(db_url)
-            data.to_sql(table_name, con=engine, index=False, if_exists='replace')
-            print(f"Datos exportados a SQL en la tabla {table_name}")
+            table, _ = self._write_sql(data, sql_key)
+            print(f"Datos exportados a SQL en la tabla {table}")
         except Exception as e:
             print(f"Error al exportar a SQL: {e}")
+
+
+def _write_text(path: str, content: str) -> None:
+    """ Escribe un archivo de texto (UTF-8). """
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(content)
+
+
+def _postgres_copy(table, conn, keys, data_iter):
+    """
+    Método de inserción para `DataFrame.to_sql` que usa COPY de PostgreSQL (psycopg2) en lugar de INSERT.
+    """
+    dbapi_conn = conn.connection
+    with dbapi_conn.cursor() as cursor:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(data_iter)
+        buffer.seek(0)
+        columns = ", ".join(f'"{key}"' for key in keys)
+        table_name = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+        cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH CSV", buffer)
@@ -0,0 +1,381 @@
+"""
+Proyecto: Demo RFM
+Módulo: incremental.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor:
+Modificado por:
+Fecha modificación:
+Descripción:
+    Este módulo contiene la clase `IncrementalRFM`, que permite actualizar el RFM de forma incremental (por ejemplo, a diario)
+    a partir de un almacén de estado por cliente persistido en SQLite, en lugar de recalcular toda la ventana de análisis
+    en cada ejecución.
+
+    El almacén guarda:
+    - purchases: Compras agregadas por (cliente, fecha de compra) con su monto y su mes.
+    - customer_rfm: Agregados por cliente (última compra, frecuencia, monto y meses con compras).
+    - metadata: Marca de agua (última fecha ingerida), ventana de análisis y breaks ajustados por variable, con la
+      huella de la configuración con la que se ajustaron.
+
+    En cada ejecución:
+    - Se ingieren sólo las transacciones posteriores a la marca de agua (`new_transactions` las separa antes del
+      preprocesamiento).
+    - Se eliminan las compras que salieron de la ventana de análisis.
+    - Sólo se recalculan los agregados de los clientes afectados.
+    - Los breaks se recalculan sólo si la distribución de la variable se desvía (PSI) más allá del umbral configurado
+      o si cambió su configuración (variables, num_categories o breaks_method).
+"""
+
+### Importar Librerías
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from modules.quantile_sketch import KLLSketch
+from modules.run_context import RunContext, get_run_context
+
+
+class IncrementalRFM:
+
+    def __init__(self, config_path: str = None, context: RunContext = None):
+        """
+        Inicializa el cálculo incremental con la configuración del archivo YAML.
+
+        Parámetros:
+            - config_path: str
+                Ruta del archivo YAML. Usa la sección `incremental` (store_path, drift_threshold) y las columnas
+                de `global_settings`.
+            - context: RunContext, opcional
+                Contexto de ejecución compartido. Si no se indica, se obtiene (en caché) a partir de `config_path`.
+
+        Atributos:
+            - self.store_path: str
+                Ruta del archivo SQLite con el estado por cliente.
+            - self.drift_threshold: float
+                Umbral de PSI (Population Stability Index) a partir del cual se recalculan los breaks de una variable.
+            - self.sketch_batch_size: int
+                Clientes leídos por lote del almacén al construir los resúmenes de cuantiles (backend 'sketch').
+            - self.start_date, self.end_date: pd.Timestamp
+                Ventana de análisis RFM, obtenida del contexto de ejecución.
+        """
+        self.context = context if context is not None else get_run_context(config_path)
+        self.config = self.context.config
+        incremental_config = self.config.get("incremental", {})
+        self.store_path = incremental_config.get("store_path", os.path.join("state", "rfm_state.sqlite"))
+        self.drift_threshold = incremental_config.get("drift_threshold", 0.1)
+        self.sketch_batch_size = incremental_config.get("sketch_batch_size", 100_000)
+
+        self.customer_col = self.context.columns["customer_id"]
+        self.date_col = self.context.columns["date"]
+        self.price_col = self.context.columns["price"]
+
+        self.start_date, self.end_date = self.context.start_date, self.context.end_date
+
+        store_dir = os.path.dirname(self.store_path)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+        self._create_tables()
+
+    @contextmanager
+    def _connect(self):
+        """ Abre una conexión al almacén de estado; confirma la transacción al salir y cierra la conexión. """
+        conn = sqlite3.connect(self.store_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _create_tables(self) -> None:
+        """ Crea las tablas del almacén de estado si no existen. """
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS purchases (
+                    customer_id, purchase_ts INTEGER, month INTEGER, amount REAL,
+                    PRIMARY KEY (customer_id, purchase_ts)
+                );
+                CREATE TABLE IF NOT EXISTS customer_rfm (
+                    customer_id PRIMARY KEY, last_purchase_ts INTEGER, frequency INTEGER,
+                    monetary REAL, months_with_purchases INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT);
+                """
+            )
+
+    def _get_metadata(self, conn: sqlite3.Connection, key: str):
+        """ Lee un valor (JSON) de la tabla de metadatos. """
+        row = conn.execute("SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_metadata(self, conn: sqlite3.Connection, key: str, value) -> None:
+        """ Guarda un valor (JSON) en la tabla de metadatos. """
+        conn.execute("INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    @property
+    def watermark(self) -> pd.Timestamp:
+        """ Fecha de la última transacción ingerida (o `None` si el almacén está vacío). """
+        with self._connect() as conn:
+            value = self._get_metadata(conn, "watermark")
+        return pd.Timestamp(value) if value is not None else None
+
+    def new_transactions(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Filtra las transacciones posteriores a la marca de agua, para preprocesar sólo las que `ingest` va a ingerir.
+
+        Los pasos que calculan estadísticas sobre el conjunto (imputación por media o mediana) las calculan entonces
+        sobre las transacciones nuevas, igual que `ingest` sólo agrega las compras nuevas a las ya guardadas.
+
+        Parámetros:
+            - data (pd.DataFrame): Transacciones cargadas, con la columna de fecha.
+
+        Retorna:
+            - pd.DataFrame: Las transacciones con fecha posterior a la marca de agua (todas si el almacén está vacío).
+
+        Excepciones:
+            - KeyError: Si la columna de fecha no se encuentra en el DataFrame.
+        """
+        if self.date_col not in data.columns:
+            raise KeyError(f"La columna requerida '{self.date_col}' no se encuentra en el DataFrame.")
+        watermark = self.watermark
+        if watermark is None:
+            return data
+        is_new = pd.to_datetime(data[self.date_col]) > watermark
+        return data[is_new.to_numpy(dtype=bool, na_value=False)]
+
+    def ingest(self, data: pd.DataFrame) -> int:
+        """
+        Ingiere las transacciones nuevas (posteriores a la marca de agua) y envejece las que salieron de la ventana.
+
+        Las transacciones deben venir ya preprocesadas. Las que tienen fecha menor o igual a la marca de agua se
+        ignoran, por lo que transacciones tardías con fechas anteriores requieren reconstruir el almacén.
+
+        La ventana de análisis sólo puede avanzar entre ejecuciones: las compras que salen de ella se eliminan del
+        almacén, de modo que si la ventana configurada empieza antes o termina antes que la guardada, los agregados
+        quedarían incompletos y se exige reconstruir el almacén.
+
+        Parámetros:
+            - data (pd.DataFrame): Transacciones con las columnas de cliente, fecha y monto.
+
+        Retorna:
+            - int: Número de clientes cuyos agregados fueron recalculados.
+
+        Excepciones:
+            - KeyError: Si alguna de las columnas necesarias no se encuentra en el DataFrame.
+            - ValueError: Si la ventana de análisis retrocedió o se amplió hacia atrás respecto a la guardada.
+        """
+        for col in (self.customer_col, self.date_col, self.price_col):
+            if col not in data.columns:
+                raise KeyError(f"La columna requerida '{col}' no se encuentra en el DataFrame.")
+
+        with self._connect() as conn:
+            window = self._get_metadata(conn, "window")
+        if window is not None:
+            stored_start, stored_end = (pd.Timestamp(value) for value in window)
+            if self.start_date < stored_start or self.end_date < stored_end:
+                raise ValueError(
+                    f"La ventana de análisis ({self.start_date} a {self.end_date}) empieza o termina antes que la del "
+                    f"almacén ({stored_start} a {stored_end}). Las compras fuera de la ventana anterior ya no están "
+                    f"en el almacén: elimina '{self.store_path}' para reconstruirlo.")
+
+        watermark = self.watermark
+        dates = pd.to_datetime(data[self.date_col])
+        mask = data[self.customer_col].notnull() & dates.notnull() & (dates >= self.start_date) & (dates <= self.end_date)
+        if watermark is not None:
+            mask &= dates > watermark
+        new_data = pd.DataFrame({
+            "customer_id": data.loc[mask, self.customer_col].values,
+            "purchase_ts": dates[mask].values.astype("datetime64[ns]").view("i8"),
+            "amount": data.loc[mask, self.price_col].values,
+        })
+        purchases = new_data.groupby(["customer_id", "purchase_ts"], as_index=False)["amount"].sum()
+        months = purchases["purchase_ts"].values.view("datetime64[ns]").astype("datetime64[M]").astype(np.int64)
+        purchases["month"] = months
+
+        start_ts = int(pd.Timestamp(self.start_date).as_unit("ns").value)
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO purchases (customer_id, purchase_ts, month, amount) VALUES (?, ?, ?, ?)
+                ON CONFLICT (customer_id, purchase_ts) DO UPDATE SET amount = amount + excluded.amount
+                """,
+                zip(purchases["customer_id"].tolist(), purchases["purchase_ts"].tolist(),
+                    purchases["month"].tolist(), purchases["amount"].tolist()),
+            )
+
+            # Clientes afectados: con compras nuevas o con compras que salen de la ventana
+            conn.execute("CREATE TEMP TABLE changed (customer_id PRIMARY KEY)")
+            conn.executemany("INSERT OR IGNORE INTO changed VALUES (?)", ((c,) for c in purchases["customer_id"].unique().tolist()))
+            conn.execute("INSERT OR IGNORE INTO changed SELECT DISTINCT customer_id FROM purchases WHERE purchase_ts < ?", (start_ts,))
+            conn.execute("DELETE FROM purchases WHERE purchase_ts < ?", (start_ts,))
+
+            # Recalcular sólo los agregados de los clientes afectados
+            conn.execute("DELETE FROM customer_rfm WHERE customer_id IN (SELECT customer_id FROM changed)")
+            conn.execute(
+                """
+                INSERT INTO customer_rfm
+                SELECT customer_id, MAX(purchase_ts), COUNT(*), SUM(amount), COUNT(DISTINCT month)
+                FROM purchases WHERE customer_id IN (SELECT customer_id FROM changed)
+                GROUP BY customer_id
+                """
+            )
+            changed = conn.execute("SELECT COUNT(*) FROM changed").fetchone()[0]
+            conn.execute("DROP TABLE changed")
+
+            if len(purchases):
+                latest = pd.Timestamp(int(purchases["purchase_ts"].max()))
+                if watermark is None or latest > watermark:
+                    self._set_metadata(conn, "watermark", latest.isoformat())
+            self._set_metadata(conn, "window", [str(self.start_date), str(self.end_date)])
+
+        print(f"Ingesta incremental: {len(purchases)} compras nuevas, {changed} clientes recalculados.")
+        return changed
+
+    def get_rfm(self) -> pd.DataFrame:
+        """
+        Devuelve las métricas RFM de todos los clientes del almacén.
+
+        La recencia se calcula al vuelo contra `end_date`, por lo que se actualiza para todos los clientes sin
+        recalcular sus agregados.
+
+        Retorna:
+            - pd.DataFrame: Mismas columnas que `RFMCalculator.calculate_rfm`.
+        """
+        with self._connect() as conn:
+            state = pd.read_sql("SELECT * FROM customer_rfm ORDER BY customer_id", conn)
+        return self._rfm_frame(state)
+
+    def _rfm_frame(self, state: pd.DataFrame) -> pd.DataFrame:
+        """ Convierte filas de `customer_rfm` en métricas RFM (la recencia se calcula contra `end_date`). """
+        last_purchase = pd.to_datetime(state["last_purchase_ts"], unit="ns")
+        return pd.DataFrame({
+            self.customer_col: state["customer_id"],
+            "Recency": (self.end_date - last_purchase).dt.days,
+            "Frequency": state["frequency"].astype("int64"),
+            "Monetary": state["monetary"].astype(float),
+            "LastPurchaseDate": last_purchase,
+            "MonthsWithPurchases": state["months_with_purchases"].astype("int64"),
+        })
+
+    def build_sketches(self, rfm_processing) -> dict:
+        """
+        Construye un resumen KLL por variable recorriendo `customer_rfm` por lotes de `sketch_batch_size` clientes.
+
+        Los resúmenes no se guardan entre ejecuciones: cada ingesta modifica los agregados de los clientes afectados
+        y un resumen KLL no permite retirar sus valores anteriores. Recorrer el almacén por lotes mantiene acotada la
+        memoria de los cuantiles aunque no se materialice una columna ordenada.
+
+        Parámetros:
+            - rfm_processing (RFMProcessing): Define las variables y el tamaño (`sketch_k`) de los resúmenes.
+
+        Retorna:
+            - dict: `{columna: KLLSketch}`.
+        """
+        sketches = {}
+        with self._connect() as conn:
+            for state in pd.read_sql("SELECT * FROM customer_rfm ORDER BY customer_id", conn, chunksize=self.sketch_batch_size):
+                batch = self._rfm_frame(state)
+                for column in rfm_processing.variables_config:
+                    if column in batch.columns:
+                        sketch = sketches.setdefault(column, KLLSketch(rfm_processing.sketch_k))
+                        sketch.update(batch[column].to_numpy(dtype=np.float64, na_value=np.nan))
+        return sketches
+
+    @staticmethod
+    def breaks_fingerprint(rfm_processing, column: str) -> str:
+        """ Huella (SHA-256) de la configuración con la que se ajustan los breaks de una variable. """
+        var_config = rfm_processing.variables_config[column]
+        payload = {
+            "variable": var_config,
+            "num_categories": rfm_processing.global_config["num_categories"],
+            "breaks_method": var_config.get("breaks_method"),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def population_stability_index(reference: dict, values: np.ndarray) -> float:
+        """
+        Calcula el PSI (Population Stability Index) de unos valores contra una distribución de referencia.
+
+        Parámetros:
+            - reference (dict): Distribución de referencia con `edges` (bordes de los bins) y `proportions`.
+            - values (np.ndarray): Valores actuales de la variable.
+
+        Retorna:
+            - float: PSI. Valores menores a 0.1 suelen considerarse estables.
+        """
+        edges = np.asarray(reference["edges"], dtype=float)
+        expected = np.asarray(reference["proportions"], dtype=float)
+        counts = np.bincount(np.clip(np.searchsorted(edges, values, side="right") - 1, 0, len(expected) - 1), minlength=len(expected))
+        actual = counts / max(counts.sum(), 1)
+        expected = np.clip(expected, 1e-6, None)
+        actual = np.clip(actual, 1e-6, None)
+        return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+    @staticmethod
+    def _reference_distribution(values: np.ndarray, bins: int = 10) -> dict:
+        """ Construye la distribución de referencia (deciles) de una variable para medir la deriva. """
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side="right") - 1, minlength=len(edges))
+        return {"edges": edges.tolist(), "proportions": (counts / max(counts.sum(), 1)).tolist()}
+
+    def score(self, rfm_data: pd.DataFrame, rfm_processing) -> pd.DataFrame:
+        """
+        Calcula puntajes y rangos reutilizando los breaks persistidos cuando la distribución no ha derivado.
+
+        Para cada variable se mide el PSI de los valores actuales contra la distribución con la que se ajustaron sus
+        breaks. Si no hay breaks guardados, si su huella (`breaks_fingerprint`) no coincide con la configuración actual
+        o si el PSI supera `drift_threshold`, se recalculan con
+        `RFMProcessing.calculate_breaks` y se persisten. Con `quantile_backend: 'sketch'` los breaks a recalcular usan
+        los resúmenes de `build_sketches`, construidos sobre el almacén.
+
+        Parámetros:
+            - rfm_data (pd.DataFrame): Resultado de `get_rfm` (con el backend 'sketch', los resúmenes se construyen
+              sobre el almacén y deben corresponder a estos datos).
+            - rfm_processing (RFMProcessing): Instancia usada para calcular breaks y puntajes.
+
+        Retorna:
+            - pd.DataFrame: Resultado de `RFMProcessing.process_rfm_data`.
+        """
+        with self._connect() as conn:
+            stored = self._get_metadata(conn, "breaks") or {}
+
+        fitted_breaks = {}
+        for column in rfm_processing.variables_config:
+            if column not in stored or column not in rfm_data.columns:
+                continue
+            if stored[column].get("fingerprint") != self.breaks_fingerprint(rfm_processing, column):
+                print(f"Cambió la configuración de '{column}'; se recalculan los breaks.")
+                continue
+            psi = self.population_stability_index(stored[column]["reference"], rfm_data[column].dropna().values)
+            if psi <= self.drift_threshold:
+                breaks = np.asarray(stored[column]["breaks"])
+                break_ranges = [tuple(r) for r in stored[column]["break_ranges"]]
+                fitted_breaks[column] = (breaks, break_ranges)
+            else:
+                print(f"Deriva detectada en '{column}' (PSI={psi:.3f}); se recalculan los breaks.")
+
+        sketches = None
+        if rfm_processing.quantile_backend == "sketch" and set(rfm_processing.variables_config) - set(fitted_breaks):
+            sketches = self.build_sketches(rfm_processing)
+        df_resultado = rfm_processing.process_rfm_data(rfm_data, fitted_breaks=fitted_breaks, sketches=sketches)
+
+        refitted = {
+            column: {
+                "breaks": np.asarray(breaks, dtype=float).tolist(),
+                "break_ranges": [[float(lower), float(upper)] for lower, upper in break_ranges],
+                "reference": self._reference_distribution(rfm_data[column].dropna().values),
+                "fingerprint": self.breaks_fingerprint(rfm_processing, column),
+            }
+            for column, (breaks, break_ranges) in rfm_processing.fitted_breaks.items()
+            if column not in fitted_breaks
+        }
+        if refitted:
+            stored.update(refitted)
+            with self._connect() as conn:
+                self._set_metadata(conn, "breaks", stored)
+
+        return df_resultado
@@ -0,0 +1,178 @@
+"""
+Proyecto: Demo RFM
+Módulo: metrics.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor:
+Modificado por:
+Fecha modificación:
+Descripción:
+    Este módulo contiene la clase `PipelineMetrics`, que instrumenta las etapas del pipeline RFM (carga,
+    preprocesamiento, cálculo RFM, puntajes por variable, categorías y exportación).
+
+    Para cada etapa se registra el tiempo de reloj, el tiempo de CPU, las filas de entrada y salida, el pico de memoria
+    del proceso (RSS máximo, donde el sistema operativo lo permite) y, opcionalmente, el pico de memoria de la etapa
+    con `tracemalloc`. Al terminar cada ejecución, las métricas se agregan como una línea JSON al archivo
+    configurado en `metrics.path`, de modo que se pueden comparar ejecuciones a lo largo del tiempo.
+"""
+
+### Importar Librerías
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from modules.run_context import RunContext, get_run_context
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def process_peak_rss_mb() -> float:
+    """ Pico de memoria residente del proceso en MB desde su inicio, o `None` si el sistema no lo expone. """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en bytes en macOS y en KB en Linux
+    return round(peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024, 3)
+
+
+class PipelineMetrics:
+
+    def __init__(self, config_path: str = None, context: RunContext = None):
+        """
+        Inicializa el registro de métricas con la sección `metrics` de la configuración.
+
+        Parámetros:
+            - config_path: str
+                Ruta del archivo YAML.
+            - context: RunContext, opcional
+                Contexto de ejecución compartido. Si no se indica, se obtiene (en caché) a partir de `config_path`.
+
+        Atributos:
+            - self.enabled: bool
+                Si es `False`, `stage` no mide nada y `write` no escribe el archivo.
+            - self.stages: list
+                Métricas de cada etapa terminada, en orden de finalización.
+        """
+        self.context = context if context is not None else get_run_context(config_path)
+        metrics_config = self.context.config.get("metrics", {}) or {}
+        self.enabled = metrics_config.get("enabled", False)
+        self.path = metrics_config.get("path", os.path.join("metrics", "rfm_metrics.jsonl"))
+        self.trace_memory = metrics_config.get("trace_memory", False)
+        self.stages = []
+        self._stack = []
+        self._started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._start_cpu = time.process_time()
+        if self.enabled and self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def _measure(self, name: str, rows_in: int = None):
+        """
+        Mide una etapa. El registro se entrega al bloque para que indique `rows_out` u otros datos.
+
+        Las etapas medidas fuera del hilo principal (p. ej. las variables de `process_rfm_data` con
+        `variable_workers` > 1) registran el tiempo de CPU del hilo y no registran memoria, que sólo se puede medir
+        para todo el proceso.
+        """
+        record = {"stage": name, "rows_in": rows_in, "rows_out": None}
+        in_thread = threading.current_thread() is not threading.main_thread()
+        cpu_clock = time.thread_time if in_thread else time.process_time
+        tracing = self.trace_memory and tracemalloc.is_tracing() and not in_thread
+        if tracing:
+            # El pico de la etapa que contiene a esta se conserva antes de reiniciar el pico de tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+            tracemalloc.reset_peak()
+            record["_start_memory"], record["_peak"] = current, current
+        if not in_thread:
+            self._stack.append(record)
+
+        start, start_cpu = time.perf_counter(), cpu_clock()
+        try:
+            yield record
+            record["status"] = "ok"
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["wall_seconds"] = round(time.perf_counter() - start, 6)
+            record["cpu_seconds"] = round(cpu_clock() - start_cpu, 6)
+            if not in_thread:
+                record["process_peak_rss_mb"] = process_peak_rss_mb()
+                self._stack[:] = [item for item in self._stack if item is not record]
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(record.pop("_peak"), peak)
+                record["peak_memory_mb"] = round(peak / 1024 ** 2, 3)
+                record["memory_delta_mb"] = round((current - record.pop("_start_memory")) / 1024 ** 2, 3)
+                if self._stack:
+                    self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+                tracemalloc.reset_peak()
+            self.stages.append(record)
+
+    def stage(self, name: str, rows_in: int = None):
+        """
+        Context manager que mide una etapa del pipeline.
+
+        Parámetros:
+            - name (str): Nombre de la etapa (por ejemplo 'RFMCalculator.calculate_rfm').
+            - rows_in (int, opcional): Filas de entrada.
+
+        Retorna:
+            - Context manager que entrega un diccionario en el que el bloque puede fijar `rows_out`.
+
+        Ejemplo:
+            with metrics.stage("DataPreprocessor.apply_preprocessing_to_source", rows_in=len(data)) as record:
+                data_processed = preprocessor.apply_preprocessing_to_source(data, "retail_data")
+                record["rows_out"] = len(data_processed)
+        """
+        if not self.enabled:
+            return nullcontext({})
+        return self._measure(name, rows_in)
+
+    def write(self, error: BaseException = None) -> str:
+        """
+        Agrega las métricas de la ejecución como una línea JSON al archivo `metrics.path`.
+
+        Parámetros:
+            - error (Exception, opcional): Excepción que detuvo la ejecución, si la hubo.
+
+        Retorna:
+            - str: Ruta del archivo escrito, o `None` si las métricas están desactivadas.
+        """
+        if not self.enabled:
+            return None
+
+        run = {
+            "started_at": self._started_at.isoformat(timespec="seconds"),
+            "config_path": self.context.config_path,
+            "status": "error" if error is not None else "ok",
+            "wall_seconds": round(time.perf_counter() - self._start, 6),
+            "cpu_seconds": round(time.process_time() - self._start_cpu, 6),
+            "process_peak_rss_mb": process_peak_rss_mb(),
+            "stages": self.stages,
+        }
+        if error is not None:
+            run["error"] = f"{type(error).__name__}: {error}"
+            run["traceback"] = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        if self.trace_memory and tracemalloc.is_tracing():
+            run["peak_memory_mb"] = round(max([stage.get("peak_memory_mb", 0) for stage in self.stages] or [0]), 3)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(run, ensure_ascii=False, default=str) + "\n")
+        print(f"Métricas de la ejecución guardadas en {self.path}")
+        return self.path
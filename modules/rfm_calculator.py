@@ -13,12 +13,16 @@ Descripción:
 """
 
 ### Importar Librerías
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
-from modules.data_loader import DataLoader
+from modules.data_loader import DataLoader, is_arrow_backend, to_arrow_backed
+from modules.rfm_processing import RFMProcessing
+from modules.run_context import RunContext, get_run_context
 
 
 class RFMCalculator:
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str = None, context: RunContext = None):
         """
         Inicializa el calculador RFM con la configuración especificada en un archivo YAML.
         
@@ -32,6 +36,9 @@ class RFMCalculator:
                 El archivo YAML debe incluir configuraciones globales para las columnas de los datos y 
                 el rango de fechas necesario para calcular RFM.
 
+            - context: RunContext, opcional
+                Contexto de ejecución compartido. Si no se indica, se obtiene (en caché) a partir de `config_path`.
+
             - self.data_loader: DataLoader
                 Instancia de la clase `DataLoader` que se utiliza para cargar y manipular los datos del archivo 
                 de configuración.
@@ -43,23 +50,21 @@ class RFMCalculator:
                 Fecha de fin para el análisis RFM, también obtenida a través del `DataLoader`.
         """
         
-        # Cargar configuración desde YAML
-        self.config = DataLoader.load_config(config_path)
+        # Configuración compartida (YAML leído una sola vez por ejecución)
+        self.context = context if context is not None else get_run_context(config_path)
+        self.config = self.context.config
         
         # Obtener configuraciones de columnas
-        columns_config = self.config.get("global_settings", {}).get("columns", {})
-        self.columns = {
-            "customer_id": columns_config.get("customer_id", "CustomerID"),
-            "date": columns_config.get("date", "InvoiceDate"),
-            "invoice": columns_config.get("invoice", "InvoiceNo"),
-            "price": columns_config.get("price", "UnitPrice"),
-            "quantity": columns_config.get("quantity", "Quantity"),
-        }
+        self.columns = dict(self.context.columns)
         
         # Rango de fechas para el análisis
-        self.data_loader = DataLoader(config_path=config_path)
+        self.data_loader = DataLoader(context=self.context)
         self.start_date, self.end_date = self.data_loader.get_date_range_for_rfm()
 
+        # Resúmenes de cuantiles por variable combinados desde las particiones de calculate_rfm_parallel
+        # (sólo con global_settings.quantile_backend: 'sketch')
+        self.sketches = {}
+
 
     def calculate_rfm(self, data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -108,9 +113,22 @@ class RFMCalculator:
         price_col = self.columns["price"]
         invoice_col = self.columns["invoice"]
 
-        # Asegurar formato datetime en la columna de fechas
-        data[date_col] = pd.to_datetime(data[date_col])
-        
+        # Asegurar formato datetime en la columna de fechas (las fechas Arrow se conservan)
+        if not pd.api.types.is_datetime64_any_dtype(data[date_col].dtype):
+            data[date_col] = pd.to_datetime(data[date_col])
+
+        aggregation = self.config.get("global_settings", {}).get("rfm_aggregation", "groupby")
+        if aggregation == "vectorized":
+            rfm_data = self._calculate_rfm_vectorized(data, customer_col, date_col, price_col)
+            # En modo Arrow el resultado también es Arrow (sin copia para las columnas numéricas)
+            return to_arrow_backed(rfm_data) if is_arrow_backend(self.config) else rfm_data
+        elif aggregation != "groupby":
+            raise ValueError(f"Método de agregación RFM no soportado: {aggregation}")
+
+        if isinstance(data[date_col].dtype, pd.ArrowDtype):
+            # El groupby original usa `.dt.to_period`, que no existe para fechas Arrow
+            data[date_col] = data[date_col].astype("datetime64[ns]")
+
         # Realizar todas las agregaciones en una sola llamada groupby
         rfm_data = data.groupby(customer_col).agg(
             Recency=(date_col, lambda x: (self.end_date - x.max()).days),
@@ -122,3 +140,308 @@ class RFMCalculator:
 
         return rfm_data
 
+
+    def _calculate_rfm_vectorized(self, data: pd.DataFrame, customer_col: str, date_col: str, price_col: str) -> pd.DataFrame:
+        """
+        Calcula las métricas RFM sin funciones lambda por cliente (`rfm_aggregation: 'vectorized'`).
+
+        Produce exactamente las mismas columnas y valores que la agregación `groupby` original, pero en una sola
+        pasada vectorizada:
+            - Los clientes se codifican como enteros con `pd.factorize` (ordenados, igual que `groupby`).
+            - Las transacciones se ordenan una vez por (cliente, fecha) con `np.lexsort`.
+            - **LastPurchaseDate** es la última fecha de cada grupo ordenado y **Recency** se obtiene con
+              aritmética entera sobre datetime64 (división entera por días, igual que `Timedelta.days`).
+            - **Frequency** y **MonthsWithPurchases** cuentan los cambios de fecha y de mes (datetime64[M])
+              dentro de cada grupo con `np.bincount`.
+            - **Monetary** usa la suma agrupada de pandas sobre los códigos enteros, que conserva la suma
+              compensada de `groupby` y por tanto los mismos valores decimales.
+
+        Parámetros:
+            - data (pd.DataFrame): Transacciones con la columna de fechas ya convertida a datetime.
+            - customer_col (str): Columna del identificador de cliente.
+            - date_col (str): Columna de la fecha de la transacción.
+            - price_col (str): Columna del monto de la transacción.
+
+        Retorna:
+            - pd.DataFrame: Mismo resultado que `calculate_rfm` con `rfm_aggregation: 'groupby'`.
+        """
+        codes, customers = pd.factorize(data[customer_col], sort=True)
+        valid = codes >= 0  # groupby descarta los clientes nulos
+        codes = codes[valid]
+        n_customers = len(customers)
+
+        dates = data[date_col].to_numpy(dtype="datetime64[ns]")[valid]
+        date_ints = dates.view("i8")
+        nat = np.iinfo(np.int64).min  # NaT se ordena antes que cualquier fecha
+
+        # Ordenar una sola vez por cliente y fecha
+        order = np.lexsort((date_ints, codes))
+        sorted_codes = codes[order]
+        sorted_dates = date_ints[order]
+        sorted_months = dates[order].astype("datetime64[M]").view("i8")
+
+        new_group = np.empty(len(order), dtype=bool)
+        new_group[:1] = True
+        np.not_equal(sorted_codes[1:], sorted_codes[:-1], out=new_group[1:])
+        group_ends = np.append(np.flatnonzero(new_group)[1:], len(order)) - 1
+        has_date = sorted_dates != nat
+
+        # Última compra: el último elemento de cada grupo ordenado
+        last_dates = sorted_dates[group_ends]
+        no_date = last_dates == nat
+
+        # Conteos de fechas y meses distintos (sin contar NaT)
+        new_date = new_group.copy()
+        new_date[1:] |= sorted_dates[1:] != sorted_dates[:-1]
+        frequency = np.bincount(sorted_codes[new_date & has_date], minlength=n_customers)
+
+        new_month = new_group.copy()
+        new_month[1:] |= sorted_months[1:] != sorted_months[:-1]
+        months_with_purchases = np.bincount(sorted_codes[new_month & has_date], minlength=n_customers)
+
+        # Recencia en días (división entera, igual que Timedelta.days)
+        day_ns = np.int64(86_400_000_000_000)
+        end_ns = np.int64(pd.Timestamp(self.end_date).as_unit("ns").value)
+        recency = (end_ns - last_dates) // day_ns
+        if no_date.any():
+            recency = np.where(no_date, np.nan, recency)
+
+        monetary = data[price_col].to_numpy()[valid]
+        monetary = pd.Series(monetary).groupby(codes, sort=True).sum().reindex(range(n_customers), fill_value=0).values
+
+        rfm_data = pd.DataFrame({
+            customer_col: customers,
+            "Recency": recency,
+            "Frequency": frequency.astype(np.int64),
+            "Monetary": monetary,
+            "LastPurchaseDate": pd.Series(last_dates.view("datetime64[ns]")).astype(data[date_col].dtype),
+            "MonthsWithPurchases": months_with_purchases.astype(np.int64),
+        })
+
+        return rfm_data
+
+
+    def calculate_rfm_streaming(self, chunks, preprocessor=None, source_key: str = None) -> pd.DataFrame:
+        """
+        Calcula las métricas RFM a partir de fragmentos de transacciones, sin materializar todo el conjunto de datos.
+
+        Cada fragmento (por ejemplo de `DataLoader.iter_chunks`) pasa por los pasos de `DataPreprocessor` configurados
+        para `source_key` y se incorpora a un `RFMPartialAggregate`. La memoria máxima depende del número de clientes
+        (y de sus fechas de compra distintas), no del número de transacciones.
+
+        Nota: Los pasos de preprocesamiento se aplican por fragmento. Los duplicados que caen en fragmentos distintos
+        no se eliminan y las imputaciones 'mean'/'median' usan las estadísticas del fragmento.
+
+        Con `global_settings.quantile_backend: 'sketch'` se construye además un resumen KLL por variable en
+        `self.sketches`, para calcular límites y breaks sin ordenar las columnas. Los resúmenes se alimentan con los
+        agregados finales y no por fragmento: un cliente puede tener compras en varios fragmentos, por lo que sus
+        métricas sólo son definitivas al final, y un resumen KLL no permite retirar valores ya agregados.
+
+        Parámetros:
+            - chunks (Iterable[pd.DataFrame]): Fragmentos de transacciones ya filtrados por rango de fechas.
+            - preprocessor (DataPreprocessor, opcional): Preprocesador a aplicar a cada fragmento.
+            - source_key (str, opcional): Clave de la fuente en `preprocessing_steps`.
+
+        Retorna:
+            - pd.DataFrame: Mismas columnas que `calculate_rfm`.
+        """
+        aggregate = RFMPartialAggregate(self.columns)
+        for chunk in chunks:
+            if preprocessor is not None and source_key is not None:
+                chunk = preprocessor.apply_preprocessing_to_source(chunk, source_key)
+            aggregate.update(chunk)
+        rfm_data = aggregate.finalize(self.end_date)
+        processing = RFMProcessing(context=self.context)
+        self.sketches = processing.build_sketches(rfm_data) if processing.quantile_backend == "sketch" else {}
+        return rfm_data
+
+
+    def calculate_rfm_parallel(self, data: pd.DataFrame, preprocessor=None, source_key: str = None, workers: int = None) -> pd.DataFrame:
+        """
+        Calcula las métricas RFM en paralelo, particionando las transacciones por hash de `customer_id`.
+
+        Todas las transacciones de un cliente quedan en la misma partición, por lo que cada proceso aplica el
+        preprocesamiento y `calculate_rfm` a su partición de forma independiente y los resultados solo se concatenan.
+        El número de procesos se toma de `global_settings.workers` si no se indica.
+
+        Nota: Los pasos de preprocesamiento por fila, la eliminación de duplicados y el descarte de nulos dan el
+        mismo resultado que en un solo proceso. Las imputaciones 'mean'/'median' usarían las estadísticas de cada
+        partición, por lo que con más de un proceso se rechazan.
+
+        Con `global_settings.quantile_backend: 'sketch'` cada proceso devuelve además un resumen KLL por variable de
+        su partición; los resúmenes se combinan en `self.sketches` para calcular límites y breaks sin volver a
+        recorrer las columnas.
+
+        Parámetros:
+            - data (pd.DataFrame): Transacciones filtradas por rango de fechas.
+            - preprocessor (DataPreprocessor, opcional): Preprocesador a aplicar a cada partición.
+            - source_key (str, opcional): Clave de la fuente en `preprocessing_steps`.
+            - workers (int, opcional): Número de procesos.
+
+        Retorna:
+            - pd.DataFrame: Mismo resultado que `calculate_rfm`, ordenado por cliente.
+
+        Excepciones:
+            - ValueError: Si con más de un proceso el preprocesamiento de `source_key` imputa con 'mean' o 'median'.
+        """
+        if workers is None:
+            workers = self.config.get("global_settings", {}).get("workers", 1)
+        self.sketches = {}
+        if workers <= 1:
+            if preprocessor is not None and source_key is not None:
+                data = preprocessor.apply_preprocessing_to_source(data, source_key)
+            return self.calculate_rfm(data)
+
+        if preprocessor is not None and source_key is not None:
+            imputed = preprocessor.dataset_imputations(source_key)
+            if imputed:
+                raise ValueError(
+                    f"Las imputaciones 'mean'/'median' de {imputed} en '{source_key}' dependen de todas las filas y no "
+                    f"se pueden aplicar por partición; usa global_settings.workers: 1 o imputa antes de particionar."
+                )
+
+        customer_col = self.columns["customer_id"]
+        if customer_col not in data.columns:
+            raise KeyError(f"La columna requerida '{customer_col}' no se encuentra en el DataFrame.")
+
+        # Particionar por hash del cliente (los nulos comparten partición)
+        partition = (pd.util.hash_pandas_object(data[customer_col], index=False).values % workers).astype(np.int64)
+        partitions = [data[partition == i] for i in range(workers)]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                _calculate_rfm_partition,
+                [self] * workers, [preprocessor] * workers, [source_key] * workers, partitions, range(workers),
+            ))
+
+        for _, partition_sketches in results:
+            for column, sketch in (partition_sketches or {}).items():
+                if column in self.sketches:
+                    self.sketches[column].merge(sketch)
+                else:
+                    self.sketches[column] = sketch
+
+        rfm_data = pd.concat([partition_rfm for partition_rfm, _ in results], ignore_index=True)
+        return rfm_data.sort_values(customer_col, kind="stable").reset_index(drop=True)
+
+
+def _calculate_rfm_partition(calculator: RFMCalculator, preprocessor, source_key: str, partition: pd.DataFrame,
+                             index: int = 0) -> tuple:
+    """
+    Preprocesa y agrega una partición de clientes (ejecutado en un proceso del pool).
+
+    Retorna (agregados RFM, resúmenes de cuantiles por variable o None si el backend de cuantiles es 'exact'). Los
+    resúmenes usan el número de la partición como semilla.
+    """
+    if preprocessor is not None and source_key is not None:
+        partition = preprocessor.apply_preprocessing_to_source(partition, source_key)
+    rfm_data = calculator.calculate_rfm(partition)
+    processing = RFMProcessing(context=calculator.context)
+    sketches = processing.build_sketches(rfm_data, seed=index) if processing.quantile_backend == "sketch" else None
+    return rfm_data, sketches
+
+
+class RFMPartialAggregate:
+    """
+    Agregados parciales por cliente que se pueden combinar (mergeables) para el cálculo RFM por fragmentos.
+
+    Estado acumulado:
+        - Suma del monto por cliente (Monetary).
+        - Pares distintos (cliente, fecha de compra), de los que se derivan la última compra, la frecuencia y los
+          meses con compras.
+
+    Dos agregados calculados sobre particiones distintas de las transacciones se combinan con `merge`, y
+    `finalize` produce el mismo DataFrame que `RFMCalculator.calculate_rfm`. Los montos se suman por fragmento,
+    por lo que Monetary puede diferir en el último decimal de precisión flotante respecto al cálculo en memoria.
+    """
+
+    # Número de fragmentos acumulados antes de compactar el estado
+    COMPACT_EVERY = 16
+
+    def __init__(self, columns: dict):
+        """
+        Parámetros:
+            - columns (dict): Mapeo de columnas de `RFMCalculator.columns`.
+        """
+        self.columns = columns
+        self._monetary = []
+        self._purchases = []
+
+    def update(self, chunk: pd.DataFrame) -> "RFMPartialAggregate":
+        """
+        Incorpora un fragmento de transacciones al agregado.
+
+        Excepciones:
+            - KeyError: Si alguna de las columnas necesarias no se encuentra en el fragmento.
+        """
+        customer_col = self.columns["customer_id"]
+        date_col = self.columns["date"]
+        price_col = self.columns["price"]
+        for col in (customer_col, date_col, price_col):
+            if col not in chunk.columns:
+                raise KeyError(f"La columna requerida '{col}' no se encuentra en el DataFrame.")
+
+        chunk = chunk[chunk[customer_col].notnull()]
+        dates = pd.to_datetime(chunk[date_col])
+        self._monetary.append(chunk.groupby(customer_col)[price_col].sum())
+        purchases = pd.DataFrame({customer_col: chunk[customer_col].values, date_col: dates.values})
+        self._purchases.append(purchases[purchases[date_col].notnull()].drop_duplicates())
+
+        if len(self._purchases) >= self.COMPACT_EVERY:
+            self._compact()
+        return self
+
+    def merge(self, other: "RFMPartialAggregate") -> "RFMPartialAggregate":
+        """ Combina el estado de otro agregado parcial en este. """
+        self._monetary.extend(other._monetary)
+        self._purchases.extend(other._purchases)
+        self._compact()
+        return self
+
+    def _compact(self) -> None:
+        """ Reduce los fragmentos acumulados a un único estado por cliente. """
+        if self._monetary:
+            monetary = pd.concat(self._monetary)
+            self._monetary = [monetary.groupby(level=0).sum()]
+        if self._purchases:
+            self._purchases = [pd.concat(self._purchases, ignore_index=True).drop_duplicates()]
+
+    def finalize(self, end_date: pd.Timestamp) -> pd.DataFrame:
+        """
+        Calcula las métricas RFM finales a partir del estado acumulado.
+
+        Parámetros:
+            - end_date (pd.Timestamp): Fecha de fin del análisis, usada para la recencia.
+
+        Retorna:
+            - pd.DataFrame: Columnas customer_id, Recency, Frequency, Monetary, LastPurchaseDate y MonthsWithPurchases.
+        """
+        customer_col = self.columns["customer_id"]
+        date_col = self.columns["date"]
+        self._compact()
+        if not self._monetary:
+            return pd.DataFrame(columns=[customer_col, "Recency", "Frequency", "Monetary", "LastPurchaseDate", "MonthsWithPurchases"])
+
+        monetary = self._monetary[0].sort_index()
+        purchases = self._purchases[0] if self._purchases else pd.DataFrame(columns=[customer_col, date_col])
+        by_customer = purchases.groupby(customer_col)[date_col]
+        last_purchase = by_customer.max().reindex(monetary.index)
+        frequency = by_customer.size().reindex(monetary.index, fill_value=0)
+        months = purchases[date_col].dt.to_period('M')
+        months_with_purchases = (
+            pd.DataFrame({customer_col: purchases[customer_col].values, "month": months.values})
+            .drop_duplicates()
+            .groupby(customer_col)
+            .size()
+            .reindex(monetary.index, fill_value=0)
+        )
+
+        rfm_data = pd.DataFrame({
+            "Recency": (end_date - last_purchase).dt.days,
+            "Frequency": frequency.astype("int64"),
+            "Monetary": monetary,
+            "LastPurchaseDate": last_purchase,
+            "MonthsWithPurchases": months_with_purchases.astype("int64"),
+        })
+        rfm_data.index.name = customer_col
+        return rfm_data.reset_index()
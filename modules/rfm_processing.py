@@ -13,9 +13,11 @@ Descripción:
     
     Los procesos que realiza este módulo incluyen:
     - Cálculo de límites de outliers utilizando diferentes métodos (IQR, desviación estándar, percentiles).
-    - Cálculo de puntos de corte mediante percentiles o el método Jenks.
+    - Cálculo de puntos de corte mediante percentiles o el método Jenks (exacto o aproximado, con reporte de GVF).
+    - Cuantiles exactos o aproximados con un resumen KLL combinable (`global_settings.quantile_backend`).
+    - Estadísticas por variable a partir de un único ordenamiento de la columna, con las variables procesadas en paralelo.
     - Asignación de puntajes a los datos en función de los puntos de corte, con soporte para puntuaciones inversas.
-    - Determinación de los rangos en los que caen los valores según los puntos de corte.
+    - Determinación vectorizada de los rangos en los que caen los valores según los puntos de corte.
     
     Este módulo es parte de un sistema de análisis de datos RFM, y es utilizado para transformar los datos en un formato adecuado 
     para segmentar a los clientes según su comportamiento y su relación con la empresa.
@@ -24,30 +26,128 @@ Descripción:
 """
 
 ### Importar Librerías
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 import numpy as np
 import pandas as pd
 import jenkspy
-from modules.data_loader import DataLoader
+from modules.data_loader import is_arrow_backend, to_arrow_backed
+from modules.quantile_sketch import KLLSketch
+from modules.run_context import RunContext, get_run_context
+
+# Mismo error que `jenkspy.jenks_breaks` cuando hay menos valores únicos que clases
+JENKS_CLASSES_ERROR = ("Number of class have to be an integer greater than or equal to 1 and smaller than or equal to "
+                       "the number of unique values to use")
+
+# Las variables pueden procesarse en hilos (variable_workers > 1): cada mensaje se imprime completo
+_print_lock = threading.Lock()
+
+
+def _report(message: str):
+    """ Imprime un mensaje sin que se mezcle con los de otros hilos. """
+    with _print_lock:
+        print(message)
+
 
 class RFMProcessing:
     
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str = None, context: RunContext = None):
         """
         Inicializa el módulo de procesamiento de RFM con la configuración especificada.
+
+        Si no se indica `context`, se obtiene el contexto de ejecución compartido (en caché) a partir de `config_path`.
         """
-        # Cargar configuración desde el archivo YAML
-        self.config = DataLoader.load_config(config_path)
+        # Configuración compartida (YAML leído una sola vez por ejecución)
+        self.context = context if context is not None else get_run_context(config_path)
+        self.config = self.context.config
         self.global_config = self.config["global_settings"]
         self.variables_config = self.config["variables"]
+        # Reporte de calidad (GVF) de los breaks Jenks calculados por variable
+        self.breaks_report = {}
+        # Breaks y rangos usados en el último process_rfm_data, por variable
+        self.fitted_breaks = {}
+        # Límites de outliers (LI, LS) y extremos usados en el último calculate_breaks, por variable
+        self.outlier_limits = {}
+        # Backend de cuantiles para límites IQR/percentiles y breaks por percentiles: 'exact' o 'sketch'
+        self.quantile_backend = self.global_config.get("quantile_backend", "exact")
+        self.sketch_k = self.global_config.get("quantile_sketch_k", 200)
+        if self.quantile_backend not in ("exact", "sketch"):
+            raise ValueError(f"Backend de cuantiles no soportado: {self.quantile_backend}")
+        # Hilos para procesar las variables en paralelo en process_rfm_data (NumPy libera el GIL al ordenar)
+        self.variable_workers = self.global_config.get("variable_workers", 1)
+
+    ## Estadísticas por variable
+    @staticmethod
+    def sorted_values(df: pd.DataFrame, column: str) -> np.ndarray:
+        """
+        Ordena una sola vez los valores no nulos de la columna.
+
+        El arreglo ordenado se reutiliza para el mínimo, el máximo, los cuantiles de los límites de outliers, el
+        rango dentro de [LI, LS] (por búsqueda binaria) y los percentiles de los breaks.
+        """
+        return np.sort(df[column].dropna().to_numpy())
+
+    @staticmethod
+    def percentiles_from_sorted(sorted_values: np.ndarray, percentiles) -> np.ndarray:
+        """
+        Percentiles de un arreglo ya ordenado.
+
+        Usa `np.percentile` con interpolación lineal (la misma de `pd.Series.quantile`); sobre un arreglo ya ordenado
+        la selección interna no necesita volver a ordenar.
+
+        Parámetros:
+            - sorted_values (np.ndarray): Valores ordenados, sin nulos.
+            - percentiles (array-like): Percentiles en [0, 100].
+
+        Retorna:
+            - np.ndarray: Un valor por percentil.
+        """
+        return np.percentile(sorted_values, percentiles, method="linear")
+
+    ## Resúmenes de cuantiles
+    def build_sketches(self, df: pd.DataFrame, seed: int = 0) -> dict:
+        """
+        Construye un resumen KLL por cada variable configurada presente en el DataFrame.
+
+        Los resúmenes de particiones disjuntas de clientes se combinan con `KLLSketch.merge` y se pasan a
+        `process_rfm_data(sketches=...)`. Cada partición debe usar una semilla distinta para que sus
+        compactaciones sean independientes.
+
+        Parámetros:
+            - df (pd.DataFrame): Agregados RFM por cliente (o una partición de ellos).
+            - seed (int, opcional): Semilla de los resúmenes (por ejemplo, el número de la partición).
+
+        Retorna:
+            - dict: `{columna: KLLSketch}`.
+        """
+        return {
+            column: KLLSketch(self.sketch_k, seed=seed).update(df[column].to_numpy(dtype=np.float64, na_value=np.nan))
+            for column in self.variables_config
+            if column in df.columns
+        }
+
+    def _resolve_sketch(self, df: pd.DataFrame, column: str, sketch: KLLSketch = None):
+        """ Resumen a usar para una columna: el recibido, uno nuevo con el backend 'sketch' o None (exacto). """
+        if sketch is not None or self.quantile_backend != "sketch":
+            return sketch
+        return self.build_sketches(df[[column]])[column]
 
     ## Manejo de Outliers
-    def calculate_outliers_limits(self, df: pd.DataFrame, column: str) -> tuple:
+    def calculate_outliers_limits(self, df: pd.DataFrame, column: str, sketch: KLLSketch = None, sorted_values: np.ndarray = None) -> tuple:
         """
         Calcula los límites de outliers (LI y LS) para una columna basada en la configuración.
 
         Parámetros:
             - df (pd.DataFrame): El DataFrame que contiene los datos.
             - column (str): El nombre de la columna en la que se calcularán los límites de los outliers.
+            - sketch (KLLSketch, opcional): Resumen de cuantiles de la columna. Si se indica (o si
+              `quantile_backend` es 'sketch'), los cuantiles de IQR y percentiles se aproximan con el resumen y el
+              mínimo y máximo se toman del resumen (exactos). El método std_dev siempre usa los valores.
+            - sorted_values (np.ndarray, opcional): Valores de la columna ya ordenados (`sorted_values`). Con el
+              backend exacto, el mínimo, el máximo, los cuantiles y la media y desviación de std_dev se leen de este
+              arreglo; si no se indica, se ordena la columna.
 
         Retorna:
             - tuple: Una tupla con los límites de outliers (LI y LS), el valor del método usado (IQR, std_dev o percentiles), 
@@ -70,13 +170,20 @@ class RFMProcessing:
         if var_config is None:
             raise KeyError(f"La columna '{column}' no está configurada en el YAML.")
 
-        min_value = df[column].min()
-        max_value = df[column].max()
+        sketch = self._resolve_sketch(df, column, sketch)
+        if sketch is not None:
+            min_value, max_value = sketch.min, sketch.max
+        else:
+            if sorted_values is None:
+                sorted_values = self.sorted_values(df, column)
+            min_value, max_value = sorted_values[0], sorted_values[-1]
         method = var_config["outlier_method"]
 
         if method == "IQR":
-            Q1 = df[column].quantile(0.25)
-            Q3 = df[column].quantile(0.75)
+            if sketch is not None:
+                Q1, Q3 = sketch.quantiles([0.25, 0.75])
+            else:
+                Q1, Q3 = self.percentiles_from_sorted(sorted_values, [25, 75])
             IQR_value = Q3 - Q1
             # Factor IQR configurable desde el YAML
             IQR_factor = var_config.get("iqr_factor", 1.5)
@@ -85,8 +192,10 @@ class RFMProcessing:
             return LI, LS, IQR_value, min_value, max_value
 
         elif method == "std_dev":
-            mean_value = df[column].mean()
-            std_dev = df[column].std()
+            # Media y desviación muestral (ddof=1, como pandas) sobre el arreglo ya extraído, sin volver a la columna
+            values = sorted_values if sorted_values is not None else df[column].dropna().to_numpy(dtype=np.float64)
+            mean_value = values.mean()
+            std_dev = values.std(ddof=1)
             # Factor std_dev configurable desde el YAML
             std_dev_factor = var_config.get("std_dev_factor", 2)
             LI = mean_value - std_dev_factor * std_dev
@@ -97,8 +206,10 @@ class RFMProcessing:
             # Percentiles configurables desde el YAML
             lower_percentile = var_config.get("percentile_lower", 5)
             upper_percentile = var_config.get("percentile_upper", 95)
-            LI = np.percentile(df[column], lower_percentile)
-            LS = np.percentile(df[column], upper_percentile)
+            if sketch is not None:
+                LI, LS = sketch.quantiles([lower_percentile / 100, upper_percentile / 100])
+            else:
+                LI, LS = self.percentiles_from_sorted(sorted_values, [lower_percentile, upper_percentile])
             return LI, LS, None, min_value, max_value
 
         else:
@@ -106,13 +217,17 @@ class RFMProcessing:
 
     
     ## Definición de Puntos de Corte
-    def calculate_breaks(self, df: pd.DataFrame, column: str) -> np.ndarray:
+    def calculate_breaks(self, df: pd.DataFrame, column: str, sketch: KLLSketch = None, sorted_values: np.ndarray = None) -> np.ndarray:
         """
         Calcula los puntos de corte (breaks) para una columna según la configuración.
 
         Parámetros:
             - df (pd.DataFrame): El DataFrame que contiene los datos.
             - column (str): El nombre de la columna para la que se calcularán los puntos de corte.
+            - sketch (KLLSketch, opcional): Resumen de cuantiles de la columna. Con el método percentiles, los breaks
+              se obtienen del resumen restringido a [LI, LS] sin filtrar la columna. Jenks siempre usa los valores.
+            - sorted_values (np.ndarray, opcional): Valores de la columna ya ordenados (`sorted_values`). Si no se
+              indica y se necesitan, la columna se ordena una sola vez.
 
         Retorna:
             - np.ndarray: Un arreglo de los puntos de corte calculados, incluyendo los límites inferior y superior.
@@ -129,18 +244,27 @@ class RFMProcessing:
             - **Jenks**: Se utiliza el algoritmo Jenks para calcular los puntos de corte y dividir los datos en grupos óptimos.
 
             En ambos casos, se filtran los valores dentro de los límites (calculados previamente por los outliers) y se asegura que no haya solapamientos entre los rangos.
+            Los valores dentro de [LI, LS] se ubican por búsqueda binaria en la columna ordenada, sin copiar el DataFrame.
         """
         var_config = self.variables_config[column]
-        LI, LS, _, min_value, max_value = self.calculate_outliers_limits(df, column)
-        
-        # Filtrar valores dentro de los límites y que no sean nulos
-        df_filtered = df[(df[column] >= LI) & (df[column] <= LS) & df[column].notnull()]
         method = var_config["breaks_method"]
+        sketch = self._resolve_sketch(df, column, sketch)
+        if sorted_values is None and (sketch is None or method == "jenks"):
+            sorted_values = self.sorted_values(df, column)
+        LI, LS, _, min_value, max_value = self.calculate_outliers_limits(df, column, sketch, sorted_values)
+        self.outlier_limits[column] = {"LI": float(LI), "LS": float(LS), "min": float(min_value), "max": float(max_value)}
+        if sorted_values is not None:
+            # Valores dentro de los límites: un tramo contiguo del arreglo ordenado
+            filtered = sorted_values[np.searchsorted(sorted_values, LI, side="left"):np.searchsorted(sorted_values, LS, side="right")]
 
         if method == "percentiles":
             # Generación de puntos de corte por percentiles, ajustable por configuración
             percentiles = np.linspace(0, 100, self.global_config["num_categories"] + 1)[1:-1]
-            breaks = np.percentile(df_filtered[column], percentiles)
+            if sketch is not None:
+                # Percentiles de los valores dentro de [LI, LS] a partir del resumen, sin materializar el filtro
+                breaks = sketch.quantiles_between(LI, LS, percentiles / 100)
+            else:
+                breaks = self.percentiles_from_sorted(filtered, percentiles)
             # Añadir los puntos de corte al inicio y fin
             breaks = np.concatenate(([min_value - 0.001], breaks, [max_value + 0.001]))
             # Calcular los rangos de cada break
@@ -155,7 +279,7 @@ class RFMProcessing:
 
         elif method == "jenks":
             # Usar el método Jenks para obtener los puntos de corte
-            breaks = jenkspy.jenks_breaks(df_filtered[column].values, n_classes=self.global_config["num_categories"])[1:-1]
+            breaks = self.calculate_jenks_breaks(filtered, column)
             breaks = np.concatenate(([min_value - 0.001], breaks, [max_value + 0.001]))
             # Calcular los rangos de cada break
             break_ranges = [(breaks[i], breaks[i+1]) for i in range(len(breaks)-1)]
@@ -171,6 +295,198 @@ class RFMProcessing:
             raise ValueError(f"Método de cálculo de breaks no soportado: {method}")
 
     
+    def calculate_jenks_breaks(self, values: np.ndarray, column: str) -> list:
+        """
+        Calcula los puntos de corte internos de Jenks para una variable, de forma exacta o aproximada.
+
+        El método Fisher-Jenks exacto escala aproximadamente con n² × k, por lo que para millones de clientes
+        se puede configurar por variable (`jenks_approximation`) una aproximación:
+            - **exact** (por defecto): `jenkspy.jenks_breaks` sobre todos los valores.
+            - **sample**: Jenks exacto sobre una muestra estratificada por rango de tamaño `jenks_sample_size`
+              (siempre incluye el mínimo y el máximo).
+            - **histogram**: Jenks ponderado sobre los valores únicos y sus frecuencias. Si hay más de
+              `jenks_histogram_bins` valores únicos, se agrupan previamente por cuantiles.
+            - **kmeans**: Optimizador k-means 1D (Lloyd) inicializado con cuantiles, hasta `jenks_kmeans_max_iter` iteraciones.
+
+        Junto al resultado se calcula el GVF (goodness of variance fit) de los breaks obtenidos sobre todos los valores.
+        Si `jenks_compare_exact` es `True`, también se calcula el Jenks exacto para comparar ambos GVF.
+        El reporte queda en `self.breaks_report[column]`.
+
+        Parámetros:
+            - values (np.ndarray): Valores filtrados (sin outliers ni nulos) de la variable.
+            - column (str): Nombre de la variable en la configuración.
+
+        Retorna:
+            - list: Puntos de corte internos (sin mínimo ni máximo), `num_categories - 1` valores.
+
+        Excepciones:
+            - ValueError: Si la aproximación configurada no es soportada o si hay menos valores únicos que clases
+              (en todas las aproximaciones, como en el Jenks exacto).
+        """
+        var_config = self.variables_config[column]
+        n_classes = self.global_config["num_categories"]
+        approximation = var_config.get("jenks_approximation", "exact")
+        values = np.sort(np.asarray(values, dtype=float))
+
+        start = time.perf_counter()
+        if approximation == "exact":
+            breaks = jenkspy.jenks_breaks(values, n_classes=n_classes)[1:-1]
+        elif approximation == "sample":
+            sample = self._stratified_sample(values, var_config.get("jenks_sample_size", 10000))
+            breaks = jenkspy.jenks_breaks(sample, n_classes=n_classes)[1:-1]
+        elif approximation == "histogram":
+            breaks = self._weighted_jenks_breaks(values, n_classes, var_config.get("jenks_histogram_bins", 1000))
+        elif approximation == "kmeans":
+            breaks = self._kmeans_breaks(values, n_classes, var_config.get("jenks_kmeans_max_iter", 100))
+        else:
+            raise ValueError(f"Aproximación de Jenks no soportada: {approximation}")
+        elapsed = time.perf_counter() - start
+
+        report = {
+            "approximation": approximation,
+            "gvf": self.goodness_of_variance_fit(values, breaks),
+            "seconds": elapsed,
+        }
+        message = f"Jenks '{approximation}' para '{column}': GVF={report['gvf']:.4f} ({elapsed:.2f}s)"
+        if approximation != "exact" and var_config.get("jenks_compare_exact", False):
+            start = time.perf_counter()
+            exact_breaks = jenkspy.jenks_breaks(values, n_classes=n_classes)[1:-1]
+            report["exact_seconds"] = time.perf_counter() - start
+            report["gvf_exact"] = self.goodness_of_variance_fit(values, exact_breaks)
+            message += f" | exacto: GVF={report['gvf_exact']:.4f} ({report['exact_seconds']:.2f}s)"
+        self.breaks_report[column] = report
+        _report(message)
+
+        return list(breaks)
+
+    @staticmethod
+    def goodness_of_variance_fit(values: np.ndarray, breaks: list) -> float:
+        """
+        Calcula el GVF (goodness of variance fit) de unos puntos de corte Jenks.
+
+        GVF = 1 - SDCM / SDAM, donde SDAM es la suma de desviaciones cuadradas respecto a la media global y SDCM
+        la suma de desviaciones cuadradas respecto a la media de cada clase. Siguiendo la convención de Jenks,
+        cada break es el límite superior (incluido) de su clase.
+
+        Parámetros:
+            - values (np.ndarray): Valores ordenados de forma ascendente.
+            - breaks (list): Puntos de corte internos.
+
+        Retorna:
+            - float: GVF entre 0 y 1 (1 indica un ajuste perfecto).
+        """
+        values = np.asarray(values, dtype=float)
+        sdam = ((values - values.mean()) ** 2).sum()
+        if sdam == 0:
+            return 1.0
+        bounds = np.concatenate(([0], np.searchsorted(values, breaks, side="right"), [len(values)]))
+        sdcm = sum(
+            ((values[lo:hi] - values[lo:hi].mean()) ** 2).sum()
+            for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo
+        )
+        return float(1 - sdcm / sdam)
+
+    @staticmethod
+    def _stratified_sample(values: np.ndarray, sample_size: int) -> np.ndarray:
+        """ Toma una muestra estratificada por rango (estadísticos de orden equiespaciados) de valores ordenados. """
+        if len(values) <= sample_size:
+            return values
+        positions = np.linspace(0, len(values) - 1, sample_size).round().astype(int)
+        return values[positions]
+
+    @staticmethod
+    def _weighted_jenks_breaks(values: np.ndarray, n_classes: int, max_bins: int) -> list:
+        """
+        Fisher-Jenks ponderado sobre el histograma de valores únicos (valor, frecuencia) de valores ordenados.
+
+        Usa sumas acumuladas de w, w·x y w·x² para evaluar la varianza de cada clase en O(1), por lo que el costo
+        es O(u² × k) sobre los u valores únicos (o grupos) en lugar de los n valores originales.
+        """
+        uniques, counts = np.unique(values, return_counts=True)
+        if len(uniques) > max_bins:
+            # Agrupar por cuantiles; cada grupo se representa por su media y su límite superior
+            edges = np.unique(np.searchsorted(values, np.quantile(values, np.linspace(0, 1, max_bins + 1)[1:-1]), side="right"))
+            bounds = np.concatenate(([0], edges[(edges > 0) & (edges < len(values))], [len(values)]))
+            counts = np.diff(bounds)
+            sums = np.add.reduceat(values, bounds[:-1])
+            points = sums / counts
+            uppers = values[bounds[1:] - 1]
+        else:
+            points = uppers = uniques
+        if len(uniques) < n_classes:
+            raise ValueError(JENKS_CLASSES_ERROR)
+        if len(points) < n_classes:
+            raise ValueError(f"Los valores se agrupan en {len(points)} grupos, menos que las {n_classes} clases: aumenta jenks_histogram_bins.")
+        if len(points) == n_classes:
+            return list(uppers[:-1])
+
+        w = counts.astype(float)
+        cw = np.concatenate(([0.0], np.cumsum(w)))
+        cx = np.concatenate(([0.0], np.cumsum(w * points)))
+        cxx = np.concatenate(([0.0], np.cumsum(w * points * points)))
+
+        def ssd(i, j):
+            # Suma de desviaciones cuadradas de los puntos [i, j)
+            weight = cw[j] - cw[i]
+            total = cx[j] - cx[i]
+            return (cxx[j] - cxx[i]) - total * total / weight
+
+        m = len(points)
+        ends = np.arange(1, m + 1)
+        cost = ssd(np.zeros(m, dtype=int), ends)  # Una sola clase para los puntos [0, j)
+        splits = np.zeros((n_classes, m + 1), dtype=int)
+        for k in range(1, n_classes):
+            new_cost = np.full(m, np.inf)
+            for j in range(k + 1, m + 1):
+                starts = np.arange(k, j)
+                candidates = cost[starts - 1] + ssd(starts, np.full(len(starts), j))
+                best = np.argmin(candidates)
+                new_cost[j - 1] = candidates[best]
+                splits[k, j] = starts[best]
+            cost = new_cost
+
+        breaks = []
+        j = m
+        for k in range(n_classes - 1, 0, -1):
+            j = splits[k, j]
+            breaks.append(uppers[j - 1])
+        return breaks[::-1]
+
+    @staticmethod
+    def _kmeans_breaks(values: np.ndarray, n_classes: int, max_iter: int) -> list:
+        """
+        Optimizador k-means 1D (Lloyd) sobre valores ordenados.
+
+        Cada iteración cuesta O(k log n): las clases son intervalos delimitados por los puntos medios entre
+        centros, que se ubican con búsqueda binaria, y las medias se obtienen con sumas acumuladas.
+        """
+        uniques = np.unique(values)
+        if len(uniques) < n_classes:
+            raise ValueError(JENKS_CLASSES_ERROR)
+        n = len(values)
+        prefix = np.concatenate(([0.0], np.cumsum(values)))
+        centers = np.quantile(values, (np.arange(n_classes) + 0.5) / n_classes)
+        if np.any(np.diff(centers) <= 0):
+            # Con muchos empates los cuantiles se repiten: se inicia con valores únicos distintos
+            centers = uniques[np.linspace(0, len(uniques) - 1, n_classes).round().astype(int)]
+        bounds = None
+        for _ in range(max_iter):
+            midpoints = (centers[:-1] + centers[1:]) / 2
+            new_bounds = np.concatenate(([0], np.searchsorted(values, midpoints, side="right"), [n]))
+            if bounds is not None and np.array_equal(new_bounds, bounds):
+                break
+            bounds = new_bounds
+            counts = np.diff(bounds)
+            sums = prefix[bounds[1:]] - prefix[bounds[:-1]]
+            centers = np.where(counts > 0, sums / np.maximum(counts, 1), centers)
+        # El break de cada clase es su valor máximo (convención Jenks). Una clase vacía repetiría el break anterior
+        inner = np.unique(bounds[1:-1])
+        inner = inner[(inner > 0) & (inner < n)]
+        if len(inner) < n_classes - 1:
+            raise ValueError(f"k-means dejó {n_classes - 1 - len(inner)} clases vacías: usa jenks_approximation 'histogram' o 'exact'.")
+        return list(values[inner - 1])
+
+
     def calculate_score(self, df: pd.DataFrame, column: str, breaks: np.ndarray, break_ranges: list, inverse: bool = False) -> pd.Series:
         """
         Calcula el puntaje (score) de los valores en una columna del DataFrame en función de puntos de corte (breaks) 
@@ -189,9 +505,10 @@ class RFMProcessing:
                             Por defecto, es `False`.
 
         Retorna:
-            pd.Series, list: 
-                - Serie con los puntajes asignados a cada valor en la columna.
-                - Lista con los rangos correspondientes a cada valor.
+            np.ndarray, np.ndarray | pd.Categorical | pd.DataFrame: 
+                - Puntajes asignados a cada valor en la columna.
+                - Rangos correspondientes a cada valor, en el formato definido por `range_format`
+                  (ver `assign_ranges`).
 
         """
         score_min = self.global_config["score_range"]["min"]
@@ -200,13 +517,13 @@ class RFMProcessing:
         num_categories = self.global_config["num_categories"]
 
         # Asignar categorías usando np.digitize
-        scores = np.digitize(df[column], breaks, right=False)  # Usar right=False para asignar el valor al intervalo inferior
+        bins = np.digitize(df[column], breaks, right=False)  # Usar right=False para asignar el valor al intervalo inferior
 
         # Limitar los puntajes dentro del rango válido
-        scores = np.clip(scores, score_min, num_categories)
+        scores = np.clip(bins, score_min, num_categories)
 
-        # Obtener los rangos correspondientes a cada valor de break
-        value_ranges = [self.get_range_for_value(value, break_ranges) for value in df[column]]
+        # Obtener los rangos correspondientes a cada valor reutilizando los índices de np.digitize
+        value_ranges = self.assign_ranges(df[column], breaks, break_ranges, bins=bins)
 
         if inverse:
             scores = score_max - ((scores - score_min) * score_step)  # Puntaje inverso
@@ -216,6 +533,74 @@ class RFMProcessing:
         return scores, value_ranges  # Devuelve el puntaje y los rangos de cada valor
 
     
+    def assign_ranges(self, values, breaks: np.ndarray, break_ranges: list, bins: np.ndarray = None):
+        """
+        Asigna de forma vectorizada el rango de break en el que cae cada valor.
+
+        Equivale a aplicar `get_range_for_value` a cada valor, pero sin recorrer `break_ranges` por fila:
+        reutiliza los índices de `np.digitize` calculados para el puntaje y valida el resultado contra los
+        límites de cada rango. Se conservan los mismos casos borde: un valor igual al límite superior del
+        último rango pertenece a ese rango, y un valor que no cae en ningún rango (huecos de 0.001 entre
+        rangos, valores fuera de los límites o nulos) queda sin rango.
+
+        Se asume que los rangos están ordenados y no se solapan, como los genera `calculate_breaks`.
+
+        Parámetros:
+            values (array-like): Valores a clasificar.
+            breaks (np.ndarray): Puntos de corte usados para calcular `bins`.
+            break_ranges (list): Lista de tuplas `(lower, upper)` con los rangos de cada break.
+            bins (np.ndarray, opcional): Resultado de `np.digitize(values, breaks)`. Si no se entrega, se calcula.
+
+        Retorna:
+            Según `global_settings.range_format`:
+                - 'tuple' (por defecto): `np.ndarray` de objetos con tuplas `(lower, upper)` o `None`, igual que el
+                  cálculo original.
+                - 'categorical': `pd.Categorical` con una etiqueta "(lower, upper)" por rango.
+                - 'bounds': `pd.DataFrame` con las columnas numéricas `lower` y `upper` (NaN si no hay rango).
+        """
+        values = np.asarray(values, dtype=float)
+        lowers = np.array([lower for lower, _ in break_ranges], dtype=float)
+        uppers = np.array([upper for _, upper in break_ranges], dtype=float)
+
+        # Índice del último rango cuyo límite inferior es <= valor
+        if bins is not None and len(breaks) == len(break_ranges) + 1 and np.array_equal(lowers, np.asarray(breaks, dtype=float)[:-1]):
+            idx = np.asarray(bins) - 1
+        else:
+            idx = np.searchsorted(lowers, values, side="right") - 1
+        idx = np.clip(idx, 0, len(break_ranges) - 1)
+
+        # Validar que el valor esté efectivamente dentro del rango candidato
+        valid = (lowers[idx] <= values) & (values < uppers[idx])
+
+        # Si el valor está exactamente en el límite superior del último intervalo
+        on_last_upper = values == uppers[-1]
+        idx = np.where(on_last_upper, len(break_ranges) - 1, idx)
+        valid |= on_last_upper
+
+        codes = np.where(valid, idx, -1)
+        range_format = self.global_config.get("range_format", "tuple")
+
+        if range_format == "tuple":
+            # Tabla de tuplas con None al final (código -1); np.take la expande sin recorrer las filas en Python
+            lookup = np.empty(len(break_ranges) + 1, dtype=object)
+            for position, (lower, upper) in enumerate(break_ranges):
+                lookup[position] = (lower, upper)
+            return np.take(lookup, np.where(valid, idx, len(break_ranges)))
+        elif range_format == "categorical":
+            labels = [str((float(lower), float(upper))) for lower, upper in break_ranges]
+            # Las etiquetas pueden repetirse si hay breaks duplicados; se agrupan en una sola categoría
+            categories = list(dict.fromkeys(labels))
+            label_codes = np.array([categories.index(label) for label in labels] + [-1])
+            return pd.Categorical.from_codes(label_codes[codes], categories=categories)
+        elif range_format == "bounds":
+            return pd.DataFrame({
+                "lower": np.where(valid, lowers[idx], np.nan),
+                "upper": np.where(valid, uppers[idx], np.nan),
+            })
+        else:
+            raise ValueError(f"Formato de rangos no soportado: {range_format}")
+
+
     def get_range_for_value(self, value: float, break_ranges: list) -> tuple:
         """
             Devuelve el rango de break (intervalo) en el que cae un valor específico.
@@ -247,7 +632,7 @@ class RFMProcessing:
         return None  # En caso de no encontrar un rango.
 
 
-    def process_rfm_data(rfm_processor, rfm_data):
+    def process_rfm_data(rfm_processor, rfm_data, fitted_breaks: dict = None, metrics=None, sketches: dict = None):
         """
         Procesa los datos de RFM (Recency, Frequency, Monetary) calculando puntajes y rangos
         para cada una de las variables (Recency, Frequency, Monetary) según la configuración definida
@@ -262,34 +647,77 @@ class RFMProcessing:
                                 y los métodos necesarios para calcular los puntajes y rangos.
         rfm_data (DataFrame): DataFrame de pandas que contiene los datos de RFM (Recency, Frequency, Monetary) 
                             que deben ser procesados.
+        fitted_breaks (dict, opcional): Puntos de corte ya ajustados por variable, `{columna: (breaks, break_ranges)}`.
+                            Las variables incluidas no se recalculan. Los breaks usados en cada ejecución quedan en
+                            `rfm_processor.fitted_breaks`.
+        metrics (PipelineMetrics, opcional): Si se indica, se mide cada variable como una etapa
+                            `RFMProcessing.<variable>`.
+        sketches (dict, opcional): Resúmenes de cuantiles ya construidos por variable, `{columna: KLLSketch}` (por
+                            ejemplo, combinados desde las particiones de `RFMCalculator.calculate_rfm_parallel`).
+
+        Con `global_settings.variable_workers` > 1 las variables se procesan en paralelo en un pool de hilos; cada una
+        ordena su columna una sola vez (`sorted_values`) para límites, filtro y breaks.
 
         Retorna:
         DataFrame: DataFrame con los datos originales de RFM más las columnas adicionales de puntajes 
                 (score) y rangos (range) para cada variable (Recency, Frequency, Monetary).
         """
-        scores_dict = {}
-        for column, var_config in rfm_processor.variables_config.items():
-            try:
-                # Configuración de inverso por defecto según el tipo de variable
-                inverse = True if column.lower() == "recency" else False
-
-                # Obtener los puntos de corte y los rangos usando el método calculate_breaks
-                breaks, break_ranges = rfm_processor.calculate_breaks(rfm_data, column)
+        fitted_breaks = fitted_breaks or {}
+        sketches = sketches or {}
 
-                # Calcular el puntaje y los rangos para la columna
-                scores, value_ranges = rfm_processor.calculate_score(rfm_data, column, breaks, break_ranges, inverse=inverse)
-
-                # Agregar los resultados al diccionario
-                scores_dict[column + "_score"] = scores
-                scores_dict[column + "_range"] = value_ranges
+        def process_variable(column):
+            """ Calcula breaks, puntajes y rangos de una variable. Retorna (breaks ajustados, columnas) o None si falla. """
+            try:
+                with (metrics.stage(f"RFMProcessing.{column}", rows_in=len(rfm_data)) if metrics is not None else nullcontext({})) as record:
+                    # Configuración de inverso por defecto según el tipo de variable
+                    inverse = True if column.lower() == "recency" else False
+
+                    # Obtener los puntos de corte y los rangos usando el método calculate_breaks
+                    if column in fitted_breaks:
+                        breaks, break_ranges = fitted_breaks[column]
+                    else:
+                        breaks, break_ranges = rfm_processor.calculate_breaks(rfm_data, column, sketches.get(column))
+
+                    # Calcular el puntaje y los rangos para la columna
+                    scores, value_ranges = rfm_processor.calculate_score(rfm_data, column, breaks, break_ranges, inverse=inverse)
+                    record["rows_out"] = len(scores)
+
+                    # Agregar los resultados al diccionario
+                    columns = {column + "_score": scores}
+                    if isinstance(value_ranges, pd.DataFrame):
+                        columns[column + "_range_lower"] = value_ranges["lower"].values
+                        columns[column + "_range_upper"] = value_ranges["upper"].values
+                    else:
+                        columns[column + "_range"] = value_ranges
+                    return (breaks, break_ranges), columns
 
             except KeyError:
-                print(f"Configuración no encontrada para la variable: {column}")
+                _report(f"Configuración no encontrada para la variable: {column}")
             except Exception as e:
-                print(f"Error procesando la variable '{column}': {e}")
+                _report(f"Error procesando la variable '{column}': {e}")
+            return None
+
+        # Las variables son independientes: con variable_workers > 1 se procesan en hilos
+        columns = list(rfm_processor.variables_config)
+        if rfm_processor.variable_workers > 1 and len(columns) > 1:
+            with ThreadPoolExecutor(max_workers=min(rfm_processor.variable_workers, len(columns))) as executor:
+                results = list(executor.map(process_variable, columns))
+        else:
+            results = [process_variable(column) for column in columns]
+
+        # Consolidar en el orden de la configuración
+        scores_dict = {}
+        rfm_processor.fitted_breaks = {}
+        for column, result in zip(columns, results):
+            if result is not None:
+                rfm_processor.fitted_breaks[column], variable_columns = result
+                scores_dict.update(variable_columns)
 
         # Convertir el diccionario de resultados en un DataFrame
         scores_df = pd.DataFrame(scores_dict)
+        if is_arrow_backend(rfm_processor.config):
+            # Puntajes y límites numéricos como columnas Arrow (los rangos como tuplas se conservan)
+            scores_df = to_arrow_backed(scores_df)
         # Concatenar el DataFrame original con los puntajes y rangos calculados
         df_resultado = pd.concat([rfm_data, scores_df], axis=1)
         return df_resultado
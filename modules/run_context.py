@@ -0,0 +1,139 @@
+"""
+Proyecto: Demo RFM
+Módulo: run_context.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor:
+Modificado por:
+Fecha modificación:
+Descripción:
+    Este módulo contiene la clase `RunContext`, el contexto de ejecución compartido por todas las clases del pipeline
+    (DataLoader, DataPreprocessor, RFMCalculator, RFMProcessing, RFMProcessor, DataExporter).
+
+    El contexto se construye una sola vez por archivo de configuración: lee y valida el YAML, resuelve el rango de
+    fechas del análisis RFM y el mapeo de columnas. Se guarda en caché por ruta y fecha de modificación del archivo,
+    de modo que todas las etapas comparten la misma configuración y la misma `end_date` sin volver a leer el YAML.
+
+    Funciones principales:
+    - get_run_context: Devuelve el contexto (en caché) para un archivo de configuración.
+    - clear_run_context_cache: Limpia la caché de contextos.
+"""
+
+### Importar Librerías
+import copy
+import dataclasses
+import os
+from dataclasses import dataclass
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class RunContext:
+    """
+    Contexto de ejecución inmutable del pipeline RFM.
+
+    Atributos:
+        - config_path (str): Ruta absoluta del archivo YAML.
+        - config (dict): Configuración cargada desde el YAML. Es compartida por todas las etapas y no debe modificarse.
+        - start_date (pd.Timestamp): Fecha de inicio para el análisis RFM.
+        - end_date (pd.Timestamp): Fecha de fin para el análisis RFM.
+        - columns (dict): Mapeo de columnas (customer_id, date, invoice, price, quantity) con sus valores por defecto.
+
+    El contexto y sus diccionarios se comparten entre etapas (y se envían a los procesos del modo paralelo), por lo que
+    se tratan como de sólo lectura: `frozen` sólo impide reasignar los atributos, no modificar `config` en el lugar.
+    Quien necesite cambiar la configuración (benchmarks, pruebas, variantes de una ejecución) debe trabajar sobre
+    `isolated()`, nunca sobre el contexto devuelto por `get_run_context`.
+    """
+    config_path: str
+    config: dict
+    start_date: pd.Timestamp
+    end_date: pd.Timestamp
+    columns: dict
+
+    def isolated(self) -> "RunContext":
+        """ Copia del contexto con una copia profunda de `config` y `columns`, que se puede modificar sin afectar a la caché. """
+        return dataclasses.replace(self, config=copy.deepcopy(self.config), columns=dict(self.columns))
+
+
+# Caché de contextos por (ruta absoluta, fecha de modificación)
+_CONTEXT_CACHE = {}
+
+
+def validate_config(config: dict, config_path: str) -> None:
+    """
+    Valida las secciones mínimas del YAML que usan todas las etapas del pipeline.
+
+    Excepciones:
+        - ValueError: Si falta alguna sección requerida.
+    """
+    if not isinstance(config, dict):
+        raise ValueError(f"El archivo de configuración '{config_path}' está vacío o no es un diccionario.")
+    global_settings = config.get("global_settings")
+    if not isinstance(global_settings, dict):
+        raise ValueError(f"Falta la sección 'global_settings' en el archivo de configuración '{config_path}'.")
+    date_range = global_settings.get("date_range")
+    if not isinstance(date_range, dict) or "interval" not in date_range or "number" not in date_range:
+        raise ValueError(f"Falta 'global_settings.date_range' (interval, number) en el archivo de configuración '{config_path}'.")
+
+
+def resolve_columns(config: dict) -> dict:
+    """ Resuelve el mapeo de columnas de `global_settings.columns` con sus valores por defecto. """
+    columns_config = config.get("global_settings", {}).get("columns", {}) or {}
+    return {
+        "customer_id": columns_config.get("customer_id", "CustomerID"),
+        "date": columns_config.get("date", "InvoiceDate"),
+        "invoice": columns_config.get("invoice", "InvoiceNo"),
+        "price": columns_config.get("price", "UnitPrice"),
+        "quantity": columns_config.get("quantity", "Quantity"),
+    }
+
+
+def get_run_context(config_path: str) -> RunContext:
+    """
+    Devuelve el contexto de ejecución para un archivo de configuración, construyéndolo sólo la primera vez.
+
+    El contexto se reutiliza mientras no cambie la fecha de modificación del archivo.
+
+    Parámetros:
+        - config_path (str): Ruta al archivo YAML.
+
+    Retorna:
+        - RunContext: Contexto con la configuración validada, el rango de fechas y el mapeo de columnas.
+
+    Excepciones:
+        - FileNotFoundError: Si el archivo YAML no existe.
+        - ValueError: Si no se indica la ruta, o si el YAML no se puede leer o no es válido.
+    """
+    from modules.data_loader import DataLoader
+
+    if config_path is None:
+        raise ValueError("Se debe indicar la ruta del archivo de configuración (config_path) o un contexto de ejecución (context).")
+    abs_path = os.path.abspath(config_path)
+    try:
+        mtime = os.stat(abs_path).st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No se encontró el archivo de configuración: {config_path}")
+
+    key = (abs_path, mtime)
+    context = _CONTEXT_CACHE.get(key)
+    if context is None:
+        config = DataLoader.load_config(abs_path)
+        validate_config(config, config_path)
+        start_date, end_date = DataLoader.resolve_date_range(config)
+        context = RunContext(
+            config_path=abs_path,
+            config=config,
+            start_date=start_date,
+            end_date=end_date,
+            columns=resolve_columns(config),
+        )
+        # Conservar sólo la versión más reciente de cada archivo
+        for cached_key in [k for k in _CONTEXT_CACHE if k[0] == abs_path]:
+            del _CONTEXT_CACHE[cached_key]
+        _CONTEXT_CACHE[key] = context
+    return context
+
+
+def clear_run_context_cache() -> None:
+    """ Limpia la caché de contextos (por ejemplo, para forzar la relectura del YAML). """
+    _CONTEXT_CACHE.clear()
@@ -16,34 +16,131 @@ Descripción:
 """
 
 ### Importar Librerías
+import numpy as np
 import pandas as pd
 import yaml
-from modules.data_loader import DataLoader
+from modules.data_loader import DataLoader, is_arrow_backend, to_arrow_backed
+from modules.run_context import RunContext, get_run_context
 
 
 class RFMProcessor:
     
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str = None, context: RunContext = None):
         """
         Inicializa la clase con la configuración del archivo YAML para el cálculo RFM.
         
         Parámetros:
             - config_path: str
                 Ruta del archivo YAML que contiene las configuraciones para el cálculo de RFM.
+            - context: RunContext, opcional
+                Contexto de ejecución compartido. Si no se indica, se obtiene (en caché) a partir de `config_path`.
         """
         try:
-            self.config = DataLoader.load_config(config_path)
+            self.context = context if context is not None else get_run_context(config_path)
+            self.config = self.context.config
             self.score_method = self.config.get("score_method", "combinación")
             self.business_categories = self.config.get("business_categories", {})
 
             # Rango de fechas para el análisis
-            self.data_loader = DataLoader(config_path=config_path)
+            self.data_loader = DataLoader(context=self.context)
             self.start_date, self.end_date = self.data_loader.get_date_range_for_rfm()
         except (FileNotFoundError, ValueError) as e:
             print(f"Error al cargar el archivo de configuración: {e}")
             self.score_method = "combinación"
             self.business_categories = {}
 
+        # Codificación del score final para el método 'combinacion': 'string' (texto concatenado) o 'integer'
+        config = getattr(self, "config", None) or {}
+        self.score_encoding = config.get("score_encoding", "string")
+        self.score_base = self.get_score_base(config.get("global_settings", {}))
+        # Modo Arrow (global_settings.dtype_backend: 'pyarrow'): el resultado conserva columnas ArrowDtype
+        self.arrow_backend = is_arrow_backend(config)
+
+        # Tabla score -> categoría compilada una sola vez a partir de las listas del YAML
+        self.category_lookup = self.compile_category_lookup(self.business_categories)
+        self.category_names, self.category_codes = self.compile_category_array(self.category_lookup, self.score_base)
+
+    @staticmethod
+    def get_score_base(global_settings: dict) -> int:
+        """
+        Calcula la base de la codificación entera del score 'combinacion' (R*base² + F*base + M).
+
+        La base es la menor potencia de 10 que contiene el mayor puntaje posible, de modo que con puntajes de un dígito
+        (hasta 9 categorías) el entero tiene la misma representación decimal que el texto concatenado ('455' -> 455).
+        """
+        score_range = global_settings.get("score_range", {})
+        score_min = score_range.get("min", 1)
+        score_max = score_range.get("max", 5)
+        score_step = score_range.get("step", 1)
+        num_categories = global_settings.get("num_categories", 5)
+        max_score = max(score_max, score_min + (num_categories - score_min) * score_step)
+        return 10 ** len(str(int(max_score)))
+
+    @staticmethod
+    def compile_category_array(category_lookup: dict, score_base: int) -> tuple:
+        """
+        Compila la tabla score -> categoría en un arreglo denso indexado por el score entero (R*base² + F*base + M).
+
+        Los scores del YAML se interpretan como el entero que representan ('455' -> 455), por lo que con más de 9
+        categorías deben escribirse con la codificación entera.
+
+        Retorna:
+            - tuple
+                (nombres de categoría, arreglo de códigos de tamaño base³). El último nombre es "Sin Categoría".
+        """
+        names = list(dict.fromkeys(category_lookup.values())) + ["Sin Categoría"]
+        codes = np.full(score_base ** 3, len(names) - 1, dtype=np.int8)
+        for score, category in category_lookup.items():
+            if score.isdigit() and int(score) < len(codes):
+                codes[int(score)] = names.index(category)
+        return names, codes
+
+    @staticmethod
+    def render_legacy_score(final_score: pd.Series, score_base: int) -> pd.Series:
+        """
+        Convierte el score entero (R*base² + F*base + M) al texto concatenado original (por ejemplo 455 -> '455').
+
+        Parámetros:
+            - final_score: pd.Series
+                Serie con el score final codificado como entero.
+            - score_base: int
+                Base de la codificación (ver `get_score_base`).
+
+        Retorna:
+            - pd.Series
+                Serie de texto con el score en el formato original.
+        """
+        values = final_score.astype(np.int64)
+        recency = values // (score_base * score_base)
+        frequency = (values // score_base) % score_base
+        monetary = values % score_base
+        return recency.astype(str) + frequency.astype(str) + monetary.astype(str)
+
+    @staticmethod
+    def compile_category_lookup(business_categories: dict) -> dict:
+        """
+        Compila las categorías de negocio del YAML en un diccionario score -> categoría.
+
+        Si un score aparece en varias categorías se conserva la primera, igual que la búsqueda secuencial original.
+        Las categorías cuyo valor no es una lista de scores (por ejemplo `Nuevo: "ÚltimoMes"`) corresponden a reglas
+        especiales y no se incluyen en la tabla.
+
+        Parámetros:
+            - business_categories: dict
+                Diccionario categoría -> lista de scores (como texto).
+
+        Retorna:
+            - dict
+                Diccionario score (texto) -> categoría.
+        """
+        lookup = {}
+        for category, values in business_categories.items():
+            if isinstance(values, str):
+                continue
+            for score in values:
+                lookup.setdefault(str(score), category)
+        return lookup
+
     
     def calculate_final_score(self, df: pd.DataFrame) -> pd.Series:
         """
@@ -58,6 +155,15 @@ class RFMProcessor:
                 Serie con el score final calculado para cada cliente.
         """
         if self.score_method == 'combinacion':
+            if self.score_encoding == 'integer':
+                # Codificación entera compacta: evita crear un objeto de texto por cliente
+                dtype = np.int16 if self.score_base ** 3 <= np.iinfo(np.int16).max else np.int32
+                final_score = (
+                    df['Recency_score'].astype(np.int64) * self.score_base * self.score_base
+                    + df['Frequency_score'].astype(np.int64) * self.score_base
+                    + df['Monetary_score'].astype(np.int64)
+                )
+                return final_score.astype(dtype)
             return df['Recency_score'].astype(str) + df['Frequency_score'].astype(str) + df['Monetary_score'].astype(str)
         elif self.score_method == 'suma':
             return df[['Recency_score', 'Frequency_score', 'Monetary_score']].sum(axis=1)
@@ -85,24 +191,30 @@ class RFMProcessor:
         
         ## Activar en caso de querer calcular clientes nuevos
         # Identificar clientes nuevos
+        # Mismo año y mes que la fecha de corte (válido para fechas NumPy y Arrow; las fechas nulas no son nuevas)
+        last_purchase = df['LastPurchaseDate']
         df['IsNew'] = (
-            (df['MonthsWithPurchases'] == 1) & 
-            (df['LastPurchaseDate'].dt.to_period('M') == self.end_date.to_period('M'))
-        )
-        df.loc[df['IsNew'], 'Business_Category'] = 'Nuevo'
-        
-        def categorize(score):
-            for category, values in self.business_categories.items():
-                if str(score) in values:
-                    return category
-            return "Sin Categoría"
+            (df['MonthsWithPurchases'] == 1) &
+            (last_purchase.dt.year == self.end_date.year) &
+            (last_purchase.dt.month == self.end_date.month)
+        ).to_numpy(dtype=bool, na_value=False)
+
+        # Buscar la categoría de cada score en la tabla compilada (una sola operación vectorizada)
+        if self.score_method == 'combinacion' and self.score_encoding == 'integer':
+            # Score entero: indexar directamente el arreglo denso de categorías
+            scores = df[score_column].to_numpy(dtype=np.int64)
+            in_range = (scores >= 0) & (scores < len(self.category_codes))
+            codes = np.where(in_range, self.category_codes[np.clip(scores, 0, len(self.category_codes) - 1)], len(self.category_names) - 1)
+            categories = pd.Series(np.array(self.category_names, dtype=object)[codes], index=df.index)
+        else:
+            categories = df[score_column].astype(str).map(self.category_lookup).fillna("Sin Categoría")
 
         # Activar si no hay que calcular Nuevos y todo viene del YAML
-        #df['Business_Category'] = df[score_column].apply(categorize)
+        #df['Business_Category'] = categories
 
         ## Activar en caso de querer calcular clientes nuevos
         # Asignar categorías solo si no son "Nuevo"
-        df.loc[~df['IsNew'], 'Business_Category'] = df.loc[~df['IsNew'], score_column].apply(categorize)
+        df['Business_Category'] = categories.where(~df['IsNew'], 'Nuevo')
         # Eliminar columna auxiliar
         df.drop(columns=['IsNew'], inplace=True)
 
@@ -125,6 +237,9 @@ class RFMProcessor:
         print("Asignando categorías de negocio...")
         df = self.assign_business_categories(df)
         df['CutoffDate'] = self.end_date
+        if self.arrow_backend:
+            # Score final, categoría y fecha de corte como columnas Arrow
+            df = to_arrow_backed(df)
         print("Procesamiento RFM completado.")
         
         return df
@@ -0,0 +1,161 @@
+"""
+Proyecto: Demo RFM
+Módulo: segments.py
+Versión: 1.0
+Fecha de creación: 2026-10-16
+Autor:
+Modificado por:
+Fecha modificación:
+Descripción:
+    Este módulo contiene la clase `SegmentedRFM`, que calcula el RFM para varios segmentos (unidades de negocio, países,
+    etc.) en una sola ejecución, a partir de una única carga y preprocesamiento de las transacciones.
+
+    Los segmentos se definen en la sección `segments` del YAML:
+    - group_by: Columna de las transacciones; cada valor distinto es un segmento.
+    - definitions: Segmentos con nombre definidos por filtros `{columna: valor o lista de valores}`. Una transacción
+      puede pertenecer a varios segmentos.
+
+    Flujo:
+    - Los agregados por cliente se calculan con una sola pasada agrupada sobre (segmento, cliente).
+    - Los breaks y puntajes se ajustan por segmento, en paralelo con `segments.workers` hilos.
+    - El resultado consolidado incluye la columna de segmento.
+"""
+
+### Importar Librerías
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from modules.rfm_calculator import RFMCalculator
+from modules.rfm_processing import RFMProcessing
+from modules.run_context import RunContext, get_run_context
+from modules.segment_assigner import RFMProcessor
+
+
+class SegmentedRFM:
+
+    def __init__(self, config_path: str = None, context: RunContext = None):
+        """
+        Inicializa el cálculo por segmentos con la sección `segments` de la configuración.
+
+        Parámetros:
+            - config_path: str
+                Ruta del archivo YAML.
+            - context: RunContext, opcional
+                Contexto de ejecución compartido. Si no se indica, se obtiene (en caché) a partir de `config_path`.
+
+        Excepciones:
+            - ValueError: Si no se define `group_by` ni `definitions`.
+        """
+        self.context = context if context is not None else get_run_context(config_path)
+        self.config = self.context.config
+        segments_config = self.config.get("segments", {}) or {}
+        self.segment_column = segments_config.get("column", "Segment")
+        self.group_by = segments_config.get("group_by")
+        self.definitions = segments_config.get("definitions", {}) or {}
+        self.workers = segments_config.get("workers", 1)
+        if not self.group_by and not self.definitions:
+            raise ValueError("La sección 'segments' debe definir 'group_by' o 'definitions'.")
+
+    def assign_segments(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Agrega la columna de segmento a las transacciones.
+
+        Con `group_by` el segmento es el valor de la columna. Con `definitions` cada transacción se incluye una vez por
+        cada segmento cuyos filtros cumple; las transacciones que no cumplen ningún filtro se descartan.
+
+        Parámetros:
+            - data (pd.DataFrame): Transacciones preprocesadas.
+
+        Retorna:
+            - pd.DataFrame: Transacciones con la columna `self.segment_column`.
+
+        Excepciones:
+            - KeyError: Si alguna columna de `group_by` o de los filtros no existe.
+        """
+        if self.group_by:
+            if self.group_by not in data.columns:
+                raise KeyError(f"La columna de segmentación '{self.group_by}' no se encuentra en el DataFrame. Agréguela a select_columns de la fuente.")
+            return data.assign(**{self.segment_column: data[self.group_by]})
+
+        rows, labels = [], []
+        for name, definition in self.definitions.items():
+            mask = np.ones(len(data), dtype=bool)
+            for column, values in ((definition or {}).get("filters", {}) or {}).items():
+                if column not in data.columns:
+                    raise KeyError(f"La columna '{column}' del segmento '{name}' no se encuentra en el DataFrame. Agréguela a select_columns de la fuente.")
+                values = values if isinstance(values, list) else [values]
+                mask &= data[column].isin(values).to_numpy()
+            selected = np.flatnonzero(mask)
+            rows.append(selected)
+            labels.append(np.full(len(selected), name, dtype=object))
+
+        rows = np.concatenate(rows) if rows else np.array([], dtype=np.int64)
+        segmented = data.iloc[rows]
+        return segmented.assign(**{self.segment_column: np.concatenate(labels) if labels else []})
+
+    def calculate_rfm(self, data: pd.DataFrame, rfm_calculator: RFMCalculator = None) -> pd.DataFrame:
+        """
+        Calcula los agregados RFM de todos los segmentos con una sola pasada agrupada sobre (segmento, cliente).
+
+        Cada par (segmento, cliente) se codifica como una clave entera que reemplaza temporalmente al identificador
+        de cliente, de modo que se reutiliza `RFMCalculator.calculate_rfm` (groupby o vectorized) sin cambios.
+
+        Parámetros:
+            - data (pd.DataFrame): Transacciones preprocesadas.
+            - rfm_calculator (RFMCalculator, opcional): Calculadora a usar. Por defecto, una con el mismo contexto.
+
+        Retorna:
+            - pd.DataFrame: Agregados RFM con la columna de segmento y la columna de cliente.
+        """
+        rfm_calculator = rfm_calculator or RFMCalculator(context=self.context)
+        customer_col = self.context.columns["customer_id"]
+        segmented = self.assign_segments(data)
+
+        segment_codes, segment_values = pd.factorize(segmented[self.segment_column])
+        customer_codes, customer_values = pd.factorize(segmented[customer_col])
+        pair_codes = segment_codes.astype(np.int64) * len(customer_values) + customer_codes
+        # Las transacciones con segmento o cliente nulo no forman parte de ningún par
+        valid = (segment_codes >= 0) & (customer_codes >= 0)
+        keyed = segmented.drop(columns=[self.segment_column]).assign(**{customer_col: pair_codes})[valid]
+
+        rfm_data = rfm_calculator.calculate_rfm(keyed)
+        codes = rfm_data[customer_col].to_numpy()
+        rfm_data[customer_col] = customer_values[codes % len(customer_values)]
+        rfm_data.insert(0, self.segment_column, segment_values[codes // len(customer_values)])
+        return rfm_data.sort_values([self.segment_column, customer_col], kind="stable").reset_index(drop=True)
+
+    def _score_segment(self, segment, rfm_segment: pd.DataFrame) -> pd.DataFrame:
+        """ Ajusta breaks, puntajes y categorías de un segmento con instancias propias (seguras entre hilos). """
+        try:
+            rfm_processing = RFMProcessing(context=self.context)
+            rfm_assigner = RFMProcessor(context=self.context)
+            rfm_segment = rfm_segment.drop(columns=[self.segment_column]).reset_index(drop=True)
+            scored = rfm_assigner.process_rfm(rfm_processing.process_rfm_data(rfm_segment))
+            scored.insert(0, self.segment_column, segment)
+            return scored
+        except Exception as e:
+            print(f"Error procesando el segmento '{segment}': {e}")
+            return None
+
+    def score(self, rfm_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Calcula breaks, puntajes y categorías de negocio por segmento y consolida el resultado.
+
+        Parámetros:
+            - rfm_data (pd.DataFrame): Resultado de `calculate_rfm` (con la columna de segmento).
+
+        Retorna:
+            - pd.DataFrame: Resultado consolidado de todos los segmentos con la columna de segmento. Los segmentos que
+              fallan (por ejemplo, con muy pocos clientes para los breaks) se reportan y se omiten.
+        """
+        groups = list(rfm_data.groupby(self.segment_column, sort=True))
+        if self.workers and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(lambda group: self._score_segment(*group), groups))
+        else:
+            results = [self._score_segment(segment, rfm_segment) for segment, rfm_segment in groups]
+
+        results = [result for result in results if result is not None]
+        if not results:
+            raise ValueError("No se pudo calcular el RFM para ningún segmento.")
+        return pd.concat(results, ignore_index=True)
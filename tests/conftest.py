@@ -0,0 +1,32 @@
+"""
+Fixtures compartidas de las pruebas del pipeline RFM.
+
+Las pruebas usan la configuración del repositorio (`config/configuracion.yaml`) a través de un contexto aislado
+(`RunContext.isolated`), de modo que pueden cambiar opciones sin afectar a la caché de contextos, y transacciones
+sintéticas reproducibles (`benchmarks.synthetic`) en lugar de los archivos privados referenciados en el YAML.
+"""
+
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import generate_transactions
+from modules.run_context import get_run_context
+
+CONFIG_PATH = os.path.join(ROOT, "config", "configuracion.yaml")
+
+
+@pytest.fixture
+def context():
+    """ Contexto con una copia profunda de la configuración del repositorio, que cada prueba puede modificar. """
+    return get_run_context(CONFIG_PATH).isolated()
+
+
+@pytest.fixture(scope="session")
+def transactions():
+    """ Transacciones sintéticas dentro del rango de fechas del análisis, con devoluciones y clientes nulos. """
+    return generate_transactions(20_000, 400, seed=7, return_rate=0.02, missing_customer_rate=0.01)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from modules.data_loader import DataLoader
+from modules.preprocessing import DataPreprocessor
+from modules.rfm_calculator import RFMCalculator
+from modules.rfm_processing import RFMProcessing
+from modules.segment_assigner import RFMProcessor
+
+SCORES = ["CustomerID", "Recency_score", "Frequency_score", "Monetary_score", "Final_Score", "Business_Category"]
+
+
+def run_pipeline(context, dtype_backend):
+    """ Carga del CSV, preprocesamiento, RFM, puntajes y categorías con el backend de tipos indicado. """
+    context = context.isolated()
+    context.config["global_settings"]["dtype_backend"] = dtype_backend
+    data = DataLoader(context=context).load_from_csv("sales_data")
+    data = DataPreprocessor(context=context).apply_preprocessing_to_source(data, "retail_data")
+    rfm_data = RFMCalculator(context=context).calculate_rfm(data)
+    scored = RFMProcessing(context=context).process_rfm_data(rfm_data)
+    return RFMProcessor(context=context).process_rfm(scored)
+
+
+def as_values(data):
+    return data.astype(object).where(data.notna(), None).sort_values("CustomerID").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("range_format", ["tuple", "bounds"])
+def test_pyarrow_backend_gives_the_same_scores_as_numpy(context, transactions, tmp_path, range_format):
+    path = tmp_path / "sales.csv"
+    transactions.to_csv(path, index=False)
+    context.config["data_sources"]["csv_sources"]["sales_data"]["path"] = str(path)
+    context.config["global_settings"]["range_format"] = range_format
+
+    numpy_result = run_pipeline(context, "numpy")
+    arrow_result = run_pipeline(context, "pyarrow")
+
+    assert isinstance(arrow_result["Monetary"].dtype, pd.ArrowDtype)
+    assert not isinstance(numpy_result["Monetary"].dtype, pd.ArrowDtype)
+    pd.testing.assert_frame_equal(as_values(arrow_result[SCORES]), as_values(numpy_result[SCORES]), check_dtype=False)
+    np.testing.assert_allclose(arrow_result["Monetary"].to_numpy(dtype=float), numpy_result["Monetary"].to_numpy(dtype=float))
+
+
+@pytest.mark.parametrize("arrow_type", [pa.float64(), pa.int64()])
+def test_assign_ranges_accepts_nullable_arrow_columns(context, arrow_type):
+    processing = RFMProcessing(context=context)
+    breaks = np.array([-0.001, 10.0, 20.0, 30.001])
+    break_ranges = [(-0.001, 9.999), (10.0, 19.999), (20.0, 30.001)]
+    values = [0, 10, None, 25, 30, 40]
+    arrow_values = pd.Series(values, dtype=pd.ArrowDtype(arrow_type))
+
+    result = processing.assign_ranges(arrow_values, breaks, break_ranges)
+
+    expected = [processing.get_range_for_value(value, break_ranges) if value is not None else None for value in values]
+    assert expected[2] is None and expected[-1] is None
+    assert result.tolist() == expected
+    numpy_result = processing.assign_ranges(np.array(values, dtype=float), breaks, break_ranges)
+    assert result.tolist() == numpy_result.tolist()
@@ -0,0 +1,65 @@
+import dataclasses
+import numpy as np
+import pandas as pd
+import pytest
+from modules.backfill import RFMBackfill
+from modules.data_loader import DataLoader
+from modules.preprocessing import DataPreprocessor
+from modules.rfm_calculator import RFMCalculator
+from modules.rfm_processing import RFMProcessing
+from modules.segment_assigner import RFMProcessor
+
+# Cortes con historia suficiente para que cada variable tenga al menos num_categories valores distintos tras los
+# outliers (con menos, Jenks falla y la variable queda sin puntaje)
+CUTOFFS = pd.to_datetime(["2024-05-31", "2024-06-30", "2024-09-30", "2024-12-10"])
+
+
+@pytest.fixture
+def preprocessed(context, transactions):
+    return DataPreprocessor(context=context).apply_preprocessing_to_source(transactions.copy(), "retail_data")
+
+
+def normal_run(context, data, cutoff):
+    """ Ejecución normal del pipeline con la ventana terminada en `cutoff`. """
+    date_range = context.config["global_settings"]["date_range"]
+    start = DataLoader.window_start(cutoff, date_range["interval"], date_range["number"])
+    cutoff_context = dataclasses.replace(context, start_date=start, end_date=cutoff)
+    window = data[(data["InvoiceDate"] >= start) & (data["InvoiceDate"] <= cutoff)]
+    rfm_data = RFMCalculator(context=cutoff_context).calculate_rfm(window)
+    scored = RFMProcessor(context=cutoff_context).process_rfm(RFMProcessing(context=cutoff_context).process_rfm_data(rfm_data))
+    return rfm_data, scored
+
+
+def backfill(context, data, monetary_sum):
+    context.config["backfill"]["monetary_sum"] = monetary_sum
+    backfill = RFMBackfill(context=context)
+    rfm_data = backfill.calculate_rfm(data, cutoffs=CUTOFFS)
+    return rfm_data, backfill.score(rfm_data)
+
+
+def snapshot(frame, cutoff):
+    return frame[frame["CutoffDate"] == cutoff].drop(columns=["CutoffDate"]).reset_index(drop=True)
+
+
+def test_groupby_sum_matches_normal_runs_bit_for_bit(context, preprocessed):
+    rfm_data, scored = backfill(context, preprocessed, "groupby")
+    for cutoff in CUTOFFS:
+        expected_rfm, expected = normal_run(context, preprocessed, cutoff)
+        pd.testing.assert_frame_equal(snapshot(rfm_data, cutoff), expected_rfm, check_exact=True, check_dtype=False)
+        pd.testing.assert_frame_equal(snapshot(scored, cutoff), expected.drop(columns=["CutoffDate"]), check_exact=True)
+
+
+def test_cumulative_sum_matches_normal_runs(context, preprocessed):
+    rfm_data, _ = backfill(context, preprocessed, "cumulative")
+    for cutoff in CUTOFFS:
+        expected_rfm, _ = normal_run(context, preprocessed, cutoff)
+        got = snapshot(rfm_data, cutoff)
+        np.testing.assert_allclose(got["Monetary"], expected_rfm["Monetary"], rtol=1e-12, atol=1e-9)
+        pd.testing.assert_frame_equal(got.drop(columns=["Monetary"]), expected_rfm.drop(columns=["Monetary"]),
+                                      check_exact=True, check_dtype=False)
+
+
+def test_unknown_monetary_sum_raises(context):
+    context.config["backfill"]["monetary_sum"] = "approximate"
+    with pytest.raises(ValueError, match="monetary_sum"):
+        RFMBackfill(context=context)
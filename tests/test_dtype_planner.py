@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from modules.data_loader import DataLoader
+from modules.dtype_planner import DtypePlanner
+from modules.preprocessing import DataPreprocessor
+from modules.rfm_calculator import RFMCalculator
+from modules.rfm_processing import RFMProcessing
+from modules.segment_assigner import RFMProcessor
+
+
+@pytest.fixture
+def planner(context):
+    context.config["dtype_planning"]["enabled"] = True
+    return DtypePlanner(context=context)
+
+
+def plan(planner, name, values):
+    return planner._plan_column(name, pd.Series(values))
+
+
+def test_integers_are_downcast(planner):
+    assert plan(planner, "Quantity", np.array([1, -5, 120], dtype=np.int64)).dtype == np.int8
+    assert plan(planner, "Frequency", np.array([1, 40_000], dtype=np.int64)).dtype == np.int32
+
+
+def test_integral_floats_become_integers_only_without_nulls(planner):
+    assert plan(planner, "CustomerID", [12346.0, 17850.0]).dtype == np.int16
+    assert plan(planner, "CustomerID", [12346.0, np.nan]).dtype == np.float64
+    assert plan(planner, "UnitPrice", [2.55, 3.0]).dtype == np.float64
+    planner.downcast_integral_floats = False
+    assert plan(planner, "CustomerID", [12346.0, 17850.0]).dtype == np.float64
+
+
+def test_scores_become_int8(planner):
+    assert plan(planner, "Recency_score", np.array([1, 5, 3], dtype=np.int64)).dtype == np.int8
+    assert plan(planner, "Monetary_score", np.array([1.0, 5.0])).dtype == np.int8
+
+
+def test_tuple_ranges_become_category_labels(planner):
+    result = plan(planner, "Monetary_range", [(0.0, 10.5), (10.501, 20.0), None, (0.0, 10.5)])
+    assert isinstance(result.dtype, pd.CategoricalDtype)
+    assert result.tolist()[:2] == ["(0.0, 10.5)", "(10.501, 20.0)"] and pd.isna(result.iloc[2])
+    assert list(result.cat.categories) == ["(0.0, 10.5)", "(10.501, 20.0)"]
+
+
+def test_strings_use_category_below_the_cardinality_threshold(planner):
+    repeated = ["Campeones", "Leales", "Campeones", "En Riesgo"] * 10
+    assert isinstance(plan(planner, "Business_Category", repeated).dtype, pd.CategoricalDtype)
+    unique = [f"C{i}" for i in range(40)]
+    assert plan(planner, "InvoiceNo", unique).dtype == "string[pyarrow]"
+    planner.category_max_ratio = 1.0
+    assert isinstance(plan(planner, "InvoiceNo", unique).dtype, pd.CategoricalDtype)
+    planner.string_dtype = "pyarrow"
+    assert plan(planner, "Business_Category", repeated).dtype == "string[pyarrow]"
+
+
+def test_mixed_text_is_planned_as_strings(planner):
+    result = plan(planner, "InvoiceNo", [536365, "C536366", 536365, None])
+    assert result.tolist()[:3] == ["536365", "C536366", "536365"] and pd.isna(result.iloc[3])
+
+
+def as_values(data):
+    """ Valores de un DataFrame comparables entre tipos (categorías y enteros reducidos como objetos). """
+    return data.astype(object).where(data.notna(), None)
+
+
+def test_planned_stages_keep_their_values(planner, context, transactions):
+    data = DataPreprocessor(context=context).apply_preprocessing_to_source(transactions.copy(), "retail_data")
+    rfm_data = RFMCalculator(context=context).calculate_rfm(data)
+    scored = RFMProcessing(context=context).process_rfm_data(rfm_data)
+    categorized = RFMProcessor(context=context).process_rfm(scored)
+
+    for stage, frame in [("carga", transactions), ("preprocesamiento", data), ("rfm", rfm_data), ("categorias", categorized)]:
+        planned = planner.optimize(frame, stage)
+        frame = frame.assign(**{column: frame[column].map(lambda value: str(tuple(map(float, value))) if isinstance(value, tuple) else value)
+                                for column in frame.columns if column.endswith("_range")})
+        pd.testing.assert_frame_equal(as_values(planned), as_values(frame), check_dtype=False)
+        assert planned.memory_usage(deep=True).sum() <= frame.memory_usage(deep=True).sum()
+
+
+def test_disabled_planner_returns_the_same_frame(context, transactions):
+    assert DtypePlanner(context=context).optimize(transactions, "carga") is transactions
+    assert DtypePlanner(context=context).read_dtypes() == {}
+
+
+@pytest.fixture
+def mixed_sales(transactions):
+    data = transactions.head(3000).copy()
+    data["InvoiceNo"] = data["InvoiceNo"].astype(str)
+    data.loc[data.index[::7], "InvoiceNo"] = "C" + data.loc[data.index[::7], "InvoiceNo"]
+    return data
+
+
+def loaders(context):
+    """ Cargador sin planificación y cargador que pide los tipos planificados a los lectores. """
+    unplanned = DataLoader(context=context.isolated())
+    context.config["dtype_planning"].update(enabled=True, read_dtypes={"InvoiceNo": "category", "Quantity": "int32"})
+    return unplanned, DataLoader(context=context)
+
+
+@pytest.mark.parametrize("chunksize", [None, 700])
+def test_csv_reader_uses_planned_dtypes(context, mixed_sales, tmp_path, chunksize):
+    path = tmp_path / "sales.csv"
+    mixed_sales.to_csv(path, index=False)
+    context.config["data_sources"]["csv_sources"]["sales_data"].update(path=str(path), select_columns=None)
+    unplanned, planned = loaders(context)
+
+    expected = unplanned.load_from_csv("sales_data", chunksize=chunksize, filter_dates=False)
+    result = planned.load_from_csv("sales_data", chunksize=chunksize, filter_dates=False)
+
+    assert isinstance(result["InvoiceNo"].dtype, pd.CategoricalDtype) and result["Quantity"].dtype == np.int32
+    pd.testing.assert_frame_equal(as_values(result), as_values(expected), check_dtype=False)
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_excel_reader_uses_planned_dtypes(context, mixed_sales, tmp_path, cache):
+    path = tmp_path / "retail.xlsx"
+    data = mixed_sales.head(300).astype({"InvoiceNo": object})
+    data.loc[data.index[1::7], "InvoiceNo"] = data.loc[data.index[1::7], "InvoiceNo"].astype(int)
+    data.to_excel(path, sheet_name="Online Retail", index=False)
+    context.config["data_sources"]["excel_sources"]["retail_data"].update(path=str(path), cache=cache, cache_dir=str(tmp_path / "cache"))
+    unplanned, planned = loaders(context)
+
+    expected = unplanned.load_from_excel("retail_data", filter_dates=False)
+    result = planned.load_from_excel("retail_data", filter_dates=False)
+    if cache:
+        result = planned.load_from_excel("retail_data", filter_dates=False)
+
+    assert isinstance(result["InvoiceNo"].dtype, pd.CategoricalDtype) and result["Quantity"].dtype == np.int32
+    pd.testing.assert_frame_equal(as_values(result), as_values(expected), check_dtype=False)
+
+
+def test_sql_chunks_keep_one_category(context, mixed_sales, tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'sales.sqlite'}"
+    mixed_sales.to_sql("sales", create_engine(db_url), index=False)
+    context.config["data_sources"]["sql_sources"]["warehouse_sales"] = {
+        "db_url": db_url, "table_name": "sales", "parse_dates": ["InvoiceDate"], "chunksize": 500,
+    }
+    unplanned, planned = loaders(context)
+
+    expected = unplanned.load_from_sql("warehouse_sales", filter_dates=False)
+    result = planned.load_from_sql("warehouse_sales", filter_dates=False)
+
+    assert isinstance(result["InvoiceNo"].dtype, pd.CategoricalDtype) and result["Quantity"].dtype == np.int32
+    pd.testing.assert_frame_equal(as_values(result), as_values(expected), check_dtype=False)
@@ -0,0 +1,60 @@
+import os
+import pandas as pd
+import pytest
+from modules.data_loader import DataLoader
+
+
+@pytest.fixture
+def excel_context(context, transactions, tmp_path):
+    path = tmp_path / "retail.xlsx"
+    data = transactions.head(300).copy()
+    # InvoiceNo con números y textos, como las facturas de devolución de Online Retail
+    data["InvoiceNo"] = data["InvoiceNo"].astype(object)
+    data.loc[data.index[::7], "InvoiceNo"] = "C" + data.loc[data.index[::7], "InvoiceNo"].astype(str)
+    data.to_excel(path, sheet_name="Online Retail", index=False)
+    source = context.config["data_sources"]["excel_sources"]["retail_data"]
+    source.update(path=str(path), cache=True, cache_dir=str(tmp_path / "cache"), engine=None)
+    return context
+
+
+def test_shipped_config_keeps_cache_and_engine_opt_in():
+    from tests.conftest import CONFIG_PATH
+    from modules.run_context import get_run_context
+    source = get_run_context(CONFIG_PATH).config["data_sources"]["excel_sources"]["retail_data"]
+    assert not source.get("cache") and not source.get("engine")
+
+
+def test_cached_load_matches_first_read_and_skips_excel(excel_context, monkeypatch):
+    loader = DataLoader(context=excel_context)
+    first = loader.load_from_excel("retail_data", filter_dates=False)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("La segunda lectura debe usar la caché")
+
+    monkeypatch.setattr(DataLoader, "_read_excel", staticmethod(fail))
+    cached = loader.load_from_excel("retail_data", filter_dates=False)
+    pd.testing.assert_frame_equal(cached, first)
+
+
+def test_cache_is_rebuilt_when_workbook_changes(excel_context):
+    loader = DataLoader(context=excel_context)
+    loader.load_from_excel("retail_data", filter_dates=False)
+
+    path = excel_context.config["data_sources"]["excel_sources"]["retail_data"]["path"]
+    changed = pd.read_excel(path, sheet_name="Online Retail").head(100)
+    changed.to_excel(path, sheet_name="Online Retail", index=False)
+    os.utime(path, ns=(1, 1))
+
+    assert len(loader.load_from_excel("retail_data", filter_dates=False)) == 100
+
+
+def test_cached_and_uncached_loads_return_the_same_values(excel_context):
+    source = excel_context.config["data_sources"]["excel_sources"]["retail_data"]
+    loader = DataLoader(context=excel_context)
+    cached = loader.load_from_excel("retail_data", filter_dates=False)
+    source["cache"] = False
+    uncached = loader.load_from_excel("retail_data", filter_dates=False)
+
+    pd.testing.assert_frame_equal(uncached, cached)
+    # Las facturas numéricas y las de devolución ('C...') quedan como texto en ambos caminos
+    assert uncached["InvoiceNo"].map(type).eq(str).all()
@@ -0,0 +1,149 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from modules.data_loader import get_sql_engine, read_arrow_result
+from modules.exporter import DataExporter
+
+
+def rfm_result(customers, offset=0):
+    return pd.DataFrame({
+        "CustomerID": np.asarray(customers, dtype=np.int64),
+        "Monetary": np.arange(len(customers), dtype=float) + offset,
+        "Monetary_range": [(0.0, 10.0)] * (len(customers) - 1) + [None],
+        "Final_Score": ["455"] * len(customers),
+    })
+
+
+@pytest.fixture
+def sql_exporter(context, tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'rfm.sqlite'}"
+    context.config["export_settings"]["sql_sources"]["results_sql"] = {"db_url": db_url, "table_name": "rfm_results"}
+    return DataExporter(context=context), create_engine(db_url)
+
+
+def export(exporter, data, **options):
+    exporter.config["export_settings"]["sql_sources"]["results_sql"].update(options)
+    exporter._write_sql(data, "results_sql")
+
+
+def read_table(engine):
+    return pd.read_sql("SELECT * FROM rfm_results ORDER BY CustomerID", engine)
+
+
+@pytest.mark.parametrize("mode", ["replace", "swap", "upsert"])
+def test_sql_modes_write_ranges_as_text_and_leave_no_staging(sql_exporter, mode):
+    exporter, engine = sql_exporter
+    export(exporter, rfm_result([1, 2, 3]), mode=mode)
+    export(exporter, rfm_result([1, 2, 3], offset=100), mode=mode)
+
+    table = read_table(engine)
+    assert table["Monetary"].tolist() == [100.0, 101.0, 102.0]
+    assert table["Monetary_range"].tolist() == ["(0.0, 10.0)", "(0.0, 10.0)", None]
+    assert inspect(engine).get_table_names() == ["rfm_results"]
+
+
+def test_upsert_replaces_only_loaded_customers(sql_exporter):
+    exporter, engine = sql_exporter
+    export(exporter, rfm_result([1, 2, 3]), mode="replace")
+    export(exporter, rfm_result([3, 4], offset=100), mode="upsert")
+
+    table = read_table(engine)
+    assert table["CustomerID"].tolist() == [1, 2, 3, 4]
+    assert table["Monetary"].tolist() == [0.0, 1.0, 100.0, 101.0]
+
+
+@pytest.mark.parametrize("dialect", ["mysql", "mssql"])
+def test_swap_is_refused_without_transactional_ddl(sql_exporter, monkeypatch, dialect):
+    exporter, engine = sql_exporter
+    export(exporter, rfm_result([1, 2, 3]), mode="replace")
+    db_url = exporter.config["export_settings"]["sql_sources"]["results_sql"]["db_url"]
+    monkeypatch.setattr(get_sql_engine(db_url).dialect, "name", dialect)
+
+    with pytest.raises(ValueError, match="DDL transaccional"):
+        export(exporter, rfm_result([1, 2, 3], offset=100), mode="swap")
+    assert read_table(engine)["Monetary"].tolist() == [0.0, 1.0, 2.0]
+
+
+@pytest.mark.parametrize("mode, keeps_index", [("swap", False), ("upsert", True)])
+def test_swap_drops_indexes_and_upsert_keeps_them(sql_exporter, mode, keeps_index):
+    exporter, engine = sql_exporter
+    export(exporter, rfm_result([1, 2, 3]), mode="replace")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX ix_rfm_customer ON rfm_results (CustomerID)"))
+
+    export(exporter, rfm_result([3, 4], offset=100), mode=mode)
+    assert bool(inspect(engine).get_indexes("rfm_results")) == keeps_index
+
+
+def test_multi_row_chunks_stay_within_parameter_limit(sql_exporter):
+    exporter, engine = sql_exporter
+    # Una sentencia de 15000 filas x 20 columnas supera el límite de parámetros de cualquier compilación de SQLite
+    wide = pd.DataFrame(np.arange(15000 * 20).reshape(15000, 20), columns=[f"c{i}" for i in range(20)])
+    export(exporter, wide.rename(columns={"c0": "CustomerID"}), mode="swap", method="multi", chunksize=15000)
+
+    assert len(read_table(engine)) == 15000
+
+
+@pytest.fixture
+def arrow_exporter(context, tmp_path):
+    path = str(tmp_path / "RFM_Consolidated.arrow")
+    context.config["export_settings"]["arrow_sources"]["results_arrow"] = {"path": path, "keep_versions": 2}
+    return DataExporter(context=context), path
+
+
+@pytest.mark.parametrize("categorical", [False, True], ids=["tuple", "categorical"])
+def test_arrow_round_trip_has_numeric_range_bounds(arrow_exporter, categorical):
+    exporter, path = arrow_exporter
+    data = rfm_result([1, 2, 3])
+    if categorical:
+        data["Monetary_range"] = data["Monetary_range"].map(lambda value: str(value) if value else None).astype("category")
+    exporter._write_arrow(data, "results_arrow")
+
+    result = read_arrow_result(path)
+    assert "Monetary_range" not in result.columns
+    assert result["Monetary_range_lower"].tolist()[:2] == [0.0, 0.0]
+    assert result["Monetary_range_upper"].tolist()[:2] == [10.0, 10.0]
+    assert result[["Monetary_range_lower", "Monetary_range_upper"]].iloc[2].isna().all()
+    assert result["CustomerID"].tolist() == [1, 2, 3]
+
+
+def test_arrow_export_succeeds_while_previous_result_is_open(arrow_exporter, tmp_path):
+    exporter, path = arrow_exporter
+    exporter._write_arrow(rfm_result([1, 2]), "results_arrow")
+    held = read_arrow_result(path, as_table=True)
+
+    for offset in (100, 200, 300):
+        exporter._write_arrow(rfm_result([1, 2], offset=offset), "results_arrow")
+
+    # El lector conserva su resultado y los nuevos lectores ven el último; sólo quedan keep_versions archivos
+    assert held.column("Monetary").to_pylist() == [0.0, 1.0]
+    assert read_arrow_result(path)["Monetary"].tolist() == [300.0, 301.0]
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".arrow")]) == 2
+
+
+def test_export_reports_each_target_and_leaves_no_temp_files(context, tmp_path, monkeypatch):
+    sources = context.config["export_settings"]
+    sources["csv_sources"]["results_csv"] = {"path": str(tmp_path / "results.csv")}
+    sources["parquet_sources"]["results_parquet"] = {"path": str(tmp_path / "results.parquet")}
+
+    def fail_midway(self, path, **kwargs):
+        with open(path, "wb") as file:
+            file.write(b"PAR1")
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", fail_midway)
+    data = rfm_result([1, 2, 3])
+    report = DataExporter(context=context).export(data, targets=[
+        {"format": "csv", "key": "results_csv"},
+        {"format": "parquet", "key": "results_parquet"},
+        {"format": "xml", "key": "results_xml"},
+    ])
+
+    csv, parquet, xml = report
+    assert (csv["status"], csv["error"], csv["rows"]) == ("ok", None, 3)
+    assert csv["bytes"] == os.path.getsize(tmp_path / "results.csv") > 0
+    assert (parquet["status"], parquet["bytes"], parquet["error"]) == ("error", None, "OSError: disco lleno")
+    assert xml["status"] == "error" and "no soportado" in xml["error"]
+    assert sorted(os.listdir(tmp_path)) == ["results.csv"]
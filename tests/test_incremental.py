@@ -0,0 +1,153 @@
+import dataclasses
+import pandas as pd
+import pytest
+from modules.incremental import IncrementalRFM
+from modules.preprocessing import DataPreprocessor
+from modules.rfm_calculator import RFMCalculator
+from modules.rfm_processing import RFMProcessing
+
+
+@pytest.fixture
+def preprocessed(context, transactions):
+    return DataPreprocessor(context=context).apply_preprocessing_to_source(transactions.copy(), "retail_data")
+
+
+@pytest.fixture
+def store_context(context, tmp_path):
+    context.config["incremental"]["store_path"] = str(tmp_path / "rfm_state.sqlite")
+    return context
+
+
+def test_two_batches_match_full_calculation(store_context, preprocessed):
+    midpoint = preprocessed["InvoiceDate"].quantile(0.6)
+    first, second = preprocessed[preprocessed["InvoiceDate"] <= midpoint], preprocessed[preprocessed["InvoiceDate"] > midpoint]
+    incremental = IncrementalRFM(context=store_context)
+
+    incremental.ingest(first)
+    assert incremental.watermark == first["InvoiceDate"].max()
+    # Sólo se recalculan los clientes con compras en el segundo lote
+    assert incremental.ingest(second) == second["CustomerID"].nunique()
+    assert incremental.watermark == preprocessed["InvoiceDate"].max()
+
+    expected = RFMCalculator(context=store_context).calculate_rfm(preprocessed)
+    pd.testing.assert_frame_equal(incremental.get_rfm(), expected, check_dtype=False)
+
+
+def test_batch_at_or_before_watermark_is_ignored(store_context, preprocessed):
+    incremental = IncrementalRFM(context=store_context)
+    incremental.ingest(preprocessed)
+    before = incremental.get_rfm()
+
+    assert incremental.ingest(preprocessed) == 0
+    pd.testing.assert_frame_equal(incremental.get_rfm(), before)
+
+
+def test_purchases_leaving_the_window_are_aged_out(store_context, preprocessed):
+    IncrementalRFM(context=store_context).ingest(preprocessed)
+
+    start = store_context.start_date + pd.DateOffset(months=6)
+    moved = dataclasses.replace(store_context, start_date=start)
+    incremental = IncrementalRFM(context=moved)
+    incremental.ingest(preprocessed.iloc[:0])
+
+    expected = RFMCalculator(context=moved).calculate_rfm(preprocessed[preprocessed["InvoiceDate"] >= start])
+    pd.testing.assert_frame_equal(incremental.get_rfm(), expected, check_dtype=False)
+
+
+def test_window_moved_back_requires_rebuild(store_context, preprocessed):
+    later = dataclasses.replace(store_context, start_date=store_context.start_date + pd.DateOffset(months=6))
+    IncrementalRFM(context=later).ingest(preprocessed)
+
+    with pytest.raises(ValueError, match="reconstruirlo"):
+        IncrementalRFM(context=store_context).ingest(preprocessed)
+
+
+def test_breaks_are_reused_until_distribution_drifts(store_context, preprocessed, monkeypatch):
+    incremental = IncrementalRFM(context=store_context)
+    incremental.ingest(preprocessed)
+    rfm_data = incremental.get_rfm()
+    first = incremental.score(rfm_data, RFMProcessing(context=store_context))
+
+    fitted = []
+    calculate_breaks = RFMProcessing.calculate_breaks
+
+    def counting(self, df, column, *args, **kwargs):
+        fitted.append(column)
+        return calculate_breaks(self, df, column, *args, **kwargs)
+
+    monkeypatch.setattr(RFMProcessing, "calculate_breaks", counting)
+    pd.testing.assert_frame_equal(incremental.score(rfm_data, RFMProcessing(context=store_context)), first)
+    assert fitted == []
+
+    drifted = rfm_data.assign(Monetary=rfm_data["Monetary"] ** 2)
+    incremental.score(drifted, RFMProcessing(context=store_context))
+    assert fitted == ["Monetary"]
+
+
+def test_sketch_backend_scores_with_sketches_of_the_store(store_context, preprocessed, monkeypatch):
+    store_context.config["global_settings"]["quantile_backend"] = "sketch"
+    store_context.config["incremental"]["sketch_batch_size"] = 150
+    incremental = IncrementalRFM(context=store_context)
+    incremental.ingest(preprocessed)
+    rfm_data = incremental.get_rfm()
+
+    received = []
+    process_rfm_data = RFMProcessing.process_rfm_data
+
+    def recording(self, data, fitted_breaks=None, metrics=None, sketches=None):
+        received.append(sketches)
+        return process_rfm_data(self, data, fitted_breaks=fitted_breaks, metrics=metrics, sketches=sketches)
+
+    monkeypatch.setattr(RFMProcessing, "process_rfm_data", recording)
+    result = incremental.score(rfm_data, RFMProcessing(context=store_context))
+
+    sketches = received[0]
+    assert {column: sketch.n for column, sketch in sketches.items()} == {column: len(rfm_data) for column in sketches}
+    expected = process_rfm_data(RFMProcessing(context=store_context), rfm_data, sketches=sketches)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_only_transactions_after_the_watermark_are_preprocessed(store_context, transactions):
+    preprocessor = DataPreprocessor(context=store_context)
+    midpoint = transactions["InvoiceDate"].quantile(0.6)
+    incremental = IncrementalRFM(context=store_context)
+    assert incremental.new_transactions(transactions) is transactions
+
+    incremental.ingest(preprocessor.apply_preprocessing_to_source(transactions[transactions["InvoiceDate"] <= midpoint].copy(), "retail_data"))
+    new = incremental.new_transactions(transactions)
+    assert (new["InvoiceDate"] > incremental.watermark).all()
+    assert len(new) == (transactions["InvoiceDate"] > incremental.watermark).sum()
+    incremental.ingest(preprocessor.apply_preprocessing_to_source(new.copy(), "retail_data"))
+
+    full = preprocessor.apply_preprocessing_to_source(transactions.copy(), "retail_data")
+    expected = RFMCalculator(context=store_context).calculate_rfm(full)
+    pd.testing.assert_frame_equal(incremental.get_rfm(), expected, check_dtype=False)
+
+
+def test_breaks_are_refit_when_their_configuration_changes(store_context, preprocessed, monkeypatch):
+    incremental = IncrementalRFM(context=store_context)
+    incremental.ingest(preprocessed)
+    rfm_data = incremental.get_rfm()
+    incremental.score(rfm_data, RFMProcessing(context=store_context))
+
+    fitted = []
+    calculate_breaks = RFMProcessing.calculate_breaks
+
+    def counting(self, df, column, *args, **kwargs):
+        fitted.append(column)
+        return calculate_breaks(self, df, column, *args, **kwargs)
+
+    monkeypatch.setattr(RFMProcessing, "calculate_breaks", counting)
+    store_context.config["variables"]["Recency"]["breaks_method"] = "percentiles"
+    incremental.score(rfm_data, RFMProcessing(context=store_context))
+    assert fitted == ["Recency"]
+
+    fitted.clear()
+    store_context.config["global_settings"]["num_categories"] = 4
+    result = incremental.score(rfm_data, RFMProcessing(context=store_context))
+    assert sorted(fitted) == ["Frequency", "Monetary", "Recency"]
+    assert result["Monetary_score"].max() == 4
+
+    fitted.clear()
+    incremental.score(rfm_data, RFMProcessing(context=store_context))
+    assert fitted == []
@@ -0,0 +1,49 @@
+import jenkspy
+import numpy as np
+import pytest
+from modules.rfm_processing import RFMProcessing
+
+APPROXIMATIONS = ["sample", "histogram", "kmeans"]
+
+
+@pytest.fixture
+def processing(context):
+    context.config["variables"]["Monetary"].update(jenks_sample_size=1000, jenks_histogram_bins=500)
+    return RFMProcessing(context=context)
+
+
+def breaks_for(processing, values, approximation, column="Monetary"):
+    processing.variables_config[column]["jenks_approximation"] = approximation
+    return processing.calculate_jenks_breaks(values, column)
+
+
+@pytest.mark.parametrize("approximation", APPROXIMATIONS)
+@pytest.mark.parametrize("values", [
+    np.random.default_rng(3).lognormal(4, 1, 5000),                  # Monetary: continuo y sesgado
+    np.random.default_rng(4).geometric(0.15, 5000).astype(float),    # Frequency: pocos valores, muchos empates
+], ids=["lognormal", "geometric"])
+def test_approximate_breaks_are_close_to_exact(processing, values, approximation):
+    n_classes = processing.global_config["num_categories"]
+    values = np.sort(values)
+    exact = jenkspy.jenks_breaks(values, n_classes=n_classes)[1:-1]
+    gvf_exact = RFMProcessing.goodness_of_variance_fit(values, exact)
+
+    breaks = breaks_for(processing, values, approximation)
+    assert len(breaks) == n_classes - 1
+    assert np.all(np.diff(breaks) > 0)
+    assert processing.breaks_report["Monetary"]["gvf"] == pytest.approx(RFMProcessing.goodness_of_variance_fit(values, breaks))
+    assert processing.breaks_report["Monetary"]["gvf"] >= gvf_exact - 0.02
+
+
+@pytest.mark.parametrize("approximation", ["exact"] + APPROXIMATIONS)
+def test_fewer_unique_values_than_classes_raise(processing, approximation):
+    values = np.repeat([1.0, 2.0, 3.0], 50)
+    with pytest.raises(ValueError, match="number of unique values"):
+        breaks_for(processing, values, approximation)
+
+
+def test_kmeans_on_heavily_tied_values_has_no_empty_classes(processing):
+    values = np.concatenate([np.zeros(1000), [0.5, 1.0, 2.0, 3.0, 4.0]])
+    breaks = breaks_for(processing, values, "kmeans")
+    assert len(breaks) == processing.global_config["num_categories"] - 1
+    assert np.all(np.diff(breaks) > 0)
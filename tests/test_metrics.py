@@ -0,0 +1,27 @@
+import json
+from modules.metrics import PipelineMetrics
+
+
+def test_shipped_config_keeps_metrics_opt_in(context, tmp_path):
+    context.config["metrics"]["path"] = str(tmp_path / "metrics" / "rfm_metrics.jsonl")
+    metrics = PipelineMetrics(context=context)
+    with metrics.stage("RFMCalculator.calculate_rfm", rows_in=10) as record:
+        record["rows_out"] = 5
+
+    assert metrics.write() is None
+    assert not (tmp_path / "metrics").exists()
+
+
+def test_enabled_metrics_append_one_run_per_line(context, tmp_path):
+    path = tmp_path / "metrics" / "rfm_metrics.jsonl"
+    context.config["metrics"].update(enabled=True, path=str(path))
+    for _ in range(2):
+        metrics = PipelineMetrics(context=context)
+        with metrics.stage("RFMCalculator.calculate_rfm", rows_in=10) as record:
+            record["rows_out"] = 5
+        metrics.write()
+
+    runs = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(runs) == 2
+    assert [(stage["stage"], stage["rows_in"], stage["rows_out"], stage["status"]) for stage in runs[0]["stages"]] == [
+        ("RFMCalculator.calculate_rfm", 10, 5, "ok")]
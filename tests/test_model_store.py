@@ -0,0 +1,63 @@
+import json
+import pandas as pd
+import pytest
+from benchmarks.synthetic import generate_transactions
+from modules.model_store import RFMModelStore
+from modules.preprocessing import DataPreprocessor
+from modules.rfm_calculator import RFMCalculator
+from modules.rfm_processing import RFMProcessing
+
+
+@pytest.fixture
+def model_context(context, tmp_path):
+    context.config["model"].update(directory=str(tmp_path), path=None)
+    return context
+
+
+def rfm_for(context, transactions):
+    data = DataPreprocessor(context=context).apply_preprocessing_to_source(transactions.copy(), "retail_data")
+    return RFMCalculator(context=context).calculate_rfm(data)
+
+
+@pytest.fixture
+def fitted(model_context, transactions):
+    processing = RFMProcessing(context=model_context)
+    processing.process_rfm_data(rfm_for(model_context, transactions))
+    store = RFMModelStore(context=model_context)
+    return store, store.save(processing), processing.fitted_breaks
+
+
+def rewrite(path, change):
+    with open(path, encoding="utf-8") as file:
+        model = json.load(file)
+    change(model)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(model, file)
+
+
+def test_saved_model_scores_new_data_like_the_fitted_breaks(model_context, fitted):
+    store, path, fitted_breaks = fitted
+    new_data = rfm_for(model_context, generate_transactions(8_000, 300, seed=21))
+
+    result = RFMModelStore(context=model_context).score(new_data, RFMProcessing(context=model_context))
+
+    expected = RFMProcessing(context=model_context).process_rfm_data(new_data, fitted_breaks=fitted_breaks)
+    pd.testing.assert_frame_equal(result, expected)
+    assert store.load(path)["variables"] == store.load()["variables"]
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda model: model.update(format_version=99), "Formato de modelo no soportado"),
+    (lambda model: model["variables"].pop("Monetary"), "no contiene las variables"),
+    (lambda model: model["variables"]["Recency"]["breaks"].pop(), "categorías para 'Recency'"),
+], ids=["format_version", "variables", "num_categories"])
+def test_load_rejects_incompatible_models(fitted, change, message):
+    store, path, _ = fitted
+    rewrite(path, change)
+    with pytest.raises(ValueError, match=message):
+        store.load(path)
+
+
+def test_load_without_a_fitted_model_raises(model_context):
+    with pytest.raises(FileNotFoundError, match="model.mode 'fit'"):
+        RFMModelStore(context=model_context).load()
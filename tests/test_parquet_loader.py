@@ -0,0 +1,88 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pytest
+from modules.data_loader import DataLoader
+
+COLUMNS = ["InvoiceNo", "InvoiceDate", "CustomerID", "UnitPrice"]
+
+
+@pytest.fixture(scope="module")
+def sales(transactions):
+    """ Transacciones del análisis más compras de dos años antes, en particiones que deben descartarse. """
+    old = transactions.head(3000).assign(InvoiceDate=lambda data: data["InvoiceDate"] - pd.DateOffset(years=2))
+    data = pd.concat([transactions, old], ignore_index=True)
+    return data.assign(year=data["InvoiceDate"].dt.year, month=data["InvoiceDate"].dt.month)
+
+
+def write_partitioned(data, path):
+    ds.write_dataset(pa.Table.from_pandas(data, preserve_index=False), path, format="parquet", partitioning=["year", "month"],
+                     partitioning_flavor="hive", max_rows_per_group=2000)
+
+
+@pytest.fixture
+def parquet_loader(context, sales, tmp_path):
+    path = str(tmp_path / "transactions")
+    write_partitioned(sales, path)
+    context.config["data_sources"]["parquet_sources"]["transactions_data"] = {
+        "path": path, "parse_dates": ["InvoiceDate"], "select_columns": COLUMNS,
+        "partitioning": "hive", "partition_date_fields": {"year": "year", "month": "month"},
+    }
+    return DataLoader(context=context)
+
+
+def in_window(loader, data):
+    dates = data["InvoiceDate"]
+    return data[(dates >= loader.start_date) & (dates <= loader.end_date)]
+
+
+def sort(data):
+    return data.sort_values(["InvoiceDate", "InvoiceNo", "CustomerID", "UnitPrice"]).reset_index(drop=True)
+
+
+def test_load_from_parquet_matches_pandas_filter(parquet_loader, sales):
+    result = parquet_loader.load_from_parquet("transactions_data")
+
+    expected = in_window(parquet_loader, sales)[COLUMNS]
+    assert list(result.columns) == COLUMNS and len(result) < len(sales)
+    pd.testing.assert_frame_equal(sort(result), sort(expected), check_dtype=False)
+
+
+def test_partitions_and_row_groups_outside_the_window_are_skipped(parquet_loader, sales, capsys):
+    dataset, _, row_filter, _ = parquet_loader._parquet_dataset("transactions_data", True)
+    assert "no se envía al escáner" not in capsys.readouterr().out
+
+    months = {(year, month) for year, month in zip(sales["year"], sales["month"])}
+    window_months = {(date.year, date.month) for date in in_window(parquet_loader, sales)["InvoiceDate"]}
+    fragments = list(dataset.get_fragments(filter=row_filter))
+    assert len(list(dataset.get_fragments())) == len(months)
+    assert len(fragments) == len(window_months) < len(months)
+    # El filtro de fechas también se evalúa en el escáner, fila a fila dentro de las particiones del rango
+    assert dataset.count_rows(filter=row_filter) == len(in_window(parquet_loader, sales))
+
+
+def test_partition_filter_alone_keeps_only_window_months(parquet_loader, sales):
+    config = parquet_loader.config["data_sources"]["parquet_sources"]["transactions_data"]
+    config["parse_dates"] = ["Missing"]
+    dataset, _, row_filter, _ = parquet_loader._parquet_dataset("transactions_data", True)
+
+    table = dataset.to_table(columns=["year", "month"], filter=row_filter).to_pandas()
+    start, end = parquet_loader.start_date, parquet_loader.end_date
+    period = pd.PeriodIndex.from_fields(year=table["year"], month=table["month"], freq="M")
+    assert period.min() == start.to_period("M") and period.max() == end.to_period("M")
+
+
+@pytest.mark.parametrize("dtype_backend", ["numpy", "pyarrow"])
+def test_timezone_aware_dates_fall_back_to_pandas_filter(context, sales, tmp_path, capsys, dtype_backend):
+    path = str(tmp_path / "transactions_tz")
+    write_partitioned(sales.assign(InvoiceDate=sales["InvoiceDate"].dt.tz_localize("America/Bogota")), path)
+    context.config["global_settings"]["dtype_backend"] = dtype_backend
+    context.config["data_sources"]["parquet_sources"]["transactions_data"] = {
+        "path": path, "parse_dates": ["InvoiceDate"], "select_columns": COLUMNS, "partitioning": "hive",
+    }
+    loader = DataLoader(context=context)
+
+    result = loader.load_from_parquet("transactions_data")
+
+    assert "no se envía al escáner" in capsys.readouterr().out
+    assert len(result) == len(in_window(loader, sales))
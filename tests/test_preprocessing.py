@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules import preprocessing
+from modules.preprocessing import AVAILABLE_STEPS, DataPreprocessor
+
+STEPS = [
+    {"step": "handle_missing_values", "params": {"strategy": {"CustomerID": "drop"}}},
+    {"step": "remove_negative_values", "params": {"columns": ["UnitPrice"]}},
+    {"step": "handle_duplicates", "params": {"subset": None, "keep": "first"}},
+]
+
+
+def run(context, data, steps=STEPS):
+    context.config["global_settings"].setdefault("preprocessing", {})["report"] = False
+    context.config["preprocessing_steps"]["test"] = steps
+    preprocessor = DataPreprocessor(context=context)
+    return preprocessor.apply_preprocessing_to_source(data, "test"), preprocessor.step_report
+
+
+def sequential(data, steps=STEPS):
+    """ Referencia: cada paso aplicado sobre el resultado del anterior. """
+    for step in steps:
+        data = AVAILABLE_STEPS[step["step"]](data, step.get("params", {}))
+    return data
+
+
+def assert_plan_matches_sequential(context, data, steps=STEPS):
+    expected = sequential(data.copy(), steps)
+    original = data.copy()
+    result, _ = run(context.isolated(), data, steps)
+    pd.testing.assert_frame_equal(result, expected)
+    # El plan no modifica el DataFrame de entrada
+    pd.testing.assert_frame_equal(data, original)
+
+
+@pytest.fixture
+def tricky():
+    """ Claves que un hash por fila ingenuo confunde o separa: tipos mezclados, nulos y ceros con signo. """
+    return pd.DataFrame({
+        "InvoiceNo": [536365, "536365", 1, 1.0, None, np.nan, "C536365", "C536365", 7, 7],
+        "CustomerID": [1.0, 1.0, 2.0, 2.0, 3.0, 3.0, 4.0, 4.0, np.nan, 5.0],
+        "UnitPrice": [2.5, 2.5, 0.0, -0.0, np.nan, np.nan, 1.0, 1.0, 3.0, -1.0],
+    })
+
+
+def test_shipped_config_keeps_step_report_quiet():
+    from tests.conftest import CONFIG_PATH
+    from modules.run_context import get_run_context
+    assert not get_run_context(CONFIG_PATH).config["global_settings"]["preprocessing"]["report"]
+
+
+@pytest.mark.parametrize("keep", ["first", "last", False])
+@pytest.mark.parametrize("subset", [None, ["InvoiceNo"], ["InvoiceNo", "UnitPrice"]])
+def test_duplicates_match_sequential_on_mixed_keys(context, tricky, keep, subset):
+    assert_plan_matches_sequential(context, tricky, [{"step": "handle_duplicates", "params": {"subset": subset, "keep": keep}}])
+
+
+def test_plan_matches_sequential_with_filters_casts_and_imputation(context, tricky, transactions):
+    assert_plan_matches_sequential(context, tricky)
+    # Transacciones con líneas repetidas (mismo contenido en filas distintas)
+    data = pd.concat([transactions, transactions.sample(500, random_state=1)], ignore_index=True)
+    steps = STEPS + [
+        {"step": "cast_column_types", "params": {"cast_map": {"InvoiceNo": "str", "CustomerID": "int"}}},
+        {"step": "handle_missing_values", "params": {"strategy": {"UnitPrice": "median"}}},
+        {"step": "handle_duplicates", "params": {"subset": ["InvoiceNo", "CustomerID"], "keep": "last"}},
+    ]
+    assert_plan_matches_sequential(context, data, steps)
+    # Una imputación sin filtros previos tampoco modifica la entrada
+    assert_plan_matches_sequential(context, tricky, [{"step": "handle_missing_values", "params": {"strategy": {"UnitPrice": "zero"}}}])
+
+
+def test_hash_collisions_are_confirmed(context, tricky, monkeypatch):
+    # Con todos los hashes iguales, todas las filas son candidatas y sólo la comparación exacta decide
+    monkeypatch.setattr(preprocessing, "row_hash", lambda df, subset: np.zeros(len(df), dtype=np.uint64))
+    assert_plan_matches_sequential(context, tricky)
+
+
+def test_step_report_counts_rows_dropped_by_each_step(context, tricky):
+    _, report = run(context, tricky, STEPS + [{"step": "unknown_step", "params": {}}])
+    # Los pasos desconocidos no se ejecutan ni se reportan
+    assert [(entry["step"], entry["rows_dropped"]) for entry in report] == [
+        ("handle_missing_values", 1), ("remove_negative_values", 3), ("handle_duplicates", 2)]
+    assert all(entry["seconds"] >= 0 for entry in report)
+
+
+def test_filters_are_applied_once(context, transactions, monkeypatch):
+    calls = []
+    take = pd.DataFrame.take
+
+    def counting(self, indices, *args, **kwargs):
+        calls.append(len(indices))
+        return take(self, indices, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "take", counting)
+    result, _ = run(context, transactions.copy())
+    # Tres filtros, una sola selección del DataFrame completo (las demás son las filas candidatas a duplicado)
+    assert calls[-1] == len(result)
+    assert [rows for rows in calls if rows > len(result) // 2] == [len(result)]
+    assert len(result) < len(transactions)
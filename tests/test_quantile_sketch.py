@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from modules.quantile_sketch import KLLSketch
+
+K = 200
+FRACTIONS = np.linspace(0.001, 0.999, 999)
+
+
+def max_rank_error(sketch, values):
+    """ Máxima distancia entre la fracción pedida y el rango normalizado del valor estimado. """
+    values = np.sort(values)
+    estimates = sketch.quantiles(FRACTIONS)
+    lower = np.searchsorted(values, estimates, side="left") / len(values)
+    upper = np.searchsorted(values, estimates, side="right") / len(values)
+    return float(np.max(np.maximum(lower - FRACTIONS, 0) + np.maximum(FRACTIONS - upper, 0)))
+
+
+@pytest.fixture(scope="module")
+def values():
+    return np.random.default_rng(11).lognormal(3, 1.5, 400_000)
+
+
+def test_single_stream_error_is_within_bound(values):
+    sketch = KLLSketch(K).update(values)
+    assert max_rank_error(sketch, values) <= KLLSketch.normalized_rank_error(K)
+
+
+def test_update_in_chunks_matches_single_update(values):
+    batch_size = KLLSketch.BATCH_FACTOR * K
+    chunked = KLLSketch(K)
+    for start in range(0, len(values), 5 * batch_size):
+        chunked.update(values[start:start + 5 * batch_size])
+    bulk = KLLSketch(K).update(values)
+
+    assert chunked.n == bulk.n == len(values)
+    for chunked_items, bulk_items in zip(chunked.levels, bulk.levels, strict=True):
+        np.testing.assert_array_equal(chunked_items, bulk_items)
+
+
+def test_update_keeps_retained_items_bounded(values):
+    sketch = KLLSketch(K).update(values)
+    assert len(sketch.levels[0]) <= sketch._capacity(0)
+    assert sum(len(items) for items in sketch.levels) <= 3 * K
+
+
+@pytest.mark.parametrize("partitions", [10, 50, 200])
+def test_merged_partitions_error_is_within_merged_bound(values, partitions):
+    parts = np.array_split(np.random.default_rng(12).permutation(values), partitions)
+    sketches = [KLLSketch(K, seed=i).update(part) for i, part in enumerate(parts)]
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged.merge(sketch)
+
+    assert merged.n == len(values)
+    assert (merged.min, merged.max) == (values.min(), values.max())
+    assert max_rank_error(merged, values) <= KLLSketch.normalized_rank_error(K, merged=True)
+
+
+def test_merge_of_small_sketches_is_exact():
+    left, right = KLLSketch(K).update([5.0, 1.0, np.nan, 3.0]), KLLSketch(K, seed=1).update([2.0, 4.0])
+    merged = left.merge(right)
+    assert merged.n == 5
+    np.testing.assert_array_equal(merged.quantiles([0, 0.2, 0.4, 0.6, 0.8, 1]), [1.0, 1.0, 2.0, 3.0, 4.0, 5.0])
+
+
+def test_merge_requires_same_k():
+    with pytest.raises(ValueError, match="distinto k"):
+        KLLSketch(K).merge(KLLSketch(K * 2).update([1.0]))
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules.preprocessing import DataPreprocessor
+from modules.rfm_calculator import RFMCalculator, RFMPartialAggregate
+from modules.rfm_processing import RFMProcessing
+
+
+@pytest.fixture
+def preprocessed(context, transactions):
+    return DataPreprocessor(context=context).apply_preprocessing_to_source(transactions.copy(), "retail_data")
+
+
+def calculate(context, data, **global_settings):
+    context.config["global_settings"].update(global_settings)
+    return RFMCalculator(context=context).calculate_rfm(data)
+
+
+def test_vectorized_aggregation_matches_groupby(context, preprocessed):
+    expected = calculate(context.isolated(), preprocessed, rfm_aggregation="groupby")
+    result = calculate(context.isolated(), preprocessed, rfm_aggregation="vectorized")
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+
+def chunks_of(data, size):
+    return [data.iloc[start:start + size] for start in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [997, 5000])
+def test_streaming_matches_in_memory(context, preprocessed, monkeypatch, size):
+    monkeypatch.setattr(RFMPartialAggregate, "COMPACT_EVERY", 4)
+    # En orden de fecha, las compras de cada cliente (y las de un mismo día) quedan repartidas entre fragmentos
+    ordered = preprocessed.sort_values("InvoiceDate", kind="stable")
+    chunks = chunks_of(ordered, size)
+    first, second = set(chunks[0]["CustomerID"]), set(chunks[1]["CustomerID"])
+    day = chunks[0]["InvoiceDate"].iloc[-1]
+    assert first & second and (chunks[1]["InvoiceDate"] == day).any()
+
+    calculator = RFMCalculator(context=context)
+    result = calculator.calculate_rfm_streaming(chunks)
+    pd.testing.assert_frame_equal(result, calculator.calculate_rfm(preprocessed), check_dtype=False)
+
+
+def test_merged_partial_aggregates_match_in_memory(context, preprocessed):
+    calculator = RFMCalculator(context=context)
+    chunks = chunks_of(preprocessed.sample(frac=1, random_state=3), 2500)
+    left, right = RFMPartialAggregate(calculator.columns), RFMPartialAggregate(calculator.columns)
+    for chunk in chunks[::2]:
+        left.update(chunk)
+    for chunk in chunks[1::2]:
+        right.update(chunk)
+
+    result = left.merge(right).finalize(calculator.end_date)
+    pd.testing.assert_frame_equal(result, calculator.calculate_rfm(preprocessed), check_dtype=False)
+
+
+def test_streaming_applies_preprocessing_per_chunk(context, transactions):
+    preprocessor = DataPreprocessor(context=context)
+    calculator = RFMCalculator(context=context)
+    # Sin duplicados que crucen fragmentos, preprocesar por fragmento equivale a preprocesar todo junto
+    data = transactions.drop_duplicates()
+    result = calculator.calculate_rfm_streaming(chunks_of(data, 4000), preprocessor, "retail_data")
+
+    expected = calculator.calculate_rfm(preprocessor.apply_preprocessing_to_source(data.copy(), "retail_data"))
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_streaming_builds_sketches_of_final_aggregates(context, preprocessed):
+    context.config["global_settings"]["quantile_backend"] = "sketch"
+    calculator = RFMCalculator(context=context)
+    rfm_data = calculator.calculate_rfm_streaming(chunks_of(preprocessed, 3000))
+
+    expected = RFMProcessing(context=context).build_sketches(rfm_data)
+    assert set(calculator.sketches) == set(expected)
+    for column, sketch in calculator.sketches.items():
+        assert sketch.n == rfm_data[column].notna().sum()
+        np.testing.assert_array_equal(sketch.quantiles([0.25, 0.5, 0.75]), expected[column].quantiles([0.25, 0.5, 0.75]))
+
+
+def test_parallel_matches_sequential(context, transactions):
+    preprocessor = DataPreprocessor(context=context)
+    calculator = RFMCalculator(context=context)
+    result = calculator.calculate_rfm_parallel(transactions, preprocessor, "retail_data", workers=2)
+
+    expected = calculator.calculate_rfm(preprocessor.apply_preprocessing_to_source(transactions.copy(), "retail_data"))
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+    assert calculator.sketches == {}
+
+
+def test_parallel_merges_partition_sketches(context, preprocessed):
+    context.config["global_settings"].update(quantile_backend="sketch", quantile_sketch_k=1000)
+    calculator = RFMCalculator(context=context)
+    rfm_data = calculator.calculate_rfm_parallel(preprocessed, workers=2)
+
+    processing = RFMProcessing(context=context)
+    assert set(calculator.sketches) == set(processing.variables_config)
+    for column, sketch in calculator.sketches.items():
+        values = np.sort(rfm_data[column].to_numpy(dtype=float))
+        assert sketch.n == len(values)
+        assert (sketch.min, sketch.max) == (values[0], values[-1])
+        # Con menos de k clientes en total, los resúmenes combinados no compactan y son exactos
+        assert len(sketch.levels[0]) == len(values)
+        np.testing.assert_array_equal(sketch.quantiles([0.25, 0.5, 0.75]), values[np.ceil(np.array([0.25, 0.5, 0.75]) * len(values)).astype(int) - 1])
+
+    result = processing.process_rfm_data(rfm_data, sketches=calculator.sketches)
+    pd.testing.assert_frame_equal(result, RFMProcessing(context=context).process_rfm_data(rfm_data))
+
+
+@pytest.mark.parametrize("action", ["mean", "median"])
+def test_parallel_rejects_dataset_wide_imputation(context, transactions, action):
+    context.config["preprocessing_steps"]["retail_data"][0]["params"]["strategy"]["UnitPrice"] = action
+    calculator = RFMCalculator(context=context)
+    with pytest.raises(ValueError, match="por partición"):
+        calculator.calculate_rfm_parallel(transactions, DataPreprocessor(context=context), "retail_data", workers=2)
@@ -0,0 +1,121 @@
+import jenkspy
+import numpy as np
+import pandas as pd
+import pytest
+from modules.preprocessing import DataPreprocessor
+from modules.rfm_calculator import RFMCalculator
+from modules.rfm_processing import RFMProcessing
+
+RANGE_FORMATS = ["tuple", "categorical", "bounds"]
+
+
+def ranges_for(breaks):
+    """ Rangos con huecos de 0.001 entre ellos, como los genera `calculate_breaks`. """
+    break_ranges = [(breaks[i], breaks[i + 1]) for i in range(len(breaks) - 1)]
+    for i in range(len(break_ranges) - 1):
+        if break_ranges[i][1] >= break_ranges[i + 1][0]:
+            break_ranges[i] = (break_ranges[i][0], break_ranges[i][1] - 0.001)
+    return break_ranges
+
+
+@pytest.fixture
+def processing(context):
+    return RFMProcessing(context=context)
+
+
+@pytest.mark.parametrize("range_format", RANGE_FORMATS)
+@pytest.mark.parametrize("breaks", [
+    np.array([-0.001, 10.0, 20.0, 30.001]),
+    np.array([-0.001, 5.0, 5.0, 10.001]),    # Breaks repetidos (percentiles con empates)
+], ids=["distinct", "tied"])
+@pytest.mark.parametrize("with_bins", [True, False], ids=["digitize", "searchsorted"])
+def test_assign_ranges_matches_get_range_for_value(processing, range_format, breaks, with_bins):
+    processing.global_config["range_format"] = range_format
+    break_ranges = ranges_for(breaks)
+    values = np.concatenate([
+        [lower for lower, _ in break_ranges], [upper for _, upper in break_ranges],
+        breaks[1:-1] - 0.0005,                  # Dentro de los huecos de 0.001
+        [-1.0, 40.0, np.nan, 3.3, 15.0],        # Fuera de los límites, nulo y valores interiores
+    ])
+    expected = [processing.get_range_for_value(value, break_ranges) for value in values]
+    bins = np.digitize(values, breaks, right=False) if with_bins else None
+
+    result = processing.assign_ranges(values, breaks, break_ranges, bins=bins)
+
+    assert None in expected
+    if range_format == "tuple":
+        assert isinstance(result, np.ndarray) and result.dtype == object
+        assert result.tolist() == expected
+    elif range_format == "categorical":
+        labels = [str((float(r[0]), float(r[1]))) if r is not None else None for r in expected]
+        assert pd.Series(result).astype(object).where(pd.notna(result), None).tolist() == labels
+    else:
+        np.testing.assert_array_equal(result["lower"], [r[0] if r is not None else np.nan for r in expected])
+        np.testing.assert_array_equal(result["upper"], [r[1] if r is not None else np.nan for r in expected])
+
+
+def test_unknown_range_format_raises(processing):
+    processing.global_config["range_format"] = "text"
+    with pytest.raises(ValueError, match="no soportado"):
+        processing.assign_ranges([1.0], np.array([0.0, 2.0]), [(0.0, 2.0)])
+
+
+def original_breaks(processing, df, column):
+    """ Cálculo original: cuantiles de pandas/np.percentile sobre la columna y breaks sobre el DataFrame filtrado. """
+    var_config = processing.variables_config[column]
+    values = df[column]
+    method = var_config["outlier_method"]
+    if method == "IQR":
+        Q1, Q3 = values.quantile(0.25), values.quantile(0.75)
+        factor = var_config.get("iqr_factor", 1.5)
+        LI, LS = Q1 - factor * (Q3 - Q1), Q3 + factor * (Q3 - Q1)
+    elif method == "std_dev":
+        factor = var_config.get("std_dev_factor", 2)
+        LI, LS = values.mean() - factor * values.std(), values.mean() + factor * values.std()
+    else:
+        LI = np.percentile(values, var_config.get("percentile_lower", 5))
+        LS = np.percentile(values, var_config.get("percentile_upper", 95))
+    filtered = values[(values >= LI) & (values <= LS) & values.notnull()]
+    n_classes = processing.global_config["num_categories"]
+    if var_config["breaks_method"] == "percentiles":
+        breaks = np.percentile(filtered, np.linspace(0, 100, n_classes + 1)[1:-1])
+    else:
+        breaks = jenkspy.jenks_breaks(filtered.values, n_classes=n_classes)[1:-1]
+    return np.concatenate(([values.min() - 0.001], breaks, [values.max() + 0.001]))
+
+
+@pytest.fixture
+def rfm_data(context, transactions):
+    data = DataPreprocessor(context=context).apply_preprocessing_to_source(transactions.copy(), "retail_data")
+    return RFMCalculator(context=context).calculate_rfm(data)
+
+
+@pytest.mark.parametrize("outlier_method", ["IQR", "std_dev", "percentiles"])
+@pytest.mark.parametrize("breaks_method", ["percentiles", "jenks"])
+def test_sorted_breaks_match_original_percentile_path(context, rfm_data, outlier_method, breaks_method):
+    for var_config in context.config["variables"].values():
+        var_config.update(outlier_method=outlier_method, breaks_method=breaks_method, jenks_approximation="exact")
+    processing = RFMProcessing(context=context)
+
+    for column in processing.variables_config:
+        breaks, break_ranges = processing.calculate_breaks(rfm_data, column)
+        expected = original_breaks(processing, rfm_data, column)
+        np.testing.assert_allclose(breaks, expected, rtol=1e-12)
+        np.testing.assert_allclose(break_ranges, ranges_for(expected), rtol=1e-12)
+
+
+@pytest.mark.parametrize("outlier_method", ["IQR", "std_dev"])
+def test_threaded_variables_match_sequential_and_original(context, rfm_data, outlier_method):
+    for var_config in context.config["variables"].values():
+        var_config["outlier_method"] = outlier_method
+    sequential = RFMProcessing(context=context).process_rfm_data(rfm_data)
+    context.config["global_settings"]["variable_workers"] = 3
+    threaded_processing = RFMProcessing(context=context)
+    threaded = threaded_processing.process_rfm_data(rfm_data)
+
+    assert threaded_processing.variable_workers == 3
+    pd.testing.assert_frame_equal(threaded, sequential)
+    original = {column: (breaks, ranges_for(breaks))
+                for column in threaded_processing.variables_config
+                for breaks in [original_breaks(threaded_processing, rfm_data, column)]}
+    pd.testing.assert_frame_equal(threaded, RFMProcessing(context=context).process_rfm_data(rfm_data, fitted_breaks=original))
@@ -0,0 +1,26 @@
+import pytest
+from modules.data_loader import DataLoader
+from modules.run_context import get_run_context
+from tests.conftest import CONFIG_PATH
+
+
+def test_missing_config_path_raises_value_error():
+    with pytest.raises(ValueError, match="config_path"):
+        DataLoader()
+
+
+def test_context_is_cached_per_config_path():
+    assert get_run_context(CONFIG_PATH) is get_run_context(CONFIG_PATH)
+
+
+def test_isolated_context_does_not_touch_cached_config():
+    shared = get_run_context(CONFIG_PATH)
+    aggregation = shared.config["global_settings"]["rfm_aggregation"]
+    months = shared.config["global_settings"]["date_range"]["number"]
+    isolated = shared.isolated()
+    isolated.config["global_settings"]["rfm_aggregation"] = "otro"
+    isolated.config["global_settings"]["date_range"]["number"] = months + 1
+
+    assert shared.config["global_settings"]["rfm_aggregation"] == aggregation
+    assert shared.config["global_settings"]["date_range"]["number"] == months
+    assert isolated.start_date == shared.start_date and isolated.end_date == shared.end_date
@@ -0,0 +1,79 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+from modules.segment_assigner import RFMProcessor
+
+
+def scored(context, scores=range(1, 6)):
+    """ Un cliente por combinación de puntajes; uno de cada cuatro es nuevo (un mes con compras en el mes de corte). """
+    combinations = np.array(list(itertools.product(scores, repeat=3)))
+    new = np.arange(len(combinations)) % 4 == 0
+    end_date = context.end_date
+    return pd.DataFrame({
+        "CustomerID": np.arange(len(combinations)),
+        "Recency_score": combinations[:, 0],
+        "Frequency_score": combinations[:, 1],
+        "Monetary_score": combinations[:, 2],
+        "LastPurchaseDate": np.where(new, end_date - pd.Timedelta(days=1), end_date - pd.Timedelta(days=90)),
+        "MonthsWithPurchases": np.where(new, 1, 3),
+    })
+
+
+def processor(context, encoding):
+    context = context.isolated()
+    context.config["score_encoding"] = encoding
+    return RFMProcessor(context=context)
+
+
+@pytest.mark.parametrize("num_categories", [5, 9, 12])
+def test_legacy_rendering_of_integer_scores_matches_string_encoding(context, num_categories):
+    context.config["global_settings"].update(num_categories=num_categories, score_range={"min": 1, "max": num_categories, "step": 1})
+    data = scored(context, scores=range(1, num_categories + 1))
+    integer, string = processor(context, "integer"), processor(context, "string")
+
+    final_score = integer.calculate_final_score(data)
+    assert np.issubdtype(final_score.dtype, np.integer)
+    rendered = RFMProcessor.render_legacy_score(final_score, integer.score_base)
+    pd.testing.assert_series_equal(rendered, string.calculate_final_score(data), check_names=False)
+
+
+def test_categories_are_the_same_under_both_encodings(context):
+    data = scored(context)
+    integer = processor(context, "integer").process_rfm(data.copy())
+    string = processor(context, "string").process_rfm(data.copy())
+
+    assert (string["Business_Category"] == "Nuevo").sum() == len(data) // 4 + 1
+    pd.testing.assert_series_equal(integer["Business_Category"], string["Business_Category"])
+    assert (RFMProcessor.render_legacy_score(integer["Final_Score"], 10) == string["Final_Score"]).all()
+
+
+def baseline_categories(processor, data):
+    """ Asignación original: búsqueda secuencial de cada score en las listas del YAML y clientes nuevos aparte. """
+    def categorize(score):
+        for category, values in processor.business_categories.items():
+            if str(score) in values:
+                return category
+        return "Sin Categoría"
+
+    is_new = (data["MonthsWithPurchases"] == 1) & (data["LastPurchaseDate"].dt.to_period("M") == processor.end_date.to_period("M"))
+    final_score = data["Recency_score"].astype(str) + data["Frequency_score"].astype(str) + data["Monetary_score"].astype(str)
+    return final_score.apply(categorize).where(~is_new, "Nuevo")
+
+
+@pytest.mark.parametrize("encoding", ["string", "integer"])
+def test_compiled_lookup_matches_baseline_loop(context, encoding):
+    categories = context.config["business_categories"]
+    categories["Platino"].remove("455")         # Score sin categoría
+    categories["Abandonador"].remove("111")
+    categories["Bronce"].append("555")          # Score en dos categorías: gana la primera (Platino)
+    context.config["global_settings"].update(num_categories=6, score_range={"min": 1, "max": 6, "step": 1})
+    data = scored(context, scores=range(1, 7))  # Puntajes con 6 que no aparecen en ninguna lista
+
+    rfm_processor = processor(context, encoding)
+    result = rfm_processor.process_rfm(data.copy())
+
+    expected = baseline_categories(rfm_processor, data)
+    assert {"Sin Categoría", "Nuevo", "Platino"} <= set(expected)
+    assert rfm_processor.category_lookup["555"] == "Platino" and "455" not in rfm_processor.category_lookup
+    pd.testing.assert_series_equal(result["Business_Category"], expected, check_names=False)
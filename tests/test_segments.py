@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules.preprocessing import DataPreprocessor
+from modules.rfm_calculator import RFMCalculator
+from modules.rfm_processing import RFMProcessing
+from modules.segment_assigner import RFMProcessor
+from modules.segments import SegmentedRFM
+
+COUNTRIES = np.array(["United Kingdom", "France", "Germany"])
+
+
+@pytest.fixture
+def segmented_data(context, transactions):
+    data = DataPreprocessor(context=context).apply_preprocessing_to_source(transactions.copy(), "retail_data")
+    # Un país por cliente, como en Online Retail
+    return data.assign(Country=COUNTRIES[data["CustomerID"].to_numpy() % len(COUNTRIES)])
+
+
+def test_shipped_config_does_not_segment_by_unloaded_column():
+    from tests.conftest import CONFIG_PATH
+    from modules.run_context import get_run_context
+    config = get_run_context(CONFIG_PATH).config
+    group_by = config["segments"]["group_by"]
+    assert group_by is None or group_by in config["data_sources"]["excel_sources"]["retail_data"]["select_columns"]
+
+
+def test_missing_segment_column_names_select_columns(context, transactions):
+    context.config["segments"]["group_by"] = "Country"
+    with pytest.raises(KeyError, match="select_columns"):
+        SegmentedRFM(context=context).assign_segments(transactions)
+
+
+def test_grouped_segments_match_independent_runs(context, segmented_data):
+    context.config["segments"].update(group_by="Country", workers=2)
+    segmented = SegmentedRFM(context=context)
+    result = segmented.score(segmented.calculate_rfm(segmented_data))
+
+    for country in COUNTRIES:
+        subset = segmented_data[segmented_data["Country"] == country].drop(columns=["Country"])
+        rfm_data = RFMCalculator(context=context).calculate_rfm(subset)
+        expected = RFMProcessor(context=context).process_rfm(RFMProcessing(context=context).process_rfm_data(rfm_data))
+        got = result[result["Segment"] == country].drop(columns=["Segment"]).reset_index(drop=True)
+        pd.testing.assert_frame_equal(got, expected)
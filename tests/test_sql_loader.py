@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from modules.data_loader import DataLoader
+from modules.rfm_calculator import RFMCalculator
+
+COLUMNS = ["InvoiceNo", "InvoiceDate", "CustomerID", "UnitPrice"]
+
+
+@pytest.fixture(scope="module")
+def sales(transactions):
+    """ Transacciones del análisis más compras anteriores a la ventana, que la consulta debe excluir. """
+    old = transactions.head(2000).assign(InvoiceDate=lambda data: data["InvoiceDate"] - pd.DateOffset(years=2))
+    return pd.concat([transactions, old], ignore_index=True)
+
+
+@pytest.fixture
+def sql_loader(context, sales, tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'sales.sqlite'}"
+    sales.to_sql("sales", create_engine(db_url), index=False)
+    context.config["data_sources"]["sql_sources"]["warehouse_sales"] = {
+        "db_url": db_url, "table_name": "sales", "parse_dates": ["InvoiceDate"], "select_columns": COLUMNS, "chunksize": 3000,
+    }
+    return DataLoader(context=context)
+
+
+def in_window(loader, data):
+    dates = data["InvoiceDate"]
+    return data[(dates >= loader.start_date) & (dates <= loader.end_date)]
+
+
+def test_load_from_sql_pushes_columns_and_date_range(sql_loader, sales):
+    result = sql_loader.load_from_sql("warehouse_sales")
+
+    expected = in_window(sql_loader, sales)[COLUMNS].reset_index(drop=True)
+    assert len(result) < len(sales)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_in_database_aggregation_matches_calculate_rfm(sql_loader, sales):
+    result = sql_loader.load_rfm_from_sql("warehouse_sales")
+
+    calculator = RFMCalculator(context=sql_loader.context)
+    expected = calculator.calculate_rfm(in_window(sql_loader, sales).dropna(subset=["CustomerID"]))
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("no_chunks", [False, True], ids=["empty_chunk", "no_chunks"])
+def test_empty_result_keeps_selected_columns(sql_loader, monkeypatch, no_chunks):
+    sql_loader.start_date = sql_loader.end_date = pd.Timestamp("1990-01-01")
+    if no_chunks:
+        # Algunos drivers y versiones de pandas no entregan ningún lote cuando la consulta no devuelve filas
+        monkeypatch.setattr(sql_loader, "iter_sql_chunks", lambda *args, **kwargs: iter([]))
+    result = sql_loader.load_from_sql("warehouse_sales")
+
+    assert result.empty and list(result.columns) == COLUMNS
+    assert pd.api.types.is_datetime64_any_dtype(result["InvoiceDate"])
+
+
+def test_table_is_reflected_once_per_key(sql_loader):
+    sql_loader.load_from_sql("warehouse_sales")
+    table = sql_loader._sql_tables["warehouse_sales"][1]
+    sql_loader.load_rfm_from_sql("warehouse_sales")
+    list(sql_loader.iter_sql_chunks("warehouse_sales"))
+
+    assert sql_loader._sql_tables["warehouse_sales"][1] is table